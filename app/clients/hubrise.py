@@ -1,14 +1,148 @@
 import asyncio, random, httpx 
-from typing import Any, Dict, Optional, Mapping, Iterable
+from collections import defaultdict, deque
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, NamedTuple,
+    Optional, Mapping, Iterable, Tuple,
+)
 from app.core.config import settings 
 
 _RETRY_STATUSES: set[int] = {429, 500, 502, 503, 504}
+_RETRY_ERRORS = (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.TransportError)
+# Non-idempotent writes are only retried when HubRise cannot have acted on them:
+# rate-limited, or the request never left (connection not established).
+_SAFE_WRITE_STATUSES: set[int] = {429}
+_SAFE_WRITE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class RawBody(NamedTuple):
+    """Upstream body bytes, untouched, for routes that proxy HubRise as-is."""
+    content: bytes
+    media_type: str
+
+class LatencyTracker:
+    """
+    Rolling window of successful request latencies per endpoint.
+    Used to decide when a GET is "slow enough" to be worth hedging.
+    """
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self._window = window
+        self._min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self._window))
+        self._p95: Dict[str, Optional[float]] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        self._samples[endpoint].append(seconds)
+        self._p95.pop(endpoint, None)  # recomputed lazily on next read
+
+    def p95(self, endpoint: str) -> Optional[float]:
+        if endpoint in self._p95:
+            return self._p95[endpoint]
+        samples = self._samples.get(endpoint)
+        if not samples or len(samples) < self._min_samples:
+            return None
+        ordered = sorted(samples)
+        value = ordered[int(0.95 * (len(ordered) - 1))]
+        self._p95[endpoint] = value
+        return value
+
+class HedgeBudget:
+    """
+    Token bucket shared by all clients in the process. Every primary GET earns
+    `ratio` of a token and every hedge spends a whole one, so hedging can add at
+    most ~ratio extra upstream load (plus a small burst), never double it.
+    """
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+
+    def earn(self) -> None:
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.hedges_sent += 1
+            return True
+        self.hedges_denied += 1
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedges_denied": self.hedges_denied,
+        }
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls onto one in-flight task. Callers that
+    arrive while a key is in flight await the leader's result instead of
+    issuing their own upstream request; the shared result must be treated as
+    read-only.
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            self.leaders += 1
+            # Run detached from the leader so a disconnecting leader doesn't
+            # cancel the call for everyone waiting on it.
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._inflight),
+        }
+
+# Process-wide state: HubRiseClient is built per request, latency history,
+# the hedge budget and in-flight reads must outlive it.
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget(ratio=settings.HUBRISE_HEDGE_BUDGET_RATIO)
+single_flight = SingleFlight()
 
 class HubRiseClient: 
-    def __init__(self, access_token: str, http: httpx.AsyncClient): 
+    def __init__(
+        self,
+        access_token: str,
+        http: httpx.AsyncClient,
+        *,
+        hedge: Optional[bool] = None,
+        latency: Optional[LatencyTracker] = None,
+        budget: Optional[HedgeBudget] = None,
+        flights: Optional[SingleFlight] = None,
+    ): 
         self._token = access_token 
         self._base = str(settings.HUBRISE_API_URL)
         self._http = http 
+        self._hedge = settings.HUBRISE_HEDGE_ENABLED if hedge is None else hedge
+        self._latency = latency or latency_tracker
+        self._budget = budget or hedge_budget
+        self._flights = flights or single_flight
+        self._collapse = settings.HUBRISE_SINGLE_FLIGHT_ENABLED
+
+    @property
+    def access_token(self) -> str:
+        return self._token
     
     def headers(self, extra: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
         base = {"X-Access-Token": self._token, 
@@ -19,7 +153,8 @@ class HubRiseClient:
     
     async def _request_with_retries(
         self, method: str, path: str, *, max_attempts: int = 3, backoff_base: float = 0.25,
-        retry_statuses: Iterable[int] = _RETRY_STATUSES, **kwargs
+        retry_statuses: Iterable[int] = _RETRY_STATUSES,
+        retry_errors: Tuple[type, ...] = _RETRY_ERRORS, **kwargs
     ) -> httpx.Response: 
         url = f"{self._base}{path}"
         headers = self.headers(kwargs.pop("headers", None))
@@ -33,10 +168,12 @@ class HubRiseClient:
                     delay = float(ra) if (ra and ra.isdigit()) else (backoff_base * (2 ** (attempt-1)) + random.uniform(0, 0.2))
                     await asyncio.sleep(delay)
                     continue 
+                if resp.status_code == 304:  # conditional GET, validators still match
+                    return resp
                 resp.raise_for_status()
                 return resp 
             
-            except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.TransportError):
+            except retry_errors:
                 if attempt >= max_attempts: raise 
                 delay = backoff_base * (2 ** (attempt - 1)) + random.uniform(0, 0.2)
                 await asyncio.sleep(delay)
@@ -44,48 +181,207 @@ class HubRiseClient:
     async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
         return await self._request_with_retries(method, path, **kwargs)
 
+    async def _hedged_get(self, endpoint: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Idempotent GET with optional hedging: if the first attempt hasn't
+        answered within the observed p95 for `endpoint`, fire one identical
+        request (budget permitting) and return whichever succeeds first.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        delay = self._latency.p95(endpoint) if self._hedge else None
+        if delay is None:
+            resp = await self.request("GET", path, **kwargs)
+            self._latency.record(endpoint, loop.time() - started)
+            return resp
+
+        self._budget.earn()
+        delay = max(delay, settings.HUBRISE_HEDGE_MIN_DELAY_MS / 1000)
+        primary = asyncio.ensure_future(self.request("GET", path, **kwargs))
+        hedge: Optional["asyncio.Future[httpx.Response]"] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._budget.try_spend():
+                resp = await primary
+                self._latency.record(endpoint, loop.time() - started)
+                return resp
+
+            hedge = asyncio.ensure_future(self.request("GET", path, **kwargs))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if task is hedge:
+                        self._budget.hedges_won += 1
+                    self._latency.record(endpoint, loop.time() - started)
+                    return task.result()
+            assert error is not None
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def get_json(
+        self, endpoint: str, path: str, params: Optional[Mapping[str, str]] = None
+    ) -> Any:
+        """
+        Idempotent read returning the parsed body. Identical concurrent reads
+        (same path, params and token) share a single upstream call.
+        """
+        async def fetch() -> Any:
+            resp = await self._hedged_get(endpoint, path, params=params)
+            return resp.json()
+
+        return await self._collapsed("json", path, params, fetch)
+
+    async def get_raw(
+        self, endpoint: str, path: str, params: Optional[Mapping[str, str]] = None
+    ) -> RawBody:
+        """
+        Passthrough read: the body bytes and content type exactly as HubRise
+        sent them, for routes that would otherwise parse then re-encode.
+        """
+        async def fetch() -> RawBody:
+            resp = await self._hedged_get(endpoint, path, params=params)
+            media_type = resp.headers.get("Content-Type", "application/json")
+            return RawBody(resp.content, media_type)
+
+        return await self._collapsed("raw", path, params, fetch)
+
+    async def _collapsed(
+        self, kind: str, path: str, params: Optional[Mapping[str, str]],
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if not self._collapse:
+            return await fetch()
+        key: Tuple[Any, ...] = (
+            "GET", kind, path, tuple(sorted((params or {}).items())), self._token,
+        )
+        return await self._flights.do(key, fetch)
+
     # --- Orders: 
     async def create_order(self, location_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders"
-        resp = await self.request("POST", path, json=body)
+        resp = await self.request("POST", path, json=body,
+                                  retry_statuses=_SAFE_WRITE_STATUSES, retry_errors=_SAFE_WRITE_ERRORS)
         return resp.json()
     
     # retrieve order 
     async def retrieve_order(self, location_id: str, order_id: str) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}"
-        resp = await self.request("GET", path)
-        return resp.json()
+        return await self.get_json("retrieve_order", path)
     
+    async def retrieve_order_raw(self, location_id: str, order_id: str) -> RawBody:
+        path = f"/locations/{location_id}/orders/{order_id}"
+        return await self.get_raw("retrieve_order", path)
+
+    @staticmethod
+    def _orders_path(location_id: Optional[str], account_id: Optional[str]) -> str:
+        if location_id:
+            return f"/locations/{location_id}/orders"
+        if account_id:
+            return f"/accounts/{account_id}/orders"
+        raise ValueError("location_id or account_id required")
+
     async def list_orders(
         self,
         location_id: Optional[str] = None,
         account_id: Optional[str] = None,
         params: Optional[Mapping[str, str]] = None,
     ) -> Dict[str, Any]:
-        if location_id:
-            path = f"/locations/{location_id}/orders"
-        elif account_id:
-            path = f"/accounts/{account_id}/orders"
-        else:
-            raise ValueError("location_id or account_id required")
+        path = self._orders_path(location_id, account_id)
+        return await self.get_json("list_orders", path, params=params)
 
-        resp = await self.request("GET", path, params=params)
-        return resp.json()
+    async def list_orders_raw(
+        self,
+        location_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        params: Optional[Mapping[str, str]] = None,
+    ) -> RawBody:
+        path = self._orders_path(location_id, account_id)
+        return await self.get_raw("list_orders", path, params=params)
+
+    async def list_orders_page(
+        self,
+        location_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        params: Optional[Mapping[str, str]] = None,
+        cursor: Optional[str] = None,
+        count: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of orders and the cursor for the next one (None on the last page)."""
+        path = self._orders_path(location_id, account_id)
+        query = {**(params or {}), "count": str(count)}
+        if cursor:
+            query["cursor"] = cursor
+        resp = await self._hedged_get("list_orders", path, params=query)
+        return resp.json(), resp.headers.get("X-Cursor-Next") or None
+
+    async def iter_order_pages(
+        self,
+        location_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        params: Optional[Mapping[str, str]] = None,
+        count: int = 100,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Follow HubRise pagination cursors, yielding one page at a time. The
+        next page is requested as soon as the current one arrives, so the
+        round trip overlaps with the caller consuming the page; at most two
+        pages are ever held. `limiter` bounds concurrent page fetches when
+        several iterators run side by side.
+        """
+        async def fetch(cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+            if limiter is None:
+                return await self.list_orders_page(location_id, account_id, params, cursor, count)
+            async with limiter:
+                return await self.list_orders_page(location_id, account_id, params, cursor, count)
+
+        pending: Optional["asyncio.Task[Any]"] = asyncio.ensure_future(fetch(None))
+        try:
+            while pending is not None:
+                orders, cursor = await pending
+                pending = asyncio.ensure_future(fetch(cursor)) if cursor else None
+                yield orders
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def iter_orders(
+        self,
+        location_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        params: Optional[Mapping[str, str]] = None,
+        count: int = 100,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every matching order across all pages, in HubRise order (newest first)."""
+        async for page in self.iter_order_pages(location_id, account_id, params, count, limiter):
+            for order in page:
+                yield order
 
     async def update_order(self, location_id: str, order_id: str, patch: Dict[str, Any]) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}"
         resp = await self.request("PATCH", path, json=patch)
         return resp.json()
     
-    # --- Delivery Quotes 
+    # --- Delivery Quotes (not idempotent: retried only where create_order is)
     async def create_delivery_quote(self, location_id: str, order_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}/delivery_quotes"
-        resp = await self.request("POST", path, json=body)
+        resp = await self.request("POST", path, json=body,
+                                  retry_statuses=_SAFE_WRITE_STATUSES, retry_errors=_SAFE_WRITE_ERRORS)
         return resp.json()
     
     async def accept_delivery_quote(self, location_id: str, order_id: str, quote_id: str) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}/delivery_quotes/{quote_id}/accept"
-        resp = await self.request("POST", path)
+        resp = await self.request("POST", path,
+                                  retry_statuses=_SAFE_WRITE_STATUSES, retry_errors=_SAFE_WRITE_ERRORS)
         return resp.json()
     
     # --- Deliveries 
@@ -96,8 +392,11 @@ class HubRiseClient:
 
     async def retrieve_delivery(self, location_id: str, order_id: str) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}/delivery"
-        resp = await self.request("GET", path)
-        return resp.json()
+        return await self.get_json("retrieve_delivery", path)
+
+    async def retrieve_delivery_raw(self, location_id: str, order_id: str) -> RawBody:
+        path = f"/locations/{location_id}/orders/{order_id}/delivery"
+        return await self.get_raw("retrieve_delivery", path)
 
     async def update_delivery(self, location_id: str, order_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
         path = f"/locations/{location_id}/orders/{order_id}/delivery"
@@ -106,13 +405,48 @@ class HubRiseClient:
     
     async def get_catalog(self, catalog_id: str) -> Dict[str, Any]:
         path = f"/catalogs/{catalog_id}"
-        resp = await self.request("GET", path)
-        return resp.json()
+        return await self.get_json("get_catalog", path)
     
+    async def get_catalog_raw(self, catalog_id: str) -> RawBody:
+        path = f"/catalogs/{catalog_id}"
+        return await self.get_raw("get_catalog", path)
+
+    async def open_stream(self, path: str, params: Optional[Mapping[str, str]] = None) -> httpx.Response:
+        """
+        Start a GET and return once headers arrive, body unread. The caller
+        iterates `aiter_bytes()` and must `aclose()` the response. Not
+        retried: once bytes are forwarded there is nothing safe to replay.
+        """
+        request = self._http.build_request("GET", f"{self._base}{path}", params=params, headers=self.headers())
+        resp = await self._http.send(request, stream=True)
+        if resp.is_error:
+            await resp.aread()
+            await resp.aclose()
+            resp.raise_for_status()
+        return resp
+
+    async def get_catalog_conditional(
+        self, catalog_id: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> httpx.Response:
+        """
+        Conditional catalog fetch for cache revalidation. Returns the raw
+        response: 304 (body empty) when the validators still match, else 200.
+        """
+        path = f"/catalogs/{catalog_id}"
+        headers: Dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return await self._hedged_get("get_catalog", path, headers=headers)
+
     # --- Locations (for opening hours, etc.) ---
+    async def list_locations(self, account_id: str) -> List[Dict[str, Any]]:
+        path = f"/accounts/{account_id}/locations"
+        return await self.get_json("list_locations", path)
+
     async def get_location(self, location_id: str) -> Dict[str, Any]:
         path = f"/locations/{location_id}"
-        resp = await self.request("GET", path)
-        return resp.json()
+        return await self.get_json("get_location", path)
     
 
@@ -1,11 +1,22 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 from pathlib import Path
 
 class Settings(BaseSettings):
     APP_BASE_URL: AnyHttpUrl = "http://localhost:8000"
     SESSION_SECRET: str = "dev_change_me"
+    # "database": the session cookie is a signed id and the data (HubRise
+    # connection included) lives in the web_session / storeconnection tables,
+    # shared by every worker. "cookie": Starlette's signed-cookie sessions.
+    SESSION_STORE: Literal["database", "cookie"] = "database"
+    SESSION_MAX_AGE_SECONDS: int = 14 * 24 * 60 * 60
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    # Sessions saved or deleted on another worker show up here within this
+    SESSION_CACHE_TTL_SECONDS: int = 5
+    # Tenant registry (X-Api-Key / X-Store-Slug routing): every worker
+    # reloads its copy of the store connections this often.
+    TENANT_REGISTRY_REFRESH_SECONDS: int = 60
 
     HUBRISE_OAUTH_URL: AnyHttpUrl = "https://manager.hubrise.com/oauth2/v1"
     HUBRISE_API_URL: AnyHttpUrl = "https://api.hubrise.com/v1"
@@ -20,6 +31,105 @@ class Settings(BaseSettings):
     HUBRISE_LOCATION_ID: Optional[str] = None
     HUBRISE_CATALOG_ID: Optional[str] = None
 
+    # Hedged GETs: re-issue a slow idempotent read once it exceeds the endpoint's
+    # observed p95; the budget caps hedges to this fraction of primary requests.
+    HUBRISE_HEDGE_ENABLED: bool = False
+    HUBRISE_HEDGE_BUDGET_RATIO: float = 0.1
+    HUBRISE_HEDGE_MIN_DELAY_MS: int = 20
+
+    # Collapse concurrent identical HubRise GETs onto one upstream call
+    HUBRISE_SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Catalog cache: serve from memory for TTL, then serve stale while a
+    # background conditional request revalidates, up to MAX_STALE beyond TTL.
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+    CATALOG_CACHE_MAX_STALE_SECONDS: int = 600
+    CATALOG_CACHE_MAX_ENTRIES: int = 256
+    # GET /catalog/stream forwards upstream chunks of this size; with tee on,
+    # a cache miss also fills the catalog cache from the same stream (which
+    # buffers the whole catalog, so it's opt-in per request by default).
+    CATALOG_STREAM_CHUNK_BYTES: int = 65536
+    CATALOG_STREAM_TEE: bool = False
+    # Location cache (GET /catalog/hours*): locations change rarely and
+    # location callbacks invalidate them, so the windows are long.
+    LOCATION_CACHE_TTL_SECONDS: int = 300
+    LOCATION_CACHE_MAX_STALE_SECONDS: int = 86400
+    # Versions of each catalog kept for GET /catalog/delta; older `since`
+    # values get a full snapshot.
+    CATALOG_DELTA_MAX_VERSIONS: int = 10
+
+    # HubRise callbacks are queued in memory (split across WORKERS shards) and
+    # refused with 503 once QUEUE_SIZE events are waiting.
+    HUBRISE_CALLBACK_QUEUE_SIZE: int = 1000
+    HUBRISE_CALLBACK_WORKERS: int = 4
+
+    # SSE watchers: frames buffered per subscriber before the oldest is
+    # dropped, and the idle interval between keepalive comments.
+    EVENTS_SUBSCRIBER_BUFFER: int = 64
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+
+    # Driver location fixes are coalesced per order and sent to HubRise every
+    # FLUSH_SECONDS, or at once when the driver has moved FLUSH_METERS.
+    DRIVER_LOCATION_FLUSH_SECONDS: float = 15
+    DRIVER_LOCATION_FLUSH_METERS: float = 250
+
+    # Delivery carriers quoted by POST /deliveries/orders/{id}/quotes/best, as
+    # JSON name -> quote URL; quotes arriving after the deadline are dropped.
+    DELIVERY_CARRIERS: Dict[str, str] = {}
+    DELIVERY_QUOTE_DEADLINE_MS: int = 3000
+
+    # Async order submission (POST /orders with `Prefer: respond-async`):
+    # outbox workers, attempts before a submission is marked failed, and the
+    # idle poll for retries coming due. A row still `submitting` this long
+    # after it was claimed is taken to be interrupted (its worker died) and
+    # goes to reconcile; keep it well above the HubRise request timeout.
+    ORDER_OUTBOX_WORKERS: int = 2
+    ORDER_OUTBOX_MAX_ATTEMPTS: int = 8
+    ORDER_OUTBOX_POLL_SECONDS: float = 5
+    ORDER_OUTBOX_LEASE_SECONDS: float = 300
+    # Hosts submission outcomes may be POSTed to (`callback_url`), as a JSON
+    # list; "*.example.com" also matches subdomains. Empty: no callbacks.
+    ORDER_CALLBACK_ALLOWED_HOSTS: List[str] = []
+
+    # POST /orders results replayed for repeats of the same Idempotency-Key
+    # (or private_ref) within the TTL
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+
+    # HubRise writes in flight per location for PATCH /orders/bulk (shared by
+    # all batches in the process)
+    HUBRISE_LOCATION_WRITE_CONCURRENCY: int = 4
+
+    # In-memory order analytics (/analytics): days of orders kept per location,
+    # and how old a location's data may get before a query tops it up
+    ANALYTICS_WINDOW_DAYS: int = 31
+    ANALYTICS_MAX_STALENESS_SECONDS: int = 60
+
+    # Shared secret for internal callers (X-Internal-Token), e.g. the POS
+    # bridge posting to /orders/trusted; unset disables those routes
+    INTERNAL_API_TOKEN: Optional[str] = None
+
+    # Local pricing of POST /orders: "validate" rejects subtotals/totals that
+    # don't add up (422) before calling HubRise, "fill" also writes the
+    # computed subtotals and total into the order, "off" (default) skips it.
+    ORDER_PRICING: Literal["off", "validate", "fill"] = "off"
+    # Currency for bare order amounts ("8.5") when neither the connection's
+    # cached catalog nor the order's own total names one.
+    ORDER_CURRENCY: str = "GBP"
+
+    DATABASE_URL: str = "sqlite:///./hutbite.db"
+
+    # Local order mirror: order reads are served from the database while the
+    # location's last incremental sync is within MAX_STALENESS; the first sync
+    # of a location backfills BACKFILL_DAYS of history. Syncs only re-pull the
+    # last hour of orders, so set LIVE_UPDATES only once HubRise order
+    # callbacks are pointed at /hubrise/callback: until then status filters
+    # go to HubRise.
+    ORDER_MIRROR_ENABLED: bool = False
+    ORDER_MIRROR_MAX_STALENESS_SECONDS: int = 30
+    ORDER_MIRROR_BACKFILL_DAYS: int = 7
+    ORDER_MIRROR_LIVE_UPDATES: bool = False
+
     POSTCODES_BASE_URL: str = "https://api.postcodes.io"
     POSTCODE_TTL_SECONDS: int = 86400
     HTTP_TIMEOUT_SECONDS: int = 6
@@ -0,0 +1,30 @@
+from typing import Iterator
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from .config import settings
+
+
+def make_engine(url: str = settings.DATABASE_URL) -> Engine:
+    # SQLite connections are used from the threadpool, not just the creating thread
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+engine = make_engine()
+
+
+def init_db(bind: Engine = engine) -> None:
+    """Create any missing tables. Called once from the app lifespan."""
+    import app.models.order  # noqa: F401  (register tables on SQLModel.metadata)
+    import app.models.outbox  # noqa: F401
+    import app.models.session  # noqa: F401
+    import app.models.store  # noqa: F401
+
+    SQLModel.metadata.create_all(bind)
+
+
+def get_session() -> Iterator[Session]:
+    with Session(engine) as session:
+        yield session
@@ -1,12 +1,40 @@
-from fastapi import Depends, HTTPException, Request 
+from fastapi import Depends, Header, HTTPException, Request 
+from typing import Optional
+import hmac
 import httpx
 from .config import settings 
 from app.services.ultimago import UltimagoService 
 from app.services.tables import TableService
 from app.services.menu import MenuService
 from app.services.address import AddressService
+from app.clients.hubrise import HubRiseClient
+from app.services.tenants import Tenant, tenant_registry
+
+def resolve_tenant(request: Request) -> Optional[Tenant]:
+    """The store an X-Api-Key (or, from our own systems, an X-Store-Slug) routes to."""
+    api_key = request.headers.get("X-Api-Key")
+    if api_key:
+        tenant = tenant_registry.by_api_key(api_key)
+        if tenant is None:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        return tenant
+    slug = request.headers.get("X-Store-Slug")
+    if slug:
+        require_internal_token(request.headers.get("X-Internal-Token"))
+        tenant = tenant_registry.by_slug(slug)
+        if tenant is None:
+            raise HTTPException(status_code=404, detail=f"Unknown store {slug}")
+        return tenant
+    return None
 
 def get_hubrise_conn(request: Request) -> dict: 
+    # 0) Tenant registry: API key or internal store slug
+    if request:
+        tenant = resolve_tenant(request)
+        if tenant is not None:
+            request.state.tenant = tenant
+            return tenant.conn
+
     # 1) Session (if present)
     if request: 
         sess = request.session.get("hubrise_conn")
@@ -33,11 +61,24 @@ def get_access_token(conn: dict = Depends(get_hubrise_conn)) -> str:
 
 def get_location_id(request: Request, conn: dict = Depends(get_hubrise_conn)) -> str: 
     # Prefer the location from session; fallback to env efault 
-    loc = conn.get("location_id") or settings.DEFAULT_LOCATION_ID 
+    loc = conn.get("location_id") or settings.HUBRISE_LOCATION_ID 
     if not loc: 
         raise HTTPException(status_code=400, detail="No HubRise location_id available")
     return loc
 
+def get_account_id(conn: dict = Depends(get_hubrise_conn)) -> str: 
+    acc = conn.get("account_id") or settings.HUBRISE_ACCOUNT_ID 
+    if not acc: 
+        raise HTTPException(status_code=400, detail="No HubRise account_id available")
+    return acc
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """Gate for routes only our own systems may call."""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Internal API not configured")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid internal token")
+
 # ---- NEW: Shared HTTP Client 
 def get_http_client(request: Request) -> httpx.AsyncClient: 
     """
@@ -50,6 +91,13 @@ def get_http_client(request: Request) -> httpx.AsyncClient:
         raise HTTPException(status_code=500, detail="HTTP client not initialized")
     return client
 
+def hubrise_client(request: Request, token: str, http: httpx.AsyncClient) -> HubRiseClient:
+    """The routed tenant's prebuilt client when there is one for this token, else a new one."""
+    tenant = getattr(request.state, "tenant", None)
+    if tenant is not None and tenant.client is not None and tenant.access_token == token:
+        return tenant.client
+    return HubRiseClient(access_token=token, http=http)
+
 # ---- Ultimago Service 
 def get_ultimago_service(client: httpx.AsyncClient = Depends(get_http_client)) -> UltimagoService:
     return UltimagoService(http_client=client)
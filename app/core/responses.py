@@ -0,0 +1,10 @@
+from fastapi import Response
+from app.clients.hubrise import RawBody
+
+
+def raw_response(body: RawBody, status_code: int = 200) -> Response:
+    """
+    Hand a HubRise body straight to the client. Skips the json.loads +
+    jsonable_encoder + json.dumps round trip FastAPI would do on a dict.
+    """
+    return Response(content=body.content, status_code=status_code, media_type=body.media_type)
@@ -0,0 +1,84 @@
+from typing import Literal, Optional
+
+import itsdangerous
+from itsdangerous.exc import BadSignature
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.sessions import Session
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.sessions import SessionStore
+
+
+class ServerSessionMiddleware:
+    """
+    Drop-in for Starlette's SessionMiddleware (same `request.session`
+    semantics) that keeps the data in a SessionStore: the cookie is just a
+    signed session id, so requests verify ~60 bytes instead of decoding the
+    whole OAuth payload, and responses only set a cookie when the session
+    was modified.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: SessionStore,
+        secret_key: str,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: Literal["lax", "strict", "none"] = "lax",
+        https_only: bool = False,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.signer = itsdangerous.Signer(str(secret_key), salt="session-id")
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    def _session_id(self, cookie: Optional[str]) -> Optional[str]:
+        if not cookie:
+            return None
+        try:
+            return self.signer.unsign(cookie.encode()).decode()
+        except BadSignature:
+            return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        cookie = HTTPConnection(scope).cookies.get(self.session_cookie)
+        session_id = self._session_id(cookie)
+        data = await self.store.load(session_id) if session_id else None
+        if data is None:
+            session_id = None
+        scope["session"] = Session(data or {})
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                session: Session = scope["session"]
+                headers = MutableHeaders(scope=message)
+                if session.accessed:
+                    headers.add_vary_header("Cookie")
+                if session.modified and session:
+                    new_id = await self.store.save(session, session_id=session_id)
+                    headers.append("Set-Cookie", self._cookie(self.signer.sign(new_id).decode(),
+                                                              f"Max-Age={self.max_age}; "))
+                elif session_id and session.modified:
+                    await self.store.delete(session_id)
+                    headers.append("Set-Cookie", self._cookie("null", "expires=Thu, 01 Jan 1970 00:00:00 GMT; "))
+                elif cookie and session_id is None:
+                    # forged, expired or purged: stop the browser sending it
+                    headers.append("Set-Cookie", self._cookie("null", "expires=Thu, 01 Jan 1970 00:00:00 GMT; "))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _cookie(self, value: str, lifetime: str) -> str:
+        return f"{self.session_cookie}={value}; path={self.path}; {lifetime}{self.security_flags}"
@@ -4,8 +4,15 @@ from contextlib import asynccontextmanager
 import httpx
 
 from app.core.config import settings
+from app.core.db import init_db
 from app.core.errors import install_error_handlers
-from app.routers import auth, orders, catalog, deliverability, sms, tables, ultimago, menu, address
+from app.core.sessions import ServerSessionMiddleware
+from app.services.callbacks import callback_pipeline
+from app.services.driver_location import driver_locations
+from app.services.order_outbox import order_outbox
+from app.services.sessions import session_store
+from app.services.tenants import tenant_registry
+from app.routers import analytics, auth, callbacks, orders, catalog, deliveries, deliverability, events, sms, tables, ultimago, menu, address
 
 @asynccontextmanager 
 async def lifespan(app: FastAPI):
@@ -26,26 +33,54 @@ async def lifespan(app: FastAPI):
         keepalive_expiry=60.0
     )
 
+    # Create any missing tables (order mirror, store connections)
+    init_db()
+    if settings.SESSION_STORE == "database":
+        await session_store.purge_expired()
+
     # Create ONE AsyncClient for the entire app lifetime and store it. 
     app.state.http_client = httpx.AsyncClient(timeout=timeout, limits=limits)
 
+    # Store connections by slug / API key, each with a HubRise client on the shared HTTP client
+    await tenant_registry.load(app.state.http_client)
+
+    # Workers that apply queued HubRise callbacks
+    callback_pipeline.start()
+    # Periodic flush of coalesced driver locations
+    driver_locations.start()
+    # Workers submitting orders accepted asynchronously
+    await order_outbox.start(app.state.http_client)
+
     try:
         # Yield control back to FastAPI - app runs here. 
         yield 
     
     finally: 
+        await order_outbox.stop()
+        await callback_pipeline.stop()
+        # Last known driver positions go out before the HTTP client closes
+        await driver_locations.stop()
         # On shutdown, close the client cleanly (flush + close sockets)
         await app.state.http_client.aclose()
 
 def create_app() -> FastAPI:
     app = FastAPI(title="Hutbite Backend", lifespan=lifespan)
-    app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET, same_site="lax")
+    if settings.SESSION_STORE == "database":
+        app.add_middleware(ServerSessionMiddleware, store=session_store, secret_key=settings.SESSION_SECRET,
+                           max_age=settings.SESSION_MAX_AGE_SECONDS, same_site="lax")
+    else:
+        app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET,
+                           max_age=settings.SESSION_MAX_AGE_SECONDS, same_site="lax")
 
     install_error_handlers(app)
 
     app.include_router(auth.router)
+    app.include_router(callbacks.router)
     app.include_router(orders.router)
     app.include_router(catalog.router)
+    app.include_router(deliveries.router)
+    app.include_router(events.router)
+    app.include_router(analytics.router)
     app.include_router(deliverability.router)
     app.include_router(sms.router)
     # app.include(tables.router)
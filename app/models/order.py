@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class MirroredOrder(SQLModel, table=True):
+    """
+    Local copy of a HubRise order. The filterable fields are lifted into
+    indexed columns; `raw` keeps the order exactly as HubRise sent it.
+    """
+    __tablename__ = "mirrored_orders"
+    __table_args__ = (
+        # list queries are always per location, newest first
+        Index("ix_mirrored_orders_location_created", "location_id", "created_at"),
+    )
+
+    id: str = Field(primary_key=True)
+    location_id: str
+    status: Optional[str] = Field(default=None, index=True)
+    created_at: datetime = Field(index=True)     # UTC
+    customer_id: Optional[str] = Field(default=None, index=True)
+    private_ref: Optional[str] = Field(default=None, index=True)
+    created_by: Optional[str] = None
+    raw: str
+    synced_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class OrderSyncState(SQLModel, table=True):
+    """How far each location has been pulled from HubRise."""
+    __tablename__ = "order_sync_state"
+
+    location_id: str = Field(primary_key=True)
+    covered_from: Optional[datetime] = None      # mirror holds every order created since
+    high_water: Optional[datetime] = None        # newest created_at seen
+    synced_at: Optional[datetime] = None
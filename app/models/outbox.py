@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OrderSubmission(SQLModel, table=True):
+    """An order accepted with 202 and waiting to be (or already) created in HubRise."""
+    __tablename__ = "order_outbox"
+
+    id: str = Field(primary_key=True)             # tracking id handed to the client
+    location_id: str
+    access_token: str                             # cleared once the submission is finished
+    body: str                                     # normalised HubRise payload (JSON)
+    callback_url: Optional[str] = None
+    status: str = Field(default="pending", index=True)   # pending | submitting | submitted | failed | reconcile
+    attempts: int = 0
+    claimed_by: Optional[str] = None              # outbox instance (host:pid:id) that last claimed it
+    claimed_at: Optional[datetime] = None
+    next_attempt_at: datetime = Field(default_factory=_now, index=True)
+    last_error: Optional[str] = None
+    hubrise_order_id: Optional[str] = None
+    response: Optional[str] = None                # HubRise order (JSON) once submitted
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlmodel import JSON, Field, SQLModel
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class WebSession(SQLModel, table=True):
+    """
+    A browser session kept server-side; the cookie only carries its signed id.
+    The HubRise connection it's logged into lives in StoreConnection.
+    """
+    __tablename__ = "web_session"
+
+    id: str = Field(primary_key=True)
+    data: Dict[str, Any] = Field(default_factory=dict, sa_type=JSON)   # everything but hubrise_conn
+    connection_id: Optional[int] = Field(default=None, foreign_key="storeconnection.id", index=True)
+    created_at: datetime = Field(default_factory=_now)
+    expires_at: datetime = Field(index=True)
@@ -1,5 +1,5 @@
 from typing import Optional, Dict, Any 
-from datetime import datetime 
+from datetime import datetime, timezone 
 from sqlmodel import Field, SQLModel, JSON 
 
 class StoreConnection(SQLModel, table=True): 
@@ -13,7 +13,14 @@ class StoreConnection(SQLModel, table=True):
     account_name: Optional[str] = None 
     location_name: Optional[str] = None 
     catalog_name: Optional[str] = None 
-    raw_payload: Optional[Dict[str, Any]] = Field(default=None, sa_column_kwargs)={"type_": JSON}
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    raw_payload: Optional[Dict[str, Any]] = Field(default=None, sa_type=JSON)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+
+class StoreApiKey(SQLModel, table=True): 
+    """An API key routing requests to a StoreConnection; only its SHA-256 is stored."""
+    key_hash: str = Field(primary_key=True)
+    connection_id: int = Field(foreign_key="storeconnection.id", index=True)
+    label: Optional[str] = None 
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
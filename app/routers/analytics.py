@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.core.deps import get_access_token, get_http_client, get_location_id, hubrise_client, require_internal_token
+from app.services.order_analytics import (
+    LocationOrders, basket_summary, order_analytics, sales_by_interval, top_items,
+)
+from app.services.order_fanout import parse_timestamp
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+def client(
+    request: Request,
+    token: str = Depends(get_access_token),
+    http: httpx.AsyncClient = Depends(get_http_client),
+) -> HubRiseClient:
+    return hubrise_client(request, token, http)
+
+async def location_orders(
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+) -> LocationOrders:
+    try:
+        return await order_analytics.location(hr, location_id)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Could not load orders from HubRise: {e}")
+
+def time_range(
+    since: Optional[str] = Query(None, description="ISO8601 inclusive start (default: 24 hours ago)"),
+    until: Optional[str] = Query(None, description="ISO8601 exclusive end (default: now)"),
+) -> Tuple[datetime, datetime]:
+    end = parse_timestamp(until) if until else datetime.now(timezone.utc)
+    start = parse_timestamp(since) if since else end - timedelta(hours=24)
+    if start is None or end is None or start >= end:
+        raise HTTPException(status_code=400, detail="Invalid since/until range")
+    if end - start > timedelta(days=settings.ANALYTICS_WINDOW_DAYS):
+        # only that much history is kept, and hourly buckets are built per hour of the range
+        raise HTTPException(status_code=422, detail=f"since/until may span at most {settings.ANALYTICS_WINDOW_DAYS} days")
+    return start, end
+
+@router.get("/sales")
+async def sales(
+    interval: str = Query("hour", pattern="^(hour|day)$"),
+    tz: str = Query("Europe/London", description="Timezone for bucket labels and days"),
+    span: Tuple[datetime, datetime] = Depends(time_range),
+    loc: LocationOrders = Depends(location_orders),
+):
+    """Orders and sales per hour or per day, empty buckets included."""
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone {tz}")
+    return {"interval": interval, "buckets": sales_by_interval(loc, span[0], span[1], interval, tz)}
+
+@router.get("/basket")
+async def basket(
+    span: Tuple[datetime, datetime] = Depends(time_range),
+    loc: LocationOrders = Depends(location_orders),
+):
+    """Order count, sales, average basket value and average items per order."""
+    return basket_summary(loc, *span)
+
+@router.get("/top-items")
+async def best_sellers(
+    limit: int = Query(10, ge=1, le=100),
+    by: str = Query("quantity", pattern="^(quantity|sales)$"),
+    span: Tuple[datetime, datetime] = Depends(time_range),
+    loc: LocationOrders = Depends(location_orders),
+):
+    return {"by": by, "items": top_items(loc, span[0], span[1], limit, by)}
+
+@router.get("/stats", dependencies=[Depends(require_internal_token)])
+def analytics_stats():
+    return order_analytics.stats()
@@ -0,0 +1,37 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app.core.config import settings
+from app.core.deps import require_internal_token
+from app.services.callbacks import SIGNATURE_HEADER, CallbackEvent, callback_pipeline, verify_signature
+
+router = APIRouter(prefix="/hubrise", tags=["callbacks"])
+
+@router.post("/callback")
+async def receive_callback(request: Request):
+    """
+    HubRise event callback. Verified and queued, never processed inline, so
+    HubRise gets its acknowledgement straight away.
+    """
+    if not settings.HUBRISE_CLIENT_SECRET:
+        raise HTTPException(status_code=503, detail="Callbacks not configured")
+
+    body = await request.body()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER), settings.HUBRISE_CLIENT_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid callback signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Callback body is not JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Callback body must be an object")
+
+    if not callback_pipeline.offer(CallbackEvent.from_body(payload)):
+        # backpressure: HubRise retries failed callbacks
+        return Response(status_code=503, headers={"Retry-After": "1"})
+    return Response(status_code=200)
+
+@router.get("/callback/stats", dependencies=[Depends(require_internal_token)])
+def callback_stats():
+    return callback_pipeline.stats()
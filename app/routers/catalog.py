@@ -1,25 +1,171 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.deps import get_access_token, get_hubrise_conn, get_location_id 
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+import httpx
+from app.core.config import settings
+from app.core.deps import get_access_token, get_hubrise_conn, get_location_id, get_http_client, hubrise_client
 from app.clients.hubrise import HubRiseClient 
+from app.services.catalog_cache import catalog_cache, etag_matches
+from app.services.catalog_index import CatalogIndex, catalog_indexes
+from app.services.catalog_versions import catalog_versions
+from app.services.location_cache import location_cache
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
-def client(token: str = Depends(get_access_token)) -> HubRiseClient: 
-    return HubRiseClient(access_token=token)
+def client(
+    request: Request,
+    token: str = Depends(get_access_token),
+    http: httpx.AsyncClient = Depends(get_http_client),
+) -> HubRiseClient: 
+    return hubrise_client(request, token, http)
+
+def get_catalog_id(conn: dict = Depends(get_hubrise_conn)) -> str:
+    catalog_id = conn.get("catalog_id")
+    if not catalog_id: 
+        raise HTTPException(status_code=400, detail="No catalog_id in session.")
+    return catalog_id
 
 @router.get("")
 async def get_full_catalog(
-    conn: dict = Depends(get_hubrise_conn), 
+    catalog_id: str = Depends(get_catalog_id),
     hr: HubRiseClient = Depends(client),
+    if_none_match: Optional[str] = Header(None),
 ): 
     """
     Return the entire Hubrise catalog for the connected session. 
     This uses the recommended single-call endpoint: GET / catalogs/:id 
+
+    Served from the catalog cache as the upstream bytes, with an ETag;
+    clients sending a matching If-None-Match get an empty 304.
     """
-    catalog_id = conn.get("catalog_id")
-    if not catalog_id: 
-        raise HTTPException(status_code=400, detail="No catalog_id in session.")
-    return await hr.get_catalog(catalog_id)
+    entry = await catalog_cache.get(hr, catalog_id)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.raw, media_type="application/json", headers=headers)
+
+@router.get("/stream")
+async def stream_catalog(
+    catalog_id: str = Depends(get_catalog_id),
+    hr: HubRiseClient = Depends(client),
+    tee: bool = Query(settings.CATALOG_STREAM_TEE, description="Also fill the catalog cache from this stream"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Same body as GET /catalog, but a cache miss is forwarded chunk by chunk
+    as it arrives from HubRise instead of being buffered and parsed first.
+    Without tee, memory per request stays at one chunk whatever the catalog size.
+    """
+    entry = catalog_cache.fresh(catalog_id)
+    if entry is not None:
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.raw, media_type="application/json", headers=headers)
+
+    upstream = await hr.open_stream(f"/catalogs/{catalog_id}")
+    sink = catalog_cache.tee(
+        catalog_id,
+        etag=upstream.headers.get("ETag"),
+        last_modified=upstream.headers.get("Last-Modified"),
+    ) if tee else None
+
+    async def release() -> None:
+        # safe to call twice; also runs as a background task, since the body's
+        # finally never fires if the client goes away before it is iterated
+        await upstream.aclose()
+        if sink is not None:
+            sink.close()
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in upstream.aiter_bytes(settings.CATALOG_STREAM_CHUNK_BYTES):
+                if sink is not None:
+                    sink.write(chunk)
+                yield chunk
+            await upstream.aclose()
+            if sink is not None:
+                await sink.commit()
+        finally:
+            await release()
+
+    try:
+        return StreamingResponse(
+            body(),
+            media_type=upstream.headers.get("Content-Type", "application/json"),
+            headers={"Cache-Control": "no-cache"},
+            background=BackgroundTask(release),
+        )
+    except BaseException:
+        await release()
+        raise
+
+async def get_catalog_index(
+    catalog_id: str = Depends(get_catalog_id),
+    hr: HubRiseClient = Depends(client),
+) -> CatalogIndex:
+    entry = await catalog_cache.get(hr, catalog_id)
+    return catalog_indexes.get(entry)
+
+@router.get("/delta")
+async def get_catalog_delta(
+    since: Optional[str] = Query(None, description="Catalog version the client already holds"),
+    catalog_id: str = Depends(get_catalog_id),
+    hr: HubRiseClient = Depends(client),
+):
+    """
+    Changes since `since`, per product, SKU, option list, option and category
+    ({"upserted": [...], "removed": [ids]} each). Without `since`, or if that
+    version is no longer retained, returns {"full": true, "catalog": ...}.
+    Either way `version` is what to send as `since` next time.
+    """
+    entry = await catalog_cache.get(hr, catalog_id)
+    idx = catalog_indexes.get(entry)
+    return Response(content=catalog_versions.delta(idx, since, entry.raw), media_type="application/json")
+
+@router.get("/skus/{ref}")
+async def get_sku(ref: str, idx: CatalogIndex = Depends(get_catalog_index)):
+    """
+    Resolve an SKU ref to its product, price and option lists.
+    """
+    sku = idx.sku_by_ref.get(ref)
+    if sku is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sku_ref {ref}")
+    return {
+        "sku_ref": sku.sku_ref,
+        "sku_id": sku.sku_id,
+        "sku_name": sku.sku_name,
+        "price": sku.price,
+        "product_id": sku.product_id,
+        "product_ref": sku.product_ref,
+        "product_name": sku.product_name,
+        "category_ref": sku.category_ref,
+        "option_lists": idx.option_lists_for(sku),
+    }
+
+@router.get("/options/{ref}")
+async def get_option(ref: str, idx: CatalogIndex = Depends(get_catalog_index)):
+    """
+    Resolve an option ref to the option and the option list it belongs to.
+    """
+    opt = idx.option_by_ref.get(ref)
+    if opt is None:
+        raise HTTPException(status_code=404, detail=f"Unknown option ref {ref}")
+    return {
+        "option": opt.option,
+        "option_list": idx.option_lists.get(opt.option_list_id),
+    }
+
+@router.get("/categories/{ref}/products")
+async def get_category_products(ref: str, idx: CatalogIndex = Depends(get_catalog_index)):
+    """
+    Product ids in a category (by category ref or id).
+    """
+    if ref not in idx.categories:
+        raise HTTPException(status_code=404, detail=f"Unknown category {ref}")
+    return {"category": ref, "product_ids": idx.products_in_category(ref)}
 
 @router.get("/hours")
 async def get_opening_hours(
@@ -28,8 +174,9 @@ async def get_opening_hours(
 ):
     """
     Returns the location object; frontend can read opening_hours, cutoff_time, etc.
+    Served from the location cache.
     """
-    loc = await hr.get_location(location_id)
+    loc = (await location_cache.get(hr, location_id)).location
     return {
         "id": loc.get("id"), 
         "name": loc.get("name"), 
@@ -43,4 +190,47 @@ async def get_opening_hours(
             "country": loc.get("country"), 
         }, 
         "custom_fields": loc.get("custom_fields"),
-    }
\ No newline at end of file
+    }
+
+def _at(at: Optional[datetime]) -> datetime:
+    if at is None:
+        return datetime.now(timezone.utc)
+    if at.tzinfo is None:
+        raise HTTPException(status_code=422, detail="`at` needs a UTC offset")
+    return at
+
+@router.get("/hours/status")
+async def get_opening_status(
+    at: Optional[datetime] = Query(None, description="ISO8601 instant; default now"),
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+):
+    """
+    Whether the location is open at `at` and when that next changes,
+    evaluated against its cached, precompiled opening hours.
+    """
+    entry = await location_cache.get(hr, location_id)
+    return entry.status(_at(at))
+
+@router.get("/hours/status/batch")
+async def get_opening_statuses(
+    location_ids: List[str] = Query(..., alias="location_id", min_length=1, max_length=100),
+    at: Optional[datetime] = Query(None, description="ISO8601 instant; default now"),
+    hr: HubRiseClient = Depends(client),
+):
+    """
+    Open/closed for several locations the token can read
+    (?location_id=a&location_id=b). Uncached locations are fetched
+    concurrently; ones that can't be read come back with an `error`.
+    """
+    when = _at(at)
+    entries = await location_cache.get_many(hr, list(dict.fromkeys(location_ids)))
+    results = []
+    for location_id, entry in entries.items():
+        if isinstance(entry, httpx.HTTPStatusError):
+            results.append({"location_id": location_id, "error": entry.response.status_code})
+        elif isinstance(entry, Exception):
+            results.append({"location_id": location_id, "error": 502})
+        else:
+            results.append(entry.status(when))
+    return {"at": when.isoformat(), "locations": results}
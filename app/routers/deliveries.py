@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends
-from app.core.deps import get_location_id, get_access_token
+from fastapi import APIRouter, Depends, Request
+import httpx
+from app.core.deps import get_location_id, get_access_token, get_http_client, hubrise_client
+from app.core.responses import raw_response
 from app.clients.hubrise import HubRiseClient
 from app.schemas.deliveries import (
     DeliveryQuoteCreate,
     DeliveryQuoteOut,
     DeliveryCreate,
     DeliveryOut,
+    DriverLocation,
+    QuoteRequest,
+    QuoteRoundOut,
 )
+from app.core.config import settings
+from app.services.carriers import configured_carriers, request_quotes
+from app.services.driver_location import driver_locations
 
 router = APIRouter(prefix="/deliveries", tags=["deliveries"])
 
-def client(token: str = Depends(get_access_token)) -> HubRiseClient:
-    return HubRiseClient(access_token=token)
+def client(
+    request: Request,
+    token: str = Depends(get_access_token),
+    http: httpx.AsyncClient = Depends(get_http_client),
+) -> HubRiseClient:
+    return hubrise_client(request, token, http)
 
 # 1. Create a delivery quote
 @router.post("/orders/{order_id}/quotes", response_model=DeliveryQuoteOut, status_code=201)
@@ -23,6 +35,24 @@ async def create_quote(
 ):
     return await hr.create_delivery_quote(location_id, order_id, body.dict(exclude_none=True))
 
+# 1b. Quote every configured carrier at once and keep the best
+@router.post("/orders/{order_id}/quotes/best", response_model=QuoteRoundOut)
+async def create_best_quote(
+    order_id: str,
+    body: QuoteRequest,
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+    http: httpx.AsyncClient = Depends(get_http_client),
+):
+    deadline_ms = body.deadline_ms or settings.DELIVERY_QUOTE_DEADLINE_MS
+    result = await request_quotes(
+        hr, http, location_id, order_id, body.details,
+        carriers=configured_carriers(body.carriers),
+        deadline=deadline_ms / 1000,
+        auto_accept=body.auto_accept,
+    )
+    return result
+
 # 2. Accept a delivery quote
 @router.post("/orders/{order_id}/quotes/{quote_id}/accept", status_code=200)
 async def accept_quote(
@@ -50,7 +80,8 @@ async def retrieve_delivery(
     location_id: str = Depends(get_location_id),
     hr: HubRiseClient = Depends(client),
 ):
-    return await hr.retrieve_delivery(location_id, order_id)
+    # Proxied as-is; response_model still documents the shape
+    return raw_response(await hr.retrieve_delivery_raw(location_id, order_id))
 
 # 5. Update delivery
 @router.patch("/orders/{order_id}", response_model=DeliveryOut)
@@ -61,3 +92,15 @@ async def update_delivery(
     hr: HubRiseClient = Depends(client),
 ):
     return await hr.update_delivery(location_id, order_id, body.dict(exclude_none=True))
+
+# 6. Driver location (coalesced)
+@router.post("/orders/{order_id}/driver-location", status_code=202)
+async def report_driver_location(
+    order_id: str,
+    body: DriverLocation,
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+):
+    # Latest fix wins; forwarded to HubRise on the flush cadence or on significant movement
+    driver_locations.offer(hr, location_id, order_id, body.latitude, body.longitude)
+    return {"accepted": True}
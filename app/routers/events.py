@@ -0,0 +1,80 @@
+import asyncio
+from typing import AsyncIterator
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.core.deps import (
+    get_access_token, get_hubrise_conn, get_http_client, get_location_id, hubrise_client,
+    require_internal_token,
+)
+from app.services.events import event_broker, location_topic, order_topic
+from app.services.order_outbox import order_outbox, submission_topic
+from app.services.order_store import order_store
+
+router = APIRouter(prefix="/events", tags=["events"], dependencies=[Depends(get_hubrise_conn)])
+
+def client(
+    request: Request,
+    token: str = Depends(get_access_token),
+    http: httpx.AsyncClient = Depends(get_http_client),
+) -> HubRiseClient:
+    return hubrise_client(request, token, http)
+
+def sse_response(topic: str) -> StreamingResponse:
+    """
+    Server-sent events for one broker topic. A comment line goes out every
+    EVENTS_HEARTBEAT_SECONDS so proxies keep idle connections open.
+    """
+    async def frames() -> AsyncIterator[bytes]:
+        with event_broker.subscribe(topic) as sub:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(sub.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/orders/{order_id}")
+async def order_events(
+    order_id: str,
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+):
+    """Only for orders of the caller's location (checked against the mirror, else HubRise)."""
+    try:
+        if order_store.enabled:
+            await order_store.retrieve_raw(hr, location_id, order_id)
+        else:
+            await hr.retrieve_order_raw(location_id=location_id, order_id=order_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (403, 404):
+            raise HTTPException(status_code=404, detail="Unknown order")
+        raise
+    return sse_response(order_topic(order_id))
+
+@router.get("/locations/{location_id}")
+async def location_events(location_id: str, own_location_id: str = Depends(get_location_id)):
+    if location_id != own_location_id:
+        raise HTTPException(status_code=404, detail="Unknown location")
+    return sse_response(location_topic(location_id))
+
+@router.get("/submissions/{submission_id}")
+async def submission_events(submission_id: str, location_id: str = Depends(get_location_id)):
+    row = await order_outbox.get(submission_id)
+    if row is None or row.location_id != location_id:
+        raise HTTPException(status_code=404, detail="Unknown submission")
+    return sse_response(submission_topic(submission_id))
+
+@router.get("/stats", dependencies=[Depends(require_internal_token)])
+def event_stats():
+    return event_broker.stats()
@@ -1,119 +1,197 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.encoders import jsonable_encoder
-from typing import Optional, Dict, Any
-from decimal import Decimal, InvalidOperation
-import re
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import AnyHttpUrl, ValidationError
+from typing import AsyncIterator, List, Optional, Dict, Any
+import json
 import httpx
 from fastapi import HTTPException
 import logging
 
-from app.core.deps import get_access_token, get_location_id, get_http_client
+from app.core.config import settings
+from app.core.deps import (
+    get_access_token, get_account_id, get_location_id, get_hubrise_conn, get_http_client, hubrise_client,
+    require_internal_token,
+)
+from app.core.responses import raw_response
 from app.clients.hubrise import HubRiseClient
-from app.schemas.orders import OrderCreate, OrderPatch
+from app.schemas.orders import BulkOrderUpdate, OrderCreate, OrderPatch, PriceRequest, check_customer_identity, trusted_order_adapter
+from app.services.bulk_orders import update_orders
+from app.services.catalog_cache import catalog_cache
+from app.services.catalog_index import CatalogIndex, catalog_indexes
+from app.services.order_export import export_orders, open_export, order_pages
+from app.services.order_fanout import fan_out_orders
+from app.services.idempotency import IdempotencyConflict, fingerprint, idempotency_key, idempotency_store
+from app.services.order_payload import build_order_payload, normalise_payload
+from app.services.order_outbox import callback_allowed, order_outbox, submission_view
+from app.services.order_store import order_store
+from app.services.pricing import parse_money, price_order
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 def client(
+    request: Request,
     token: str = Depends(get_access_token),
     http: httpx.AsyncClient = Depends(get_http_client),
     ) -> HubRiseClient:
-    return HubRiseClient(access_token=token, http=http)
+    return hubrise_client(request, token, http)
 
-# --- helpers for HubRise formatting ---
-CURRENCY = "GBP"  # optionally derive from location via hr.get_location(...)
+def ndjson_response(pages: AsyncIterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    """One JSON order per line, flushed a page at a time as pages arrive from HubRise."""
+    async def lines() -> AsyncIterator[bytes]:
+        async for page in pages:
+            if page:
+                yield "".join(json.dumps(o, separators=(",", ":")) + "\n" for o in page).encode()
 
-# e.g. "8.50 GBP" or "10 GBP" (2dp optional)
-_MONEY_WITH_CURRENCY = re.compile(r"^\s*-?\d+(?:\.\d{1,2})?\s+[A-Z]{3}\s*$")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-def _fmt_money(v, currency: str = CURRENCY) -> Optional[str]:
-    if v is None:
+def raw_ndjson_response(pages: AsyncIterator[List[str]]) -> StreamingResponse:
+    """Like ndjson_response, for orders already held as encoded JSON (the order mirror)."""
+    async def lines() -> AsyncIterator[bytes]:
+        async for page in pages:
+            yield "".join(o + "\n" for o in page).encode()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+async def _batched(orders: AsyncIterator[Dict[str, Any]], size: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    async for order in orders:
+        batch.append(order)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def cached_catalog_index(conn: dict = Depends(get_hubrise_conn)) -> Optional[CatalogIndex]:
+    """The connection's compiled catalog if it is already cached; never calls HubRise."""
+    entry = catalog_cache.peek(conn["catalog_id"]) if conn.get("catalog_id") else None
+    return catalog_indexes.get(entry) if entry is not None else None
+
+async def catalog_index(
+    conn: dict = Depends(get_hubrise_conn),
+    hr: HubRiseClient = Depends(client),
+) -> Optional[CatalogIndex]:
+    if not conn.get("catalog_id"):
         return None
-    s = str(v).strip()
-    # keep if already formatted like "8.50 GBP"
-    if _MONEY_WITH_CURRENCY.match(s):
-        return s
+    return catalog_indexes.get(await catalog_cache.get(hr, conn["catalog_id"]))
+
+def _currency(idx: Optional[CatalogIndex], stated_total: Any = None) -> str:
+    """
+    The currency bare amounts are in: the catalog's, else the one the order
+    states its total in, else ORDER_CURRENCY.
+    """
+    if idx is not None and idx.currency:
+        return idx.currency
     try:
-        q = Decimal(s)
-    except InvalidOperation:
-        # pass through; HubRise will surface a precise error if bad
-        return s
-    return f"{q.quantize(Decimal('0.01'))} {currency}"
-
-def _fmt_decimal_string(v) -> Optional[str]:
-    return None if v is None else str(v)
-
-def _normalise_order_for_hubrise(body: dict, currency: str = CURRENCY) -> dict:
-    b = dict(body)
-
-    # TOP-LEVEL TOTAL
-    if "total" in b and b["total"] is not None:
-        b["total"] = _fmt_money(b["total"], currency)
-
-    # items
-    items = []
-    for it in b.get("items", []) or []:
-        it = dict(it)
-        it["price"] = _fmt_money(it.get("price"), currency)
-        if it.get("subtotal") is not None:
-            it["subtotal"] = _fmt_money(it.get("subtotal"), currency)
-        it["quantity"] = _fmt_decimal_string(it.get("quantity"))
-
-        # options
-        opts = []
-        for op in it.get("options", []) or []:
-            op = dict(op)
-            if op.get("price") is not None:
-                op["price"] = _fmt_money(op["price"], currency)
-            if op.get("quantity") is not None:
-                # HubRise expects options.quantity as integer
-                op["quantity"] = int(op["quantity"])
-            opts.append(op)
-        it["options"] = opts or None
-
-        items.append(it)
-    b["items"] = items or None
-
-    # charges
-    charges = []
-    for ch in b.get("charges", []) or []:
-        ch = dict(ch)
-        ch["price"] = _fmt_money(ch.get("price"), currency)
-        charges.append(ch)
-    b["charges"] = charges or []
-
-    # discounts
-    discounts = []
-    for d in b.get("discounts", []) or []:
-        d = dict(d)
-        d["price_off"] = _fmt_money(d.get("price_off"), currency)
-        discounts.append(d)
-    b["discounts"] = discounts or []
-
-    # payments
-    pays = []
-    for p in b.get("payments", []) or []:
-        p = dict(p)
-        p["amount"] = _fmt_money(p.get("amount"), currency)
-        pays.append(p)
-    b["payments"] = pays or None
-
-    return b
+        currency = parse_money(stated_total)[1]
+    except ValueError:
+        currency = None
+    return currency or settings.ORDER_CURRENCY
+
+def _check_pricing(body: dict, idx: Optional[CatalogIndex], currency: str) -> dict:
+    """Catch totals HubRise would reject before the round trip (see ORDER_PRICING)."""
+    if settings.ORDER_PRICING == "off":
+        return body
+    priced = price_order(body, currency, idx)
+    if priced.errors:
+        raise HTTPException(status_code=422, detail={"error": "Order amounts don't add up",
+                                                     "pricing": priced.summary()})
+    if settings.ORDER_PRICING == "fill":
+        priced.fill(body)
+    return body
+
+def _order_filters(**filters: Optional[str]) -> Dict[str, str]:
+    return {k: v for k, v in filters.items() if v is not None}
 
 # --- endpoints ---
 @router.post("")
 async def create_order(
     payload: OrderCreate,
+    response: Response,
+    prefer: Optional[str] = Header(None, description="`respond-async` to get a 202 and submit in the background"),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    callback_url: Optional[AnyHttpUrl] = Query(None, description="Async mode: POSTed the outcome of the submission"),
     location_id: str = Depends(get_location_id),
+    token: str = Depends(get_access_token),
     hr: HubRiseClient = Depends(client),
+    idx: Optional[CatalogIndex] = Depends(cached_catalog_index),
 ):
-    body = jsonable_encoder(payload, exclude_none=True)
-    body = _normalise_order_for_hubrise(body, currency=CURRENCY)
-    
+    currency = _currency(idx, getattr(payload, "total", None))
+    body = _check_pricing(build_order_payload(payload, currency=currency), idx, currency)
+    return await _submit_order(body, response, prefer, idempotency_key_header, callback_url, location_id, token, hr)
+
+@router.post("/trusted", dependencies=[Depends(require_internal_token)], openapi_extra={
+    "requestBody": {"required": True, "content": {"application/json": {"schema": {"$ref": "#/components/schemas/OrderCreate"}}}},
+})
+async def create_trusted_order(
+    request: Request,
+    response: Response,
+    prefer: Optional[str] = Header(None, description="`respond-async` to get a 202 and submit in the background"),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    callback_url: Optional[AnyHttpUrl] = Query(None, description="Async mode: POSTed the outcome of the submission"),
+    location_id: str = Depends(get_location_id),
+    token: str = Depends(get_access_token),
+    hr: HubRiseClient = Depends(client),
+    idx: Optional[CatalogIndex] = Depends(cached_catalog_index),
+):
+    """
+    POST /orders for our own channels (X-Internal-Token). The body is parsed
+    and type-checked in one pass by a precompiled TypeAdapter and goes straight
+    to the normaliser, skipping the OrderCreate models. Values are taken as
+    sent: no whitespace stripping, and nulls are forwarded.
+    """
+    try:
+        order = trusted_order_adapter.validate_json(await request.body())
+        check_customer_identity(order.get("customer_id"), order.get("customer_list_id"),
+                                order.get("customer_private_ref"), order.get("customer"))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    currency = _currency(idx, order.get("total"))
+    body = _check_pricing(normalise_payload(order, currency=currency), idx, currency)
+    return await _submit_order(body, response, prefer, idempotency_key_header, callback_url, location_id, token, hr)
+
+async def _submit_order(
+    body: dict,
+    response: Response,
+    prefer: Optional[str],
+    idempotency_key_header: Optional[str],
+    callback_url: Optional[AnyHttpUrl],
+    location_id: str,
+    token: str,
+    hr: HubRiseClient,
+):
+    respond_async = bool(prefer and "respond-async" in prefer.lower())
+    if callback_url and not callback_allowed(str(callback_url)):
+        raise HTTPException(status_code=422, detail="callback_url host is not allowed")
+
+    async def enqueue() -> tuple:
+        row = await order_outbox.enqueue(location_id, token, body, str(callback_url) if callback_url else None)
+        status_url = f"{router.prefix}/submissions/{row.id}"
+        return "async", {**submission_view(row), "status_url": status_url, "events_url": f"/events/submissions/{row.id}"}
+
+    async def submit() -> tuple:
+        created = await hr.create_order(location_id=location_id, body=body)
+        if order_store.enabled:
+            await order_store.upsert([created], location_id)
+        return "sync", created
+
+    # Same key (Idempotency-Key, else private_ref) => same order: duplicates in
+    # flight wait for the first submission, later ones replay its result. Sync
+    # and async share the scope, and a replay answers the way the first was.
+    key = idempotency_key(idempotency_key_header, body)
+    write = enqueue if respond_async else submit
     try:
-        resp = await hr.create_order(location_id=location_id, body=body)
-        return resp 
+        if key is None:
+            (mode, resp), replayed = await write(), False
+        else:
+            (mode, resp), replayed = await idempotency_store.run((location_id, key), fingerprint(body), write)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency key reused with a different order")
     except httpx.HTTPStatusError as e: 
         # HubRise error details 
         status = e.response.status_code 
@@ -127,13 +205,101 @@ async def create_order(
         logger.exception("Create order failed")
         raise HTTPException(status_code=502, detail=str(e))
 
+    headers = {"Idempotent-Replayed": "true"} if replayed else {}
+    if mode == "async":
+        headers.update({"Location": resp["status_url"], "Preference-Applied": "respond-async"})
+        return JSONResponse(status_code=202, content=resp, headers=headers)
+    response.headers.update(headers)
+    return resp 
+
+@router.post("/price")
+async def price_baskets(req: PriceRequest, idx: Optional[CatalogIndex] = Depends(catalog_index)):
+    """
+    Price up to 200 baskets (cart previews) locally against the connection's
+    catalog: item subtotals, charges, discounts and total, plus any errors
+    (amounts that don't add up) and warnings (prices differing from the catalog).
+    """
+    currency = _currency(idx)
+    baskets = (b.model_dump(exclude_unset=True) for b in req.baskets)
+    return {"currency": currency, "baskets": [price_order(b, currency, idx).summary() for b in baskets]}
+
+@router.get("/submissions/{submission_id}")
+async def get_submission(submission_id: str, location_id: str = Depends(get_location_id)):
+    row = await order_outbox.get(submission_id)
+    if row is None or row.location_id != location_id:
+        raise HTTPException(status_code=404, detail="Unknown submission")
+    return submission_view(row)
+
+@router.get("/account")
+async def list_account_orders(
+    status: Optional[str] = Query(None, description="Filter by status (e.g., accepted)"),
+    created_by: Optional[str] = None,
+    private_ref: Optional[str] = None,
+    after: Optional[str] = Query(None, description="ISO8601 inclusive lower bound"),
+    before: Optional[str] = Query(None, description="ISO8601 exclusive upper bound"),
+    customer_id: Optional[str] = None,
+    location_ids: Optional[str] = Query(None, description="Comma-separated subset of the account's locations"),
+    concurrency: int = Query(4, ge=1, le=16, description="Max HubRise page requests in flight"),
+    account_id: str = Depends(get_account_id),
+    hr: HubRiseClient = Depends(client),
+):
+    """
+    Orders from every location of the account as NDJSON, merged newest first
+    by created_at. Locations are paged concurrently, so rows start flowing
+    after about one page latency instead of after every location finishes.
+    """
+    if location_ids:
+        locations = [loc.strip() for loc in location_ids.split(",") if loc.strip()]
+    else:
+        locations = [loc["id"] for loc in await hr.list_locations(account_id)]
+    params = _order_filters(
+        status=status, created_by=created_by, private_ref=private_ref,
+        after=after, before=before, customer_id=customer_id,
+    )
+    merged = fan_out_orders(hr, locations, params=params, concurrency=concurrency)
+    return ndjson_response(_batched(merged))
+
+@router.get("/export")
+async def export_location_orders(
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    source: str = Query("auto", pattern="^(auto|hubrise|mirror)$",
+                        description="auto: the order mirror when it can answer, else HubRise"),
+    status: Optional[str] = Query(None, description="Filter by status (e.g., completed)"),
+    after: Optional[str] = Query(None, description="ISO8601 inclusive lower bound"),
+    before: Optional[str] = Query(None, description="ISO8601 exclusive upper bound"),
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+):
+    """
+    The location's orders flattened to one row per item, option, charge,
+    discount and payment, as CSV or Parquet. Rows are encoded and sent while
+    later pages are still being fetched, so memory doesn't grow with the export.
+    """
+    try:
+        export = open_export(format)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    params = _order_filters(status=status, after=after, before=before)
+    try:
+        pages = await order_pages(hr, location_id, params, source)
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"orders-{location_id}.{export.extension}"
+    return StreamingResponse(export_orders(pages, export), media_type=export.media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @router.get("/{order_id}")
 async def retrieve_order(
     order_id: str,
     location_id: str = Depends(get_location_id),
     hr: HubRiseClient = Depends(client),
 ):
-    return await hr.retrieve_order(location_id=location_id, order_id=order_id)
+    if order_store.enabled:
+        return raw_response(await order_store.retrieve_raw(hr, location_id, order_id))
+    body = await hr.retrieve_order_raw(location_id=location_id, order_id=order_id)
+    return raw_response(body)
 
 @router.get("")
 async def list_orders(
@@ -144,22 +310,68 @@ async def list_orders(
     after: Optional[str] = Query(None, description="ISO8601 inclusive lower bound"),
     before: Optional[str] = Query(None, description="ISO8601 exclusive upper bound"),
     customer_id: Optional[str] = None,
+    all_pages: bool = Query(False, description="Stream every matching order as NDJSON, following HubRise cursors"),
     location_id: str = Depends(get_location_id),
+    conn: dict = Depends(get_hubrise_conn),
     hr: HubRiseClient = Depends(client),
 ):
-    params = {k: v for k, v in {
-        "status": status,
-        "created_by": created_by,
-        "private_ref": private_ref,
-        "after": after,
-        "before": before,
-        "customer_id": customer_id,
-    }.items() if v is not None}
+    """
+    Orders newest first. With the order mirror on, location-scoped lists are
+    served locally when it can answer. Without HubRise callbacks, the mirror
+    only re-pulls the last hour of orders, so older orders may show an
+    outdated status; `status` filters go to HubRise unless
+    ORDER_MIRROR_LIVE_UPDATES says callbacks are keeping it current.
+    """
+    params = _order_filters(
+        status=status, created_by=created_by, private_ref=private_ref,
+        after=after, before=before, customer_id=customer_id,
+    )
 
     if location_scope:
-        return await hr.list_orders(location_id=location_id, params=params)
-    else:
-        return await hr.list_orders(account_id=account_id, params=params)
+        if order_store.enabled:
+            if all_pages:
+                pages = await order_store.iter_raw_pages(hr, location_id, params)
+                if pages is not None:
+                    return raw_ndjson_response(pages)
+            else:
+                mirrored = await order_store.list_raw(hr, location_id, params)
+                if mirrored is not None:
+                    return raw_response(mirrored)
+        if all_pages:
+            return ndjson_response(hr.iter_order_pages(location_id=location_id, params=params))
+        body = await hr.list_orders_raw(location_id=location_id, params=params)
+        return raw_response(body)
+
+    account_id = get_account_id(conn)
+    if all_pages:
+        locations = [loc["id"] for loc in await hr.list_locations(account_id)]
+        return ndjson_response(_batched(fan_out_orders(hr, locations, params=params)))
+    body = await hr.list_orders_raw(account_id=account_id, params=params)
+    return raw_response(body)
+
+@router.patch("/bulk")
+async def bulk_update_orders(
+    req: BulkOrderUpdate,
+    stream: bool = Query(False, description="NDJSON, one result per order as it completes"),
+    location_id: str = Depends(get_location_id),
+    hr: HubRiseClient = Depends(client),
+    idx: Optional[CatalogIndex] = Depends(cached_catalog_index),
+):
+    """
+    Apply many order patches (e.g. mark a service's orders completed) with
+    HubRise calls running concurrently, within the location's write limit.
+    Every order gets its own result; one failing doesn't stop the others.
+    """
+    patches = [(u.order_id, build_order_payload(u.patch, currency=_currency(idx, getattr(u.patch, "total", None))))
+               for u in req.updates]
+    results = update_orders(hr, location_id, patches)
+    if stream:
+        return ndjson_response(_batched(results, size=1))
+
+    by_id = {r["order_id"]: r async for r in results}
+    ordered = [by_id[order_id] for order_id, _ in patches]
+    succeeded = sum(1 for r in ordered if r["ok"])
+    return {"succeeded": succeeded, "failed": len(ordered) - succeeded, "results": ordered}
 
 @router.patch("/{order_id}")
 async def update_order(
@@ -167,7 +379,10 @@ async def update_order(
     patch: OrderPatch,
     location_id: str = Depends(get_location_id),
     hr: HubRiseClient = Depends(client),
+    idx: Optional[CatalogIndex] = Depends(cached_catalog_index),
 ):
-    body = jsonable_encoder(patch, exclude_none=True)
-    body = _normalise_order_for_hubrise(body, currency=CURRENCY)
-    return await hr.update_order(location_id=location_id, order_id=order_id, patch=body)
+    body = build_order_payload(patch, currency=_currency(idx, getattr(patch, "total", None)))
+    updated = await hr.update_order(location_id=location_id, order_id=order_id, patch=body)
+    if order_store.enabled:
+        await order_store.upsert([updated], location_id)
+    return updated
@@ -1,5 +1,5 @@
-from typing import Optional 
-from pydantic import BaseModel 
+from typing import Any, Dict, List, Optional 
+from pydantic import BaseModel, Field 
 from enum import Enum 
 
 # ----- Delivery Status -----
@@ -29,6 +29,20 @@ class DeliveryQuoteOut(DeliveryQuoteCreate):
     location_id: str 
     accepted_at: Optional[str] = None 
 
+class QuoteRequest(BaseModel):
+    details: Dict[str, Any] = {}           # forwarded to each carrier (addresses, sizes, ...)
+    carriers: Optional[List[str]] = None   # default: every configured carrier
+    deadline_ms: Optional[int] = Field(default=None, gt=0, le=30000)
+    auto_accept: bool = False
+
+class QuoteRoundOut(BaseModel):
+    quotes: List[DeliveryQuoteOut]
+    best: Optional[DeliveryQuoteOut] = None
+    accepted: bool = False
+    accept_error: Optional[str] = None
+    failed: Dict[str, str] = {}
+    timed_out: List[str] = []
+
 # ----- Deliveries -----
 class DeliveryCreate(BaseModel):
     carrier: str 
@@ -53,3 +67,8 @@ class DeliveryOut(DeliveryCreate):
     pickup_at: Optional[str] = None 
     delivered_at: Optional[str] = None 
     cancelled_at: Optional[str] = None 
+
+# ----- Driver Location -----
+class DriverLocation(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
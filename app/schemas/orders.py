@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Optional, List, Dict, Union, Literal, Any
-from pydantic import BaseModel, model_validator, ConfigDict
+from typing_extensions import NotRequired, TypedDict
+from pydantic import BaseModel, model_validator, field_validator, ConfigDict, Field, TypeAdapter, with_config
 from enum import Enum
 
 # HubRise expects money fields as string like "8.50 GBP"
@@ -151,15 +152,18 @@ class OrderCreate(HubBase):
 
     @model_validator(mode='after')
     def _customer_identity_rule(self) -> 'OrderCreate':
-        has_id = bool(self.customer_id)
-        has_list_pair = bool(self.customer_list_id and self.customer_private_ref)
-        has_guest = bool(self.customer)
-        if sum([has_id, has_list_pair, has_guest]) > 1:
-            raise ValueError(
-                "Provide only one of: customer_id, (customer_list_id + customer_private_ref), or customer."
-            )
+        check_customer_identity(self.customer_id, self.customer_list_id, self.customer_private_ref, self.customer)
         return self
 
+def check_customer_identity(customer_id, customer_list_id, customer_private_ref, customer) -> None:
+    has_id = bool(customer_id)
+    has_list_pair = bool(customer_list_id and customer_private_ref)
+    has_guest = bool(customer)
+    if sum([has_id, has_list_pair, has_guest]) > 1:
+        raise ValueError(
+            "Provide only one of: customer_id, (customer_list_id + customer_private_ref), or customer."
+        )
+
 class OrderPatch(HubBase):
     status: Optional[OrderStatus] = None
     confirmed_time: Optional[str] = None
@@ -174,6 +178,97 @@ class OrderPatch(HubBase):
     charges: Optional[List[Dict[str, Any]]] = None
     payments: Optional[List[Dict[str, Any]]] = None
 
+# ----- Bulk update -----
+class BulkOrderPatch(HubBase):
+    order_id: str
+    patch: OrderPatch
+
+class BulkOrderUpdate(HubBase):
+    updates: List[BulkOrderPatch] = Field(..., min_length=1, max_length=500)
+
+    @field_validator("updates")
+    @classmethod
+    def _unique_orders(cls, updates: List[BulkOrderPatch]) -> List[BulkOrderPatch]:
+        seen = set()
+        for u in updates:
+            if u.order_id in seen:
+                raise ValueError(f"order {u.order_id} appears more than once")
+            seen.add(u.order_id)
+        return updates
+
+# ----- Trusted channel -----
+# The same order shape as OrderCreate, as TypedDicts: validation checks types
+# and required fields and yields plain dicts, with no model instances, string
+# stripping or per-model validators. Only for bodies from our own systems
+# (POST /orders/trusted); unknown keys are kept, as with HubBase.
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedOption(TypedDict):
+    option_list_name: str
+    name: str
+    ref: NotRequired[Optional[str]]
+    price: NotRequired[Optional[Money]]
+    quantity: NotRequired[Optional[int]]
+    removed: NotRequired[Optional[bool]]
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedItem(TypedDict):
+    product_name: str
+    price: Money
+    quantity: Union[str, int, float]
+    sku_name: NotRequired[Optional[str]]
+    sku_ref: NotRequired[Optional[str]]
+    subtotal: NotRequired[Optional[Money]]
+    options: NotRequired[Optional[List[TrustedOption]]]
+    deal_line: NotRequired[Optional[Dict[str, Any]]]
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedDiscount(TypedDict):
+    name: str
+    price_off: Money
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedCharge(TypedDict):
+    name: str
+    price: Money
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedPayment(TypedDict):
+    amount: Money
+
+@with_config(ConfigDict(extra="allow"))
+class TrustedOrder(TypedDict):
+    status: OrderStatus
+    service_type: NotRequired[Optional[ServiceType]]
+    private_ref: NotRequired[Optional[str]]
+    total: NotRequired[Optional[Money]]
+    items: NotRequired[Optional[List[TrustedItem]]]
+    discounts: NotRequired[Optional[List[TrustedDiscount]]]
+    charges: NotRequired[Optional[List[TrustedCharge]]]
+    payments: NotRequired[Optional[List[TrustedPayment]]]
+    customer_id: NotRequired[Optional[str]]
+    customer_list_id: NotRequired[Optional[str]]
+    customer_private_ref: NotRequired[Optional[str]]
+    customer: NotRequired[Optional[Dict[str, Any]]]
+
+# Built once at import: validate_json parses and validates in one pass
+trusted_order_adapter: TypeAdapter[TrustedOrder] = TypeAdapter(TrustedOrder)
+
+# ----- Pricing -----
+# Only the shape is checked here (every line is an object); amounts and
+# quantities are the pricer's job, reported per basket.
+class PriceItem(HubBase):
+    # price optional when sku_ref is in the catalog
+    options: Optional[List[Dict[str, Any]]] = None
+
+class PriceBasket(HubBase):
+    items: Optional[List[PriceItem]] = None
+    charges: Optional[List[Dict[str, Any]]] = None
+    discounts: Optional[List[Dict[str, Any]]] = None
+
+class PriceRequest(HubBase):
+    baskets: List[PriceBasket] = Field(..., min_length=1, max_length=200)
+
 # ----- Minimal response (optional) -----
 class OrderOut(HubBase):
     id: Optional[str] = None
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.services.order_store import order_store
+
+logger = logging.getLogger(__name__)
+
+
+class LocationLimits:
+    """
+    One semaphore per HubRise location, shared by every bulk batch in this
+    process, so concurrent batches for the same location together stay
+    within `limit` writes in flight.
+    """
+
+    def __init__(self, limit: int = settings.HUBRISE_LOCATION_WRITE_CONCURRENCY):
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def get(self, location_id: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(location_id)
+        if sem is None:
+            sem = self._semaphores[location_id] = asyncio.Semaphore(self.limit)
+        return sem
+
+
+location_limits = LocationLimits()
+
+
+def _failure(order_id: str, exc: Exception) -> Dict[str, Any]:
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            detail = exc.response.json()
+        except ValueError:
+            detail = {"error": exc.response.text}
+        return {"order_id": order_id, "ok": False, "status": exc.response.status_code, "error": detail}
+    return {"order_id": order_id, "ok": False, "status": 502, "error": str(exc) or type(exc).__name__}
+
+
+async def update_orders(
+    hr: HubRiseClient,
+    location_id: str,
+    patches: List[Tuple[str, Dict[str, Any]]],
+    limits: Optional[LocationLimits] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    PATCH each (order_id, body) through `hr.update_order`, at most the
+    location's limit at a time, yielding one result per order as it
+    completes: {"order_id", "ok": True, "order": ...} or
+    {"order_id", "ok": False, "status", "error"}. One failure never stops
+    the rest. Closing the generator early cancels whatever hasn't finished.
+    """
+    sem = (limits or location_limits).get(location_id)
+
+    async def one(order_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        async with sem:
+            try:
+                updated = await hr.update_order(location_id=location_id, order_id=order_id, patch=body)
+            except Exception as exc:
+                logger.warning("Bulk update of order %s failed: %s", order_id, exc)
+                return _failure(order_id, exc)
+        if order_store.enabled:
+            # HubRise has applied the update; a mirror hiccup shouldn't report
+            # it as failed (the next sync catches the mirror up)
+            try:
+                await order_store.upsert([updated], location_id)
+            except Exception as exc:
+                logger.warning("Mirroring bulk-updated order %s failed: %s", order_id, exc)
+        return {"order_id": order_id, "ok": True, "order": updated}
+
+    tasks = [asyncio.ensure_future(one(order_id, body)) for order_id, body in patches]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
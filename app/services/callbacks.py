@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.catalog_cache import catalog_cache
+from app.services.events import event_broker, location_topic, order_topic
+from app.services.location_cache import location_cache
+from app.services.order_analytics import order_analytics
+from app.services.order_store import order_store
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Hubrise-Hmac-Sha256"
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """HubRise signs the raw callback body with HMAC-SHA256 keyed by the client secret (hex)."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+@dataclass(frozen=True)
+class CallbackEvent:
+    """One HubRise callback: `body` is the event as posted (order_id, new_state, ...)."""
+    resource_type: str
+    event_type: str
+    body: Dict[str, Any]
+    received_at: float   # monotonic
+
+    @property
+    def resource_id(self) -> str:
+        key = f"{self.resource_type}_id"
+        return str(self.body.get(key) or self.body.get("location_id") or "")
+
+    @property
+    def new_state(self) -> Optional[Dict[str, Any]]:
+        return self.body.get("new_state")
+
+    @classmethod
+    def from_body(cls, body: Dict[str, Any]) -> "CallbackEvent":
+        return cls(
+            resource_type=str(body.get("resource_type") or ""),
+            event_type=str(body.get("event_type") or ""),
+            body=body,
+            received_at=time.monotonic(),
+        )
+
+
+Handler = Callable[[CallbackEvent], Awaitable[None]]
+
+
+class CallbackPipeline:
+    """
+    Bounded in-process queue between the callback endpoint and the handlers.
+
+    Events are sharded by resource id across `workers` queues, so updates to
+    one order are applied in the order HubRise sent them while different
+    orders are processed concurrently. When a shard is full, `offer` refuses
+    the event and the endpoint answers 503, leaving HubRise to retry later.
+    """
+
+    def __init__(self, maxsize: int = settings.HUBRISE_CALLBACK_QUEUE_SIZE,
+                 workers: int = settings.HUBRISE_CALLBACK_WORKERS):
+        per_shard = max(1, maxsize // workers)
+        self._queues: List["asyncio.Queue[CallbackEvent]"] = [asyncio.Queue(per_shard) for _ in range(workers)]
+        self._handlers: DefaultDict[str, List[Handler]] = defaultdict(list)
+        self._tasks: List["asyncio.Task[None]"] = []
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.lag_last = 0.0   # seconds between receipt and dispatch
+        self.lag_max = 0.0
+
+    def subscribe(self, resource_type: str, handler: Handler) -> None:
+        """Run `handler` for every event of `resource_type` ("*" for all)."""
+        self._handlers[resource_type].append(handler)
+
+    def offer(self, event: CallbackEvent) -> bool:
+        """Queue an event without waiting; False if its shard is full."""
+        shard = zlib.crc32(event.resource_id.encode()) % len(self._queues)
+        try:
+            self._queues[shard].put_nowait(event)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.received += 1
+        return True
+
+    async def _dispatch(self, event: CallbackEvent) -> None:
+        for handler in self._handlers.get(event.resource_type, []) + self._handlers.get("*", []):
+            try:
+                await handler(event)
+            except Exception:
+                self.failed += 1
+                logger.exception("Callback handler failed for %s %s %s",
+                                 event.resource_type, event.event_type, event.resource_id)
+
+    async def _work(self, queue: "asyncio.Queue[CallbackEvent]") -> None:
+        while True:
+            event = await queue.get()
+            try:
+                self.lag_last = time.monotonic() - event.received_at
+                self.lag_max = max(self.lag_max, self.lag_last)
+                await self._dispatch(event)
+                self.processed += 1
+            finally:
+                queue.task_done()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._work(q)) for q in self._queues]
+
+    async def join(self) -> None:
+        """Wait until every queued event has been handled."""
+        for queue in self._queues:
+            await queue.join()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain what is queued (up to `timeout`), then stop the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %d queued callbacks on shutdown", self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth(),
+            "capacity": sum(q.maxsize for q in self._queues),
+            "received": self.received,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "lag_last_ms": round(self.lag_last * 1000, 1),
+            "lag_max_ms": round(self.lag_max * 1000, 1),
+        }
+
+
+# --- default handlers: keep local copies current so nobody needs to poll
+
+async def mirror_order(event: CallbackEvent) -> None:
+    if event.new_state and order_store.enabled:
+        await order_store.upsert([event.new_state], event.body.get("location_id"))
+
+
+async def record_order_analytics(event: CallbackEvent) -> None:
+    if event.new_state and event.body.get("location_id"):
+        order_analytics.ingest(event.body["location_id"], [event.new_state])
+
+
+async def invalidate_catalog(event: CallbackEvent) -> None:
+    catalog_id = event.body.get("catalog_id")
+    if catalog_id:
+        catalog_cache.invalidate(catalog_id)
+
+
+async def invalidate_location(event: CallbackEvent) -> None:
+    location_id = event.body.get("location_id")
+    if location_id:
+        location_cache.invalidate(location_id)
+
+
+async def publish_event(event: CallbackEvent) -> None:
+    """Fan the change out to SSE watchers of the order and of its location."""
+    data = {
+        "resource_type": event.resource_type,
+        "event_type": event.event_type,
+        "order_id": event.body.get("order_id"),
+        "location_id": event.body.get("location_id"),
+        "new_state": event.new_state,
+    }
+    name = f"{event.resource_type}.{event.event_type}"
+    if data["order_id"]:
+        event_broker.publish(order_topic(data["order_id"]), name, data)
+    if data["location_id"]:
+        event_broker.publish(location_topic(data["location_id"]), name, data)
+
+
+def register_default_handlers(pipeline: CallbackPipeline) -> None:
+    pipeline.subscribe("order", mirror_order)
+    pipeline.subscribe("order", record_order_analytics)
+    pipeline.subscribe("catalog", invalidate_catalog)
+    pipeline.subscribe("location", invalidate_location)
+    # after the mirror is updated, so watchers refetching see the new state
+    pipeline.subscribe("*", publish_event)
+
+
+callback_pipeline = CallbackPipeline()
+register_default_handlers(callback_pipeline)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.services.order_fanout import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+_LATEST = datetime.max.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Carrier:
+    """
+    A delivery carrier with an HTTP quote endpoint. It receives the quote
+    request details as JSON and answers with a HubRise-shaped quote:
+    {"fee": "4.50 GBP", "estimated_pickup_at": ..., "estimated_dropoff_at": ..., "carrier_ref": ...}
+    """
+    name: str
+    quote_url: str
+
+    async def quote(self, http: httpx.AsyncClient, details: Mapping[str, Any]) -> Dict[str, Any]:
+        resp = await http.post(self.quote_url, json=dict(details))
+        resp.raise_for_status()
+        body = resp.json()
+        quote = {k: body.get(k) for k in ("fee", "carrier_ref", "ref", "estimated_pickup_at", "estimated_dropoff_at")}
+        if not quote["fee"]:
+            raise ValueError(f"{self.name} quote has no fee")
+        return {"carrier": self.name, **{k: v for k, v in quote.items() if v is not None}}
+
+
+def configured_carriers(names: Optional[List[str]] = None) -> List[Carrier]:
+    """Carriers from DELIVERY_CARRIERS (name -> quote URL), optionally restricted to `names`."""
+    carriers = [Carrier(name, url) for name, url in settings.DELIVERY_CARRIERS.items()]
+    if names is not None:
+        carriers = [c for c in carriers if c.name in names]
+    return carriers
+
+
+def _fee(quote: Mapping[str, Any]) -> Decimal:
+    try:
+        return Decimal(str(quote.get("fee", "")).split()[0])
+    except (InvalidOperation, IndexError):
+        return Decimal("Infinity")
+
+
+def _eta(quote: Mapping[str, Any]) -> datetime:
+    return parse_timestamp(quote.get("estimated_dropoff_at")) or _LATEST
+
+
+def best_quote(quotes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Cheapest quote; earliest estimated dropoff breaks ties."""
+    return min(quotes, key=lambda q: (_fee(q), _eta(q)), default=None)
+
+
+@dataclass
+class QuoteRound:
+    quotes: List[Dict[str, Any]] = field(default_factory=list)      # as created in HubRise
+    best: Optional[Dict[str, Any]] = None
+    accepted: bool = False
+    accept_error: Optional[str] = None
+    failed: Dict[str, str] = field(default_factory=dict)            # carrier -> error
+    timed_out: List[str] = field(default_factory=list)
+
+
+async def collect_quotes(
+    carriers: List[Carrier], http: httpx.AsyncClient, details: Mapping[str, Any], deadline: float,
+) -> Tuple[List[Dict[str, Any]], Dict[str, str], List[str]]:
+    """
+    Ask every carrier at once and keep whatever answered within `deadline`
+    seconds; the rest are cancelled.
+    """
+    tasks = {asyncio.ensure_future(c.quote(http, details)): c.name for c in carriers}
+    if not tasks:
+        return [], {}, []
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    quotes, failed = [], {}
+    for task in done:
+        if task.exception() is not None:
+            failed[tasks[task]] = str(task.exception()) or type(task.exception()).__name__
+        else:
+            quotes.append(task.result())
+    return quotes, failed, sorted(tasks[t] for t in pending)
+
+
+async def request_quotes(
+    hr: HubRiseClient,
+    http: httpx.AsyncClient,
+    location_id: str,
+    order_id: str,
+    details: Mapping[str, Any],
+    *,
+    carriers: Optional[List[Carrier]] = None,
+    deadline: float = settings.DELIVERY_QUOTE_DEADLINE_MS / 1000,
+    auto_accept: bool = False,
+) -> QuoteRound:
+    """
+    Quote an order with every carrier concurrently, create the quotes that
+    arrived in time in HubRise, and optionally accept the best one. A failed
+    accept leaves `accepted` false with `accept_error` set; the created
+    quotes are still returned so the caller can accept one later.
+    """
+    carriers = configured_carriers() if carriers is None else carriers
+    quotes, failed, timed_out = await collect_quotes(carriers, http, details, deadline)
+    result = QuoteRound(failed=failed, timed_out=timed_out)
+
+    created = await asyncio.gather(
+        *(hr.create_delivery_quote(location_id, order_id, q) for q in quotes), return_exceptions=True
+    )
+    for quote, posted in zip(quotes, created):
+        if isinstance(posted, Exception):
+            logger.warning("Posting %s quote for order %s failed: %s", quote["carrier"], order_id, posted)
+            result.failed[quote["carrier"]] = str(posted)
+        else:
+            result.quotes.append(posted)
+
+    result.best = best_quote(result.quotes)
+    if auto_accept and result.best is not None:
+        try:
+            await hr.accept_delivery_quote(location_id, order_id, result.best["id"])
+        except Exception as exc:
+            logger.warning("Accepting quote %s for order %s failed: %s", result.best["id"], order_id, exc)
+            result.accept_error = str(exc) or type(exc).__name__
+        else:
+            result.accepted = True
+    return result
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from cachetools import LRUCache
+from starlette.concurrency import run_in_threadpool
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """One cached HubRise catalog: the upstream bytes plus their parsed form."""
+    catalog_id: str
+    raw: bytes
+    data: Dict[str, Any]
+    etag: str                          # strong ETag we hand to our own clients
+    upstream_etag: Optional[str]       # validators for revalidating with HubRise
+    last_modified: Optional[str]
+    fetched_at: float                  # monotonic time of the last 200/304
+
+
+def compute_etag(raw: bytes) -> str:
+    """Content hash, so every worker hands out the same ETag for the same catalog."""
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, lists and `*` allowed)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == wanted:
+            return True
+    return False
+
+
+class CatalogCache:
+    """
+    Per-catalog_id cache with stale-while-revalidate.
+
+    - fresh (age < ttl): served from memory, no upstream call
+    - stale (age < ttl + max_stale): served from memory, one background
+      conditional request (If-None-Match / If-Modified-Since) refreshes it
+    - expired or missing: the request waits for revalidation
+
+    Concurrent refreshes of the same catalog share one upstream call.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.CATALOG_CACHE_TTL_SECONDS,
+        max_stale: float = settings.CATALOG_CACHE_MAX_STALE_SECONDS,
+        maxsize: int = settings.CATALOG_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self._refreshing: Dict[str, "asyncio.Task[CatalogEntry]"] = {}
+        self._filling: Dict[str, "CatalogTee"] = {}   # catalog_id -> the tee holding the claim
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0   # 304 from HubRise
+        self.refetched = 0     # 200 from HubRise
+
+    def peek(self, catalog_id: str) -> Optional[CatalogEntry]:
+        return self._entries.get(catalog_id)
+
+    def fresh(self, catalog_id: str) -> Optional[CatalogEntry]:
+        """The cached entry if it can be served without any upstream call."""
+        entry = self._entries.get(catalog_id)
+        if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+            return entry
+        return None
+
+    def tee(self, catalog_id: str, *, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Optional["CatalogTee"]:
+        """
+        Claim the right to fill `catalog_id` from a response being streamed
+        elsewhere. Only one stream per catalog tees at a time; others get None
+        and just forward bytes.
+        """
+        if catalog_id in self._filling:
+            return None
+        tee = self._filling[catalog_id] = CatalogTee(self, catalog_id, etag, last_modified)
+        return tee
+
+    async def get(self, hr: HubRiseClient, catalog_id: str) -> CatalogEntry:
+        entry = self._entries.get(catalog_id)
+        if entry is None:
+            self.misses += 1
+            return await asyncio.shield(self._refresh(hr, catalog_id))
+
+        age = time.monotonic() - entry.fetched_at
+        if age < self.ttl:
+            self.hits += 1
+            return entry
+        if age < self.ttl + self.max_stale:
+            self.hits += 1
+            self._refresh(hr, catalog_id)  # background; stale entry served meanwhile
+            return entry
+
+        self.misses += 1
+        return await asyncio.shield(self._refresh(hr, catalog_id))
+
+    def invalidate(self, catalog_id: str) -> None:
+        """Force the next read to revalidate (e.g. on a catalog update callback)."""
+        entry = self._entries.get(catalog_id)
+        if entry is not None:
+            self._entries[catalog_id] = replace(entry, fetched_at=float("-inf"))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def store(self, catalog_id: str, raw: bytes, *, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> CatalogEntry:
+        entry = CatalogEntry(
+            catalog_id=catalog_id,
+            raw=raw,
+            data=json.loads(raw),
+            etag=compute_etag(raw),
+            upstream_etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.monotonic(),
+        )
+        self._entries[catalog_id] = entry
+        return entry
+
+    def _refresh(self, hr: HubRiseClient, catalog_id: str) -> "asyncio.Task[CatalogEntry]":
+        task = self._refreshing.get(catalog_id)
+        if task is None:
+            task = asyncio.ensure_future(self._revalidate(hr, catalog_id))
+            self._refreshing[catalog_id] = task
+            task.add_done_callback(lambda t: self._refresh_done(catalog_id, t))
+        return task
+
+    def _refresh_done(self, catalog_id: str, task: "asyncio.Task[CatalogEntry]") -> None:
+        if self._refreshing.get(catalog_id) is task:
+            del self._refreshing[catalog_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Catalog %s refresh failed: %s", catalog_id, task.exception())
+
+    async def _revalidate(self, hr: HubRiseClient, catalog_id: str) -> CatalogEntry:
+        current = self._entries.get(catalog_id)
+        resp = await hr.get_catalog_conditional(
+            catalog_id,
+            etag=current.upstream_etag if current else None,
+            last_modified=current.last_modified if current else None,
+        )
+        if resp.status_code == 304 and current is not None:
+            self.revalidated += 1
+            entry = replace(
+                current,
+                upstream_etag=resp.headers.get("ETag", current.upstream_etag),
+                last_modified=resp.headers.get("Last-Modified", current.last_modified),
+                fetched_at=time.monotonic(),
+            )
+            self._entries[catalog_id] = entry
+            return entry
+
+        self.refetched += 1
+        return self.store(
+            catalog_id,
+            resp.content,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "refetched": self.refetched,
+        }
+
+
+class CatalogTee:
+    """Collects streamed catalog chunks and stores them once the stream completes."""
+
+    def __init__(self, cache: CatalogCache, catalog_id: str,
+                 etag: Optional[str], last_modified: Optional[str]):
+        self._cache = cache
+        self._catalog_id = catalog_id
+        self._etag = etag
+        self._last_modified = last_modified
+        self._chunks: List[bytes] = []
+        self._closed = False
+
+    def write(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+
+    async def commit(self) -> None:
+        # joining and parsing a whole catalog takes long enough to stall the loop
+        try:
+            await run_in_threadpool(self._cache.store, self._catalog_id, b"".join(self._chunks),
+                                    etag=self._etag, last_modified=self._last_modified)
+        except ValueError:
+            logger.warning("Streamed catalog %s was not valid JSON; not cached", self._catalog_id)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Drop the buffer and release the claim; safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._chunks = []
+        # by now another stream may hold the claim; only release our own
+        if self._cache._filling.get(self._catalog_id) is self:
+            del self._cache._filling[self._catalog_id]
+
+
+# Shared across requests, like the geocode cache
+catalog_cache = CatalogCache()
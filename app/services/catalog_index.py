@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.catalog_cache import CatalogEntry
+
+
+@dataclass(frozen=True)
+class SkuRecord:
+    sku_id: Optional[str]
+    sku_ref: Optional[str]
+    sku_name: Optional[str]
+    price: Optional[str]
+    option_list_ids: Tuple[str, ...]
+    product_id: Optional[str]
+    product_ref: Optional[str]
+    product_name: Optional[str]
+    category_id: Optional[str]
+    category_ref: Optional[str]
+    sku: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class OptionRecord:
+    option_id: Optional[str]
+    option_ref: Optional[str]
+    name: Optional[str]
+    price: Optional[str]
+    option_list_id: Optional[str]
+    option: Dict[str, Any]
+
+
+@dataclass
+class CatalogIndex:
+    """
+    Flat hash indexes over a HubRise catalog. Everything that previously
+    meant walking categories -> products -> skus -> option lists is a
+    single dict lookup here.
+    """
+    catalog_id: str
+    etag: Optional[str] = None
+    currency: Optional[str] = None      # from the first SKU price that names one
+    products: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    skus: Dict[str, SkuRecord] = field(default_factory=dict)
+    sku_by_ref: Dict[str, SkuRecord] = field(default_factory=dict)
+    option_lists: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    options: Dict[str, OptionRecord] = field(default_factory=dict)
+    option_by_ref: Dict[str, OptionRecord] = field(default_factory=dict)
+    categories: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    category_products: Dict[str, List[str]] = field(default_factory=dict)
+    # Per-element compiled records, kept so the next compile can reuse
+    # whatever didn't change.
+    _product_skus: Dict[str, Tuple[SkuRecord, ...]] = field(default_factory=dict, repr=False)
+    _list_options: Dict[str, Tuple[OptionRecord, ...]] = field(default_factory=dict, repr=False)
+
+    def option_lists_for(self, sku: SkuRecord) -> List[Dict[str, Any]]:
+        return [self.option_lists[i] for i in sku.option_list_ids if i in self.option_lists]
+
+    def products_in_category(self, key: str) -> List[str]:
+        """Product ids for a category id or ref."""
+        return self.category_products.get(key, [])
+
+
+def _catalog_data(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    # GET /catalogs/:id nests the content under "data"
+    return catalog.get("data") or catalog
+
+
+def _compile_product(product: Dict[str, Any]) -> Tuple[SkuRecord, ...]:
+    return tuple(
+        SkuRecord(
+            sku_id=sku.get("id"),
+            sku_ref=sku.get("ref"),
+            sku_name=sku.get("name"),
+            price=sku.get("price"),
+            option_list_ids=tuple(sku.get("option_list_ids") or ()),
+            product_id=product.get("id"),
+            product_ref=product.get("ref"),
+            product_name=product.get("name"),
+            category_id=product.get("category_id"),
+            category_ref=product.get("category_ref"),
+            sku=sku,
+        )
+        for sku in product.get("skus") or ()
+    )
+
+
+def _compile_option_list(option_list: Dict[str, Any]) -> Tuple[OptionRecord, ...]:
+    return tuple(
+        OptionRecord(
+            option_id=opt.get("id"),
+            option_ref=opt.get("ref"),
+            name=opt.get("name"),
+            price=opt.get("price"),
+            option_list_id=option_list.get("id"),
+            option=opt,
+        )
+        for opt in option_list.get("options") or ()
+    )
+
+
+def compile_catalog(
+    catalog_id: str,
+    catalog: Dict[str, Any],
+    previous: Optional[CatalogIndex] = None,
+    etag: Optional[str] = None,
+) -> CatalogIndex:
+    """
+    Build a CatalogIndex. With `previous`, products and option lists whose
+    JSON is unchanged reuse their already-compiled records, so a catalog
+    update only pays for the elements that actually changed.
+    """
+    data = _catalog_data(catalog)
+    idx = CatalogIndex(catalog_id=catalog_id, etag=etag)
+    prev_products = previous.products if previous else {}
+    prev_lists = previous.option_lists if previous else {}
+
+    for category in data.get("categories") or ():
+        for key in (category.get("id"), category.get("ref")):
+            if key is not None:
+                idx.categories[key] = category
+                idx.category_products.setdefault(key, [])
+
+    for product in data.get("products") or ():
+        pid = product.get("id") or product.get("ref")
+        if pid is None:
+            continue
+        if previous is not None and prev_products.get(pid) == product:
+            records = previous._product_skus[pid]
+        else:
+            records = _compile_product(product)
+        idx.products[pid] = product
+        idx._product_skus[pid] = records
+        for rec in records:
+            if idx.currency is None and rec.price:
+                parts = str(rec.price).split()
+                idx.currency = parts[1] if len(parts) == 2 else None
+            if rec.sku_id is not None:
+                idx.skus[rec.sku_id] = rec
+            if rec.sku_ref is not None:
+                idx.sku_by_ref[rec.sku_ref] = rec
+        for key in (product.get("category_id"), product.get("category_ref")):
+            if key is not None:
+                idx.category_products.setdefault(key, []).append(pid)
+
+    for option_list in data.get("option_lists") or ():
+        lid = option_list.get("id") or option_list.get("ref")
+        if lid is None:
+            continue
+        if previous is not None and prev_lists.get(lid) == option_list:
+            opt_records = previous._list_options[lid]
+        else:
+            opt_records = _compile_option_list(option_list)
+        idx.option_lists[lid] = option_list
+        idx._list_options[lid] = opt_records
+        for opt in opt_records:
+            if opt.option_id is not None:
+                idx.options[opt.option_id] = opt
+            if opt.option_ref is not None:
+                idx.option_by_ref[opt.option_ref] = opt
+
+    return idx
+
+
+class CatalogIndexRegistry:
+    """Compiled indexes per catalog_id, rebuilt when the cached catalog's ETag changes."""
+
+    def __init__(self):
+        self._indexes: Dict[str, CatalogIndex] = {}
+        self.builds = 0
+
+    def get(self, entry: CatalogEntry) -> CatalogIndex:
+        idx = self._indexes.get(entry.catalog_id)
+        if idx is not None and idx.etag == entry.etag:
+            return idx
+        idx = compile_catalog(entry.catalog_id, entry.data, previous=idx, etag=entry.etag)
+        self._indexes[entry.catalog_id] = idx
+        self.builds += 1
+        return idx
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+catalog_indexes = CatalogIndexRegistry()
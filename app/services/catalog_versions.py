@@ -0,0 +1,125 @@
+import json
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+from app.core.config import settings
+from app.services.catalog_index import CatalogIndex
+
+
+def catalog_version(index: CatalogIndex) -> str:
+    """
+    Versions are the catalog's content hash (its ETag without quotes), so every
+    worker and every restart agrees on them without shared state.
+    """
+    return (index.etag or "").strip('"')
+
+
+def _without(d: Mapping[str, Any], key: str) -> Dict[str, Any]:
+    return {k: v for k, v in d.items() if k != key}
+
+
+def _diff(old: Mapping[str, Any], new: Mapping[str, Any]) -> Dict[str, Any]:
+    upserted = [v for k, v in new.items() if old.get(k) != v]
+    removed = [k for k in old if k not in new]
+    return {"upserted": upserted, "removed": removed}
+
+
+def _sections(index: CatalogIndex) -> Dict[str, Dict[str, Any]]:
+    """
+    Flat, id-keyed views diffed independently, so a price change on one SKU
+    ships one SKU rather than its whole product.
+    """
+    categories = {}
+    for category in index.categories.values():
+        key = category.get("id") or category.get("ref")
+        categories[key] = category
+    return {
+        "categories": categories,
+        "products": {pid: _without(p, "skus") for pid, p in index.products.items()},
+        "skus": {
+            sku_id: {**rec.sku, "product_id": rec.product_id}
+            for sku_id, rec in index.skus.items()
+        },
+        "option_lists": {lid: _without(ol, "options") for lid, ol in index.option_lists.items()},
+        "options": {
+            opt_id: {**rec.option, "option_list_id": rec.option_list_id}
+            for opt_id, rec in index.options.items()
+        },
+    }
+
+
+class CatalogVersionStore:
+    """
+    Keeps the last few compiled versions of each catalog and serves structural
+    deltas between any retained version and the current one. Deltas are
+    encoded once and reused for every client asking for the same pair.
+    """
+
+    def __init__(self, max_versions: int = settings.CATALOG_DELTA_MAX_VERSIONS,
+                 max_cached_deltas: int = 64):
+        self.max_versions = max_versions
+        self._history: Dict[str, Deque[Tuple[str, CatalogIndex]]] = {}
+        self._sections: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._deltas: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._max_cached_deltas = max_cached_deltas
+
+    def observe(self, index: CatalogIndex) -> str:
+        """Record `index` as the current version of its catalog; returns its version."""
+        version = catalog_version(index)
+        history = self._history.setdefault(index.catalog_id, deque())
+        if history and history[-1][0] == version:
+            return version
+        history.append((version, index))
+        while len(history) > self.max_versions:
+            dropped, _ = history.popleft()
+            self._sections.pop((index.catalog_id, dropped), None)
+        return version
+
+    def _find(self, catalog_id: str, version: str) -> Optional[CatalogIndex]:
+        for v, index in self._history.get(catalog_id, ()):
+            if v == version:
+                return index
+        return None
+
+    def _sections_for(self, catalog_id: str, version: str, index: CatalogIndex) -> Dict[str, Dict[str, Any]]:
+        key = (catalog_id, version)
+        sections = self._sections.get(key)
+        if sections is None:
+            sections = self._sections[key] = _sections(index)
+        return sections
+
+    def delta(self, index: CatalogIndex, since: Optional[str], raw_catalog: bytes) -> bytes:
+        """
+        Encoded response body for a client holding version `since`: only the
+        changes when `since` is retained, otherwise the full catalog.
+        """
+        catalog_id = index.catalog_id
+        current = self.observe(index)
+        old = self._find(catalog_id, since) if since else None
+        if old is None:
+            # splice the upstream bytes in rather than re-encoding the catalog
+            head = json.dumps({"catalog_id": catalog_id, "version": current, "full": True})
+            return head[:-1].encode() + b',"catalog":' + raw_catalog + b"}"
+
+        key = (catalog_id, since, current)
+        cached = self._deltas.get(key)
+        if cached is not None:
+            self._deltas.move_to_end(key)
+            return cached
+
+        old_sections = self._sections_for(catalog_id, since, old)
+        new_sections = self._sections_for(catalog_id, current, index)
+        body = {
+            "catalog_id": catalog_id, "version": current, "since": since, "full": False,
+            "changes": {
+                name: _diff(old_sections[name], new_sections[name]) for name in new_sections
+            },
+        }
+        encoded = json.dumps(body, separators=(",", ":")).encode()
+        self._deltas[key] = encoded
+        if len(self._deltas) > self._max_cached_deltas:
+            self._deltas.popitem(last=False)
+        return encoded
+
+
+catalog_versions = CatalogVersionStore()
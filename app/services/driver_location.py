@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.services.distance import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+_METERS_PER_MILE = 1609.344
+
+Key = Tuple[str, str]   # (location_id, order_id)
+
+
+@dataclass
+class _Track:
+    hr: HubRiseClient                 # client of the latest fix (carries its token)
+    latest: Tuple[float, float]
+    updated_at: float
+    sent: Optional[Tuple[float, float]] = None
+    dirty: bool = True
+
+
+class DriverLocationCoalescer:
+    """
+    Keeps the latest driver fix per order and forwards it to HubRise's
+    update_delivery at most once per `interval`, or straight away when the
+    driver has moved `min_move_meters` since the last fix HubRise has. Fixes
+    in between only overwrite the pending one, so the final position is
+    always the one sent.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.DRIVER_LOCATION_FLUSH_SECONDS,
+        min_move_meters: float = settings.DRIVER_LOCATION_FLUSH_METERS,
+        idle_ttl: float = 600,
+        concurrency: int = 8,
+    ):
+        self.interval = interval
+        self.min_move_meters = min_move_meters
+        self.idle_ttl = idle_ttl
+        self._tracks: Dict[Key, _Track] = {}
+        self._inflight: Set[Key] = set()
+        self._flushes: Set["asyncio.Task[None]"] = set()   # movement-triggered sends
+        self._limiter = asyncio.Semaphore(concurrency)
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.received = 0
+        self.sent = 0
+        self.failed = 0
+
+    def _meters_since_sent(self, track: _Track) -> float:
+        if track.sent is None:
+            return float("inf")
+        miles = haversine_distance(track.sent[0], track.sent[1], track.latest[0], track.latest[1])
+        return miles * _METERS_PER_MILE
+
+    def offer(self, hr: HubRiseClient, location_id: str, order_id: str,
+              latitude: float, longitude: float) -> None:
+        """Record a fix; flushes immediately on the first fix or significant movement."""
+        key = (location_id, order_id)
+        now = time.monotonic()
+        track = self._tracks.get(key)
+        if track is None:
+            track = self._tracks[key] = _Track(hr=hr, latest=(latitude, longitude), updated_at=now)
+        else:
+            track.hr, track.latest, track.updated_at = hr, (latitude, longitude), now
+            # a parked driver repeating the position HubRise already has costs nothing
+            track.dirty = track.dirty or track.latest != track.sent
+        self.received += 1
+
+        if self._meters_since_sent(track) >= self.min_move_meters and key not in self._inflight:
+            task = asyncio.ensure_future(self._flush(key))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key: Key) -> None:
+        track = self._tracks.get(key)
+        if track is None or not track.dirty or key in self._inflight:
+            return
+        self._inflight.add(key)
+        position = track.latest
+        track.dirty = False
+        try:
+            async with self._limiter:
+                await track.hr.update_delivery(key[0], key[1], {
+                    "driver_latitude": position[0],
+                    "driver_longitude": position[1],
+                })
+            track.sent = position
+            self.sent += 1
+        except Exception as exc:
+            track.dirty = True   # retried on the next tick
+            self.failed += 1
+            logger.warning("Driver location flush for order %s failed: %s", key[1], exc)
+        finally:
+            self._inflight.discard(key)
+
+    async def flush_all(self) -> None:
+        """Send every pending fix now and drop tracks that have gone quiet."""
+        await asyncio.gather(*(self._flush(key) for key, t in list(self._tracks.items()) if t.dirty))
+        cutoff = time.monotonic() - self.idle_ttl
+        for key, track in list(self._tracks.items()):
+            if not track.dirty and track.updated_at < cutoff:
+                del self._tracks[key]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush_all()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the ticker and flush, so the last known positions reach HubRise."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._tracks),
+            "pending": sum(1 for t in self._tracks.values() if t.dirty),
+            "received": self.received,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+driver_locations = DriverLocationCoalescer()
@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, DefaultDict, Dict, Iterator, Mapping, Set
+
+from app.core.config import settings
+
+
+def order_topic(order_id: str) -> str:
+    return f"order:{order_id}"
+
+
+def location_topic(location_id: str) -> str:
+    return f"location:{location_id}"
+
+
+def encode_sse(event: str, data: Mapping[str, Any], event_id: int) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    """
+    One watcher's buffer. Bounded: when a slow client falls `maxsize` frames
+    behind, the oldest frame is dropped (the gap shows in the event ids).
+    """
+
+    def __init__(self, topic: str, maxsize: int):
+        self.topic = topic
+        self._queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, frame: bytes) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(frame)
+
+    async def get(self) -> bytes:
+        return await self._queue.get()
+
+
+class EventBroker:
+    """
+    In-process pub/sub keyed by topic. A published event is encoded once and
+    the same frame is pushed to every subscriber of the topic.
+    """
+
+    def __init__(self, buffer: int = settings.EVENTS_SUBSCRIBER_BUFFER):
+        self.buffer = buffer
+        self._topics: DefaultDict[str, Set[Subscription]] = defaultdict(set)
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+
+    @contextmanager
+    def subscribe(self, topic: str) -> Iterator[Subscription]:
+        sub = Subscription(topic, self.buffer)
+        self._topics[topic].add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self._topics.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[topic]
+
+    def publish(self, topic: str, event: str, data: Mapping[str, Any]) -> int:
+        """Push `event` to the topic's subscribers; returns how many received it."""
+        self.published += 1
+        subs = self._topics.get(topic)
+        if not subs:
+            return 0
+        frame = encode_sse(event, data, next(self._ids))
+        for sub in subs:
+            sub.push(frame)
+        self.delivered += len(subs)
+        return len(subs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+event_broker = EventBroker()
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used with a different request body."""
+
+
+def fingerprint(body: Any) -> str:
+    return hashlib.blake2b(json.dumps(body, sort_keys=True, separators=(",", ":")).encode(),
+                           digest_size=16).hexdigest()
+
+
+def idempotency_key(header: Optional[str], body: Dict[str, Any]) -> Optional[str]:
+    """The client's Idempotency-Key, else the order's private_ref; None if neither is set."""
+    if header and header.strip():
+        return "key:" + header.strip()
+    if body.get("private_ref"):
+        return "private_ref:" + str(body["private_ref"])
+    return None
+
+
+class IdempotencyStore:
+    """
+    Remembers the outcome of non-idempotent writes by key.
+
+    - a key seen within `ttl` replays the stored result without calling `fn`
+    - a key whose first request is still running waits for that request
+    - failures are not stored, so the client can retry them
+    - reusing a key with a different body raises IdempotencyConflict
+
+    Entries live in this process only; multi-worker deployments replay per worker.
+    """
+
+    def __init__(self, ttl: float = settings.IDEMPOTENCY_TTL_SECONDS,
+                 maxsize: int = settings.IDEMPOTENCY_MAX_ENTRIES):
+        self._done: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, Tuple[str, "asyncio.Task[Any]"]] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, body_fingerprint: str,
+                  fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of `fn` for `key`, and whether it was served from an earlier request."""
+        done = self._done.get(key)
+        if done is not None:
+            if done[0] != body_fingerprint:
+                raise IdempotencyConflict(key)
+            self.replayed += 1
+            return done[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            if inflight[0] != body_fingerprint:
+                raise IdempotencyConflict(key)
+            self.coalesced += 1
+            return await asyncio.shield(inflight[1]), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = (body_fingerprint, task)
+        task.add_done_callback(lambda t: self._settle(key, body_fingerprint, t))
+        self.executed += 1
+        return await asyncio.shield(task), False
+
+    def _settle(self, key: Hashable, body_fingerprint: str, task: "asyncio.Task[Any]") -> None:
+        entry = self._inflight.get(key)
+        if entry is not None and entry[1] is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self._done[key] = (body_fingerprint, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._done),
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+        }
+
+
+idempotency_store = IdempotencyStore()
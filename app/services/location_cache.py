@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from cachetools import LRUCache
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WEEK = 7 * 24 * 60
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.strip().split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _zone(value: Any) -> ZoneInfo:
+    # HubRise sends {"name": "Europe/London", "offset": 3600}
+    name = value.get("name") if isinstance(value, Mapping) else value
+    try:
+        return ZoneInfo(name) if name else ZoneInfo("UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown location timezone %r, using UTC", name)
+        return ZoneInfo("UTC")
+
+
+@dataclass(frozen=True)
+class OpeningSchedule:
+    """
+    Weekly opening hours as sorted, non-overlapping [start, end) intervals
+    in minutes since Monday 00:00 local time, so "open at t?" is one binary
+    search. Slots ending at or before their start run past midnight.
+    """
+    tz: ZoneInfo
+    starts: Tuple[int, ...]
+    ends: Tuple[int, ...]
+
+    @classmethod
+    def compile(cls, opening_hours: Optional[Mapping[str, Any]], tz: ZoneInfo) -> "OpeningSchedule":
+        intervals: List[Tuple[int, int]] = []
+        for day, slots in (opening_hours or {}).items():
+            if day not in DAYS:
+                continue
+            base = DAYS.index(day) * 1440
+            for slot in slots or ():
+                try:
+                    start, end = _minutes(slot["from"]), _minutes(slot["to"])
+                except (KeyError, ValueError, AttributeError):
+                    logger.warning("Ignoring malformed opening slot %r", slot)
+                    continue
+                if end <= start:
+                    end += 1440
+                start, end = base + start, base + end
+                if end > _WEEK:   # Sunday night into Monday morning
+                    intervals.append((0, end - _WEEK))
+                    end = _WEEK
+                intervals.append((start, end))
+
+        merged: List[List[int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return cls(tz=tz, starts=tuple(s for s, _ in merged), ends=tuple(e for _, e in merged))
+
+    def _minute_of_week(self, at: datetime) -> Tuple[datetime, int]:
+        local = at.astimezone(self.tz)
+        return local, local.weekday() * 1440 + local.hour * 60 + local.minute
+
+    def is_open(self, at: datetime) -> bool:
+        _, m = self._minute_of_week(at)
+        i = bisect_right(self.starts, m) - 1
+        return i >= 0 and m < self.ends[i]
+
+    def next_change(self, at: datetime) -> Optional[datetime]:
+        """When the location next opens or closes; None if it's never open."""
+        if not self.starts:
+            return None
+        local, m = self._minute_of_week(at)
+        i = bisect_right(self.starts, m) - 1
+        if i >= 0 and m < self.ends[i]:
+            target = self.ends[i]
+            # closing at the end of Sunday may run straight into Monday's first slot
+            if target == _WEEK and self.starts[0] == 0:
+                target = _WEEK + self.ends[0]
+        else:
+            target = self.starts[i + 1] if i + 1 < len(self.starts) else _WEEK + self.starts[0]
+        week_start = (local - timedelta(minutes=m, seconds=local.second, microseconds=local.microsecond))
+        naive = week_start.replace(tzinfo=None) + timedelta(minutes=target)
+        return naive.replace(tzinfo=self.tz).astimezone(timezone.utc)
+
+
+@dataclass(frozen=True)
+class LocationEntry:
+    location_id: str
+    location: Dict[str, Any]
+    schedule: OpeningSchedule
+    fetched_at: float
+
+    def status(self, at: datetime) -> Dict[str, Any]:
+        next_change = self.schedule.next_change(at)
+        return {
+            "location_id": self.location_id,
+            "open": self.schedule.is_open(at),
+            "next_change": next_change.isoformat() if next_change else None,
+            "timezone": self.schedule.tz.key,
+        }
+
+
+class LocationCache:
+    """
+    HubRise location objects per location_id, with their opening hours
+    compiled, served stale-while-revalidate like the catalog cache:
+    fresh entries without an upstream call, stale ones while one background
+    get_location refreshes them, expired or missing ones after a fetch.
+    Entries are per (access token, location_id): HubRise checked that token
+    for that location when it was fetched, so a cached location is never
+    handed to a caller whose token can't read it. Location update
+    callbacks invalidate every entry for the location.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.LOCATION_CACHE_TTL_SECONDS,
+        max_stale: float = settings.LOCATION_CACHE_MAX_STALE_SECONDS,
+        maxsize: int = 1024,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self._refreshing: Dict[Tuple[str, str], "asyncio.Task[LocationEntry]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+
+    def store(self, access_token: str, location: Dict[str, Any]) -> LocationEntry:
+        entry = LocationEntry(
+            location_id=location["id"],
+            location=location,
+            schedule=OpeningSchedule.compile(location.get("opening_hours"), _zone(location.get("timezone"))),
+            fetched_at=time.monotonic(),
+        )
+        self._entries[(access_token, entry.location_id)] = entry
+        return entry
+
+    async def get(self, hr: HubRiseClient, location_id: str) -> LocationEntry:
+        key = (hr.access_token, location_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl + self.max_stale:
+                self.hits += 1
+                if age >= self.ttl:
+                    self._refresh(hr, key)   # background; stale entry served meanwhile
+                return entry
+        self.misses += 1
+        return await asyncio.shield(self._refresh(hr, key))
+
+    async def get_many(self, hr: HubRiseClient, location_ids: List[str]) -> Dict[str, Any]:
+        """Entries by id; locations that couldn't be fetched map to the exception."""
+        results = await asyncio.gather(*(self.get(hr, i) for i in location_ids), return_exceptions=True)
+        return dict(zip(location_ids, results))
+
+    def invalidate(self, location_id: str) -> None:
+        for key in [k for k in self._entries.keys() if k[1] == location_id]:
+            self._entries[key] = replace(self._entries[key], fetched_at=float("-inf"))
+
+    def _refresh(self, hr: HubRiseClient, key: Tuple[str, str]) -> "asyncio.Task[LocationEntry]":
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(hr, key[1]))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda t: self._refresh_done(key, t))
+        return task
+
+    def _refresh_done(self, key: Tuple[str, str], task: "asyncio.Task[LocationEntry]") -> None:
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Location %s refresh failed: %s", key[1], task.exception())
+
+    async def _fetch(self, hr: HubRiseClient, location_id: str) -> LocationEntry:
+        location = await hr.get_location(location_id)
+        self.fetched += 1
+        return self.store(hr.access_token, {**location, "id": location.get("id") or location_id})
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "fetched": self.fetched}
+
+
+location_cache = LocationCache()
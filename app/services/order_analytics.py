@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.schemas.orders import OrderStatus
+from app.services.order_fanout import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+_STATUSES = [s.value for s in OrderStatus]
+_STATUS_CODE = {s: i for i, s in enumerate(_STATUSES)}
+_UNKNOWN_STATUS = len(_STATUSES)
+# indexed by status code: does an order in this status count as a sale?
+_IS_SALE = np.array([s not in ("rejected", "cancelled", "delivery_failed") for s in _STATUSES] + [True])
+
+
+@lru_cache(maxsize=8192)
+def pence(value: Optional[str]) -> int:
+    """ "8.50 GBP" -> 850. Missing or unparsable amounts count as 0."""
+    if not value:
+        return 0
+    try:
+        return int((Decimal(value.split()[0]) * 100).to_integral_value())
+    except (InvalidOperation, IndexError):
+        return 0
+
+
+def _quantity(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class _Column:
+    """Growable NumPy array (amortised doubling); `view` is the filled part."""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    def extend(self, values: List[Any]) -> None:
+        end = self.size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self.size] = self.view
+            self._data = grown
+        self._data[self.size:end] = values
+        self.size = end
+
+    def keep(self, mask: np.ndarray) -> None:
+        kept = self.view[mask]
+        self._data = np.empty(max(1024, 2 * len(kept)), dtype=self._data.dtype)
+        self._data[:len(kept)] = kept
+        self.size = len(kept)
+
+
+class LocationOrders:
+    """
+    One location's orders as columns. Order columns hold one entry per
+    order (creation time, total in pence, status code); item columns one
+    entry per item line (owning order row, product code, quantity, sales in
+    pence). A re-ingested order is updated in place and its previous item
+    lines are marked dead; compaction drops dead lines and orders that left
+    the retention window.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.created = _Column(np.int64)       # epoch seconds
+        self.total = _Column(np.int64)         # pence
+        self.status = _Column(np.int8)
+        self.item_span: List[Tuple[int, int]] = []   # per order row: its item lines [start, end)
+
+        self.item_order = _Column(np.int32)
+        self.item_product = _Column(np.int32)
+        self.item_quantity = _Column(np.float64)
+        self.item_sales = _Column(np.int64)
+        self.item_alive = _Column(np.bool_)
+        self.dead_items = 0
+
+        self.products: Dict[str, int] = {}
+        self.product_names: List[str] = []
+
+        self.currency = "GBP"                  # taken from the order totals
+        self.high_water: Optional[datetime] = None
+        self.synced_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _product(self, name: str) -> int:
+        code = self.products.get(name)
+        if code is None:
+            code = self.products[name] = len(self.product_names)
+            self.product_names.append(name)
+        return code
+
+    def _add_items(self, row: int, items: Iterable[Mapping[str, Any]]) -> Tuple[int, int]:
+        start = self.item_order.size
+        products, quantities, sales = [], [], []
+        for item in items:
+            if item.get("deleted"):
+                continue
+            quantity = _quantity(item.get("quantity", 1))
+            products.append(self._product(item.get("product_name") or "?"))
+            quantities.append(quantity)
+            sales.append(pence(item.get("subtotal")) if item.get("subtotal")
+                         else round(pence(item.get("price")) * quantity))
+        if products:
+            self.item_order.extend([row] * len(products))
+            self.item_product.extend(products)
+            self.item_quantity.extend(quantities)
+            self.item_sales.extend(sales)
+            self.item_alive.extend([True] * len(products))
+        return start, start + len(products)
+
+    def ingest(self, orders: Iterable[Mapping[str, Any]]) -> int:
+        added = 0
+        for order in orders:
+            created = parse_timestamp(order.get("created_at"))
+            if not order.get("id") or created is None:
+                continue
+            if self.high_water is None or created > self.high_water:
+                self.high_water = created
+            status = _STATUS_CODE.get(order.get("status"), _UNKNOWN_STATUS)
+            total = order.get("total")
+            if total and len(total.split()) == 2:
+                self.currency = total.split()[1]
+            row = self.rows.get(order["id"])
+            if row is None:
+                row = self.rows[order["id"]] = len(self.ids)
+                self.ids.append(order["id"])
+                self.created.extend([int(created.timestamp())])
+                self.total.extend([pence(order.get("total"))])
+                self.status.extend([status])
+                self.item_span.append(self._add_items(row, order.get("items") or ()))
+                added += 1
+                continue
+            self.status.view[row] = status
+            if order.get("total") is not None:
+                self.total.view[row] = pence(order["total"])
+            # status-only updates (e.g. some callbacks) leave the items alone
+            if "items" in order:
+                start, end = self.item_span[row]
+                self.item_alive.view[start:end] = False
+                self.dead_items += end - start
+                self.item_span[row] = self._add_items(row, order.get("items") or ())
+        return added
+
+    def compact(self, cutoff: int) -> None:
+        """Drop dead item lines and orders created before `cutoff` (epoch seconds)."""
+        keep = self.created.view >= cutoff
+        new_row = np.cumsum(keep) - 1
+        item_keep = self.item_alive.view & keep[self.item_order.view]
+
+        for col in (self.created, self.total, self.status):
+            col.keep(keep)
+        self.ids = [order_id for order_id, k in zip(self.ids, keep.tolist()) if k]
+        self.rows = {order_id: i for i, order_id in enumerate(self.ids)}
+
+        remapped = new_row[self.item_order.view[item_keep]]
+        for col in (self.item_product, self.item_quantity, self.item_sales, self.item_alive):
+            col.keep(item_keep)
+        self.item_order.keep(item_keep)
+        self.item_order.view[:] = remapped
+        self.dead_items = 0
+
+        # each order's live lines are still contiguous
+        self.item_span = [(0, 0)] * len(self.ids)
+        rows, starts, counts = np.unique(remapped, return_index=True, return_counts=True)
+        for r, s, c in zip(rows.tolist(), starts.tolist(), counts.tolist()):
+            self.item_span[r] = (s, s + c)
+
+    # --- queries (vectorised over the columns)
+
+    def order_mask(self, start: int, end: int) -> np.ndarray:
+        created = self.created.view
+        return (created >= start) & (created < end) & _IS_SALE[self.status.view]
+
+    def item_mask(self, orders: np.ndarray) -> np.ndarray:
+        return self.item_alive.view & orders[self.item_order.view]
+
+
+def _money(amount_pence: float, currency: str) -> str:
+    return f"{Decimal(int(round(amount_pence))) / 100:.2f} {currency}"
+
+
+class OrderAnalytics:
+    """
+    Per-location columnar order store for dashboard aggregates.
+
+    A location is backfilled with `window_days` of orders on first use, then
+    topped up incrementally (orders created after its high water mark, less
+    `resync_window`) whenever it's older than `max_staleness`; order
+    callbacks are applied as they arrive. Only sales count: rejected,
+    cancelled and failed-delivery orders are excluded.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_days: int = settings.ANALYTICS_WINDOW_DAYS,
+        max_staleness: float = settings.ANALYTICS_MAX_STALENESS_SECONDS,
+        resync_window: float = 3600,
+    ):
+        self.window_days = window_days
+        self.max_staleness = max_staleness
+        self.resync_window = resync_window
+        self._locations: Dict[str, LocationOrders] = {}
+
+    def ingest(self, location_id: str, orders: Iterable[Mapping[str, Any]]) -> int:
+        """Apply orders to a location already being tracked (others are backfilled on first use)."""
+        loc = self._locations.get(location_id)
+        if loc is None:
+            return 0
+        added = loc.ingest(orders)
+        self._maybe_compact(loc)
+        return added
+
+    def _cutoff(self) -> int:
+        return int(time.time()) - self.window_days * 86400
+
+    def _maybe_compact(self, loc: LocationOrders) -> None:
+        live_items = loc.item_order.size - loc.dead_items
+        expired = len(loc) and int(loc.created.view.min()) < self._cutoff() - 86400
+        if loc.dead_items > max(1024, live_items) or expired:
+            loc.compact(self._cutoff())
+
+    async def location(self, hr: HubRiseClient, location_id: str) -> LocationOrders:
+        """The location's columns, synced first if stale."""
+        loc = self._locations.get(location_id)
+        if loc is None:
+            loc = self._locations.setdefault(location_id, LocationOrders())
+        if loc.synced_at is not None and time.monotonic() - loc.synced_at < self.max_staleness:
+            return loc
+        async with loc.lock:
+            if loc.synced_at is not None and time.monotonic() - loc.synced_at < self.max_staleness:
+                return loc
+            if loc.high_water is not None:
+                after = loc.high_water - timedelta(seconds=self.resync_window)
+            else:
+                after = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+            try:
+                async for page in hr.iter_order_pages(location_id=location_id, params={"after": after.isoformat()}):
+                    loc.ingest(page)
+            except Exception:
+                if loc.synced_at is None:
+                    raise
+                logger.warning("Analytics sync for location %s failed; serving stale data", location_id,
+                               exc_info=True)
+                return loc
+            loc.synced_at = time.monotonic()
+            self._maybe_compact(loc)
+        return loc
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            loc_id: {"orders": len(loc), "item_lines": loc.item_order.size - loc.dead_items,
+                     "products": len(loc.product_names)}
+            for loc_id, loc in self._locations.items()
+        }
+
+
+def sales_by_interval(loc: LocationOrders, start: datetime, end: datetime,
+                      interval: str = "hour", tz: str = "UTC") -> List[Dict[str, Any]]:
+    """
+    Orders and sales per hour (or local day) in [start, end), including
+    empty buckets. Hours are bucketed on the UTC clock and labelled in `tz`.
+    """
+    zone = ZoneInfo(tz)
+    first, last = int(start.timestamp()) // 3600, (int(end.timestamp()) - 1) // 3600
+    mask = loc.order_mask(first * 3600, (last + 1) * 3600)
+    hours = loc.created.view[mask] // 3600 - first
+    count = np.bincount(hours, minlength=last - first + 1)
+    sales = np.bincount(hours, weights=loc.total.view[mask], minlength=last - first + 1)
+
+    labels = [datetime.fromtimestamp((first + h) * 3600, zone) for h in range(last - first + 1)]
+    if interval == "hour":
+        return [{"start": label.isoformat(), "orders": int(n), "sales": _money(s, loc.currency)}
+                for label, n, s in zip(labels, count.tolist(), sales.tolist())]
+
+    days: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+    for label, n, s in zip(labels, count.tolist(), sales.tolist()):
+        day = days[label.date().isoformat()]
+        day[0] += n
+        day[1] += s
+    return [{"start": day, "orders": int(n), "sales": _money(s, loc.currency)} for day, (n, s) in days.items()]
+
+
+def basket_summary(loc: LocationOrders, start: datetime, end: datetime) -> Dict[str, Any]:
+    mask = loc.order_mask(int(start.timestamp()), int(end.timestamp()))
+    orders = int(mask.sum())
+    sales = int(loc.total.view[mask].sum())
+    items = float(loc.item_quantity.view[loc.item_mask(mask)].sum())
+    return {
+        "orders": orders,
+        "sales": _money(sales, loc.currency),
+        "average_basket": _money(sales / orders, loc.currency) if orders else None,
+        "average_items": round(items / orders, 2) if orders else None,
+    }
+
+
+def top_items(loc: LocationOrders, start: datetime, end: datetime,
+              limit: int = 10, by: str = "quantity") -> List[Dict[str, Any]]:
+    """Best-selling products in [start, end), ranked by quantity sold or sales."""
+    items = loc.item_mask(loc.order_mask(int(start.timestamp()), int(end.timestamp())))
+    products = loc.item_product.view[items]
+    n = len(loc.product_names)
+    quantity = np.bincount(products, weights=loc.item_quantity.view[items], minlength=n)
+    sales = np.bincount(products, weights=loc.item_sales.view[items], minlength=n)
+    rank = quantity if by == "quantity" else sales
+    k = min(limit, int((rank > 0).sum()))
+    if k == 0:
+        return []
+    best = np.argpartition(-rank, k - 1)[:k]
+    best = best[np.lexsort((best, -rank[best]))]
+    return [{"product_name": loc.product_names[i], "quantity": round(float(quantity[i]), 3),
+             "sales": _money(sales[i], loc.currency)} for i in best.tolist()]
+
+
+order_analytics = OrderAnalytics()
@@ -0,0 +1,221 @@
+import csv
+import io
+import json
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from app.clients.hubrise import HubRiseClient
+from app.services.order_store import order_store
+
+_CENT = Decimal("0.01")
+_MILLI = Decimal("0.001")
+
+# One row per order line (item, option, charge, discount, payment), each
+# carrying its order's columns; orders without lines get a single "order" row.
+# An item's `amount` is its HubRise subtotal, options included; option rows
+# are per unit of their item (`parent_line_no`). Discounts are negative.
+COLUMNS: Tuple[str, ...] = (
+    "order_id", "location_id", "created_at", "status", "service_type", "private_ref", "customer_id",
+    "order_total", "currency",
+    "line_type", "line_no", "parent_line_no", "name", "sku_name", "ref", "quantity", "unit_price", "amount",
+)
+
+Row = Tuple[Any, ...]
+
+
+def _money(v: Any) -> Tuple[Optional[Decimal], Optional[str]]:
+    """ "8.50 GBP" -> (Decimal("8.50"), "GBP"); unparsable amounts export as empty."""
+    if v is None:
+        return None, None
+    parts = str(v).split()
+    try:
+        amount = Decimal(parts[0]).quantize(_CENT, ROUND_HALF_UP)
+    except (InvalidOperation, IndexError):
+        return None, None
+    return amount, parts[1] if len(parts) > 1 else None
+
+
+def _quantity(v: Any) -> Optional[Decimal]:
+    if v is None:
+        return None
+    try:
+        q = Decimal(str(v))
+    except InvalidOperation:
+        return None
+    return q.quantize(_MILLI, ROUND_HALF_UP) if q.as_tuple().exponent < -3 else q
+
+
+def flatten_order(order: Dict[str, Any]) -> Iterator[Row]:
+    total, currency = _money(order.get("total"))
+    head = (
+        order.get("id"), order.get("location_id"), order.get("created_at"), order.get("status"),
+        order.get("service_type"), order.get("private_ref"), order.get("customer_id"),
+        total, currency,
+    )
+    emitted = False
+
+    for i, item in enumerate(order.get("items") or ()):
+        if item.get("deleted"):
+            continue
+        emitted = True
+        price, _ = _money(item.get("price"))
+        subtotal, _ = _money(item.get("subtotal"))
+        yield head + ("item", i, None, item.get("product_name"), item.get("sku_name"), item.get("sku_ref"),
+                      _quantity(item.get("quantity")), price, subtotal)
+        for j, op in enumerate(item.get("options") or ()):
+            if op.get("removed"):
+                continue
+            op_price, _ = _money(op.get("price"))
+            op_quantity = _quantity(op.get("quantity", 1))
+            amount = op_price * op_quantity if op_price is not None and op_quantity is not None else None
+            yield head + ("option", j, i, op.get("name"), None, op.get("ref"), op_quantity, op_price, amount)
+
+    for line_type, key, field, sign in (("charge", "charges", "price", 1), ("discount", "discounts", "price_off", -1),
+                                        ("payment", "payments", "amount", 1)):
+        for i, line in enumerate(order.get(key) or ()):
+            if line.get("deleted"):
+                continue
+            emitted = True
+            amount, _ = _money(line.get(field))
+            yield head + (line_type, i, None, line.get("name"), None, line.get("ref"), None, None,
+                          None if amount is None else sign * amount)
+
+    if not emitted:
+        yield head + ("order",) + (None,) * (len(COLUMNS) - len(head) - 1)
+
+
+class CsvExport:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self):
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf, lineterminator="\n")
+        self._writer.writerow(COLUMNS)
+
+    def _drain(self) -> bytes:
+        data = self._buf.getvalue().encode()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
+
+    def write(self, rows: List[Row]) -> bytes:
+        self._writer.writerows(rows)
+        return self._drain()
+
+    def close(self) -> bytes:
+        return self._drain()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands out what was written since the last take()."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetExport:
+    """One row group per batch; needs the optional pyarrow dependency."""
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install 'hutbite-integrations[export]')")
+        self._pa = pa
+        money, text = pa.decimal128(18, 2), pa.string()
+        self._types = {
+            "created_at": pa.timestamp("us", tz="UTC"), "order_total": money, "unit_price": money, "amount": money,
+            "line_no": pa.int32(), "parent_line_no": pa.int32(), "quantity": pa.decimal128(18, 3),
+        }
+        self._schema = pa.schema([(c, self._types.get(c, text)) for c in COLUMNS])
+        self._sink = _Drain()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def write(self, rows: List[Row]) -> bytes:
+        pa = self._pa
+        arrays = []
+        for i, (name, column) in enumerate(zip(COLUMNS, zip(*rows))):
+            if name == "created_at":
+                # ISO 8601 with offset, converted to UTC
+                arrays.append(pa.array(column, pa.string()).cast(self._schema.field(i).type))
+            else:
+                arrays.append(pa.array(column, self._schema.field(i).type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+EXPORT_FORMATS = {"csv": CsvExport, "parquet": ParquetExport}
+
+
+async def _parse_pages(pages: AsyncIterator[List[str]]) -> AsyncIterator[List[Dict[str, Any]]]:
+    async for page in pages:
+        yield [json.loads(raw) for raw in page]
+
+
+async def order_pages(hr: HubRiseClient, location_id: str, params: Mapping[str, str],
+                      source: str = "auto") -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Pages of orders to export: from the order mirror when `source` allows
+    and it can answer the range, else from HubRise. LookupError when
+    `source="mirror"` and the mirror can't.
+    """
+    if source != "hubrise" and order_store.enabled:
+        raw_pages = await order_store.iter_raw_pages(hr, location_id, params)
+        if raw_pages is not None:
+            return _parse_pages(raw_pages)
+    if source == "mirror":
+        raise LookupError("Order mirror can't serve this range; set `after` within the mirrored history")
+    return hr.iter_order_pages(location_id=location_id, params=params)
+
+
+def open_export(fmt: str) -> Union[CsvExport, ParquetExport]:
+    """A fresh writer for `fmt`; RuntimeError if its dependency is missing."""
+    return EXPORT_FORMATS[fmt]()
+
+
+async def export_orders(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    export: Union[CsvExport, ParquetExport],
+    batch_rows: int = 10000,
+) -> AsyncIterator[bytes]:
+    """
+    Encoded export chunks, written as order pages arrive. At most one batch
+    of rows (plus the page being read) is held, whatever the export size.
+    """
+    batch: List[Row] = []
+    async for page in pages:
+        for order in page:
+            batch.extend(flatten_order(order))
+        if len(batch) >= batch_rows:
+            chunk = export.write(batch)
+            batch = []
+            if chunk:
+                yield chunk
+    if batch:
+        yield export.write(batch)
+    yield export.close()
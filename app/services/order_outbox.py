@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+import httpx
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.clients.hubrise import _SAFE_WRITE_ERRORS, _SAFE_WRITE_STATUSES, HubRiseClient
+from app.core.config import settings
+from app.core.db import engine
+from app.models.outbox import OrderSubmission
+from app.services.events import event_broker, location_topic
+from app.services.order_store import order_store
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def submission_topic(submission_id: str) -> str:
+    return f"submission:{submission_id}"
+
+
+def submission_view(row: OrderSubmission) -> Dict[str, Any]:
+    """What clients see of a submission (never the token or the payload)."""
+    return {
+        "submission_id": row.id,
+        "status": row.status,
+        "attempts": row.attempts,
+        "last_error": row.last_error,
+        "order_id": row.hubrise_order_id,
+        "order": json.loads(row.response) if row.response else None,
+    }
+
+
+def _retryable(exc: Exception) -> bool:
+    """HubRise can't have created the order: same rule as HubRiseClient.create_order."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _SAFE_WRITE_STATUSES
+    return isinstance(exc, _SAFE_WRITE_ERRORS)
+
+
+def _ambiguous(exc: Exception) -> bool:
+    """HubRise may have created the order anyway (5xx, or the request was sent and then lost)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, _SAFE_WRITE_ERRORS)
+
+
+def callback_allowed(url: str) -> bool:
+    """Only POST outcomes to hosts in ORDER_CALLBACK_ALLOWED_HOSTS (never to internal addresses)."""
+    parsed = httpx.URL(url)
+    host = (parsed.host or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    for allowed in settings.ORDER_CALLBACK_ALLOWED_HOSTS:
+        allowed = allowed.lower()
+        if host == allowed or (allowed.startswith("*.") and host.endswith(allowed[1:])):
+            return True
+    return False
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HubRise {exc.response.status_code}: {exc.response.text[:500]}"
+    return str(exc) or type(exc).__name__
+
+
+class OrderOutbox:
+    """
+    Durable queue of orders to create in HubRise.
+
+    `enqueue` commits the normalised payload to the order_outbox table and
+    returns at once; worker tasks claim due rows, submit them, and retry
+    429s and connections that were never established with capped
+    exponential backoff. A 5xx or a request lost after it was sent may still
+    have created the order, so it is never resent: the row goes to
+    `reconcile` for someone to check against HubRise. Each outcome
+    is published on the submission's event topic (and its location's) and,
+    if the client gave one, POSTed to its callback URL.
+
+    Claimed rows record which outbox instance holds them and since when;
+    several processes can share the table, so a row is only treated as
+    interrupted once its claim is older than `lease` seconds.
+    """
+
+    def __init__(
+        self,
+        bind: Engine = engine,
+        *,
+        workers: int = settings.ORDER_OUTBOX_WORKERS,
+        max_attempts: int = settings.ORDER_OUTBOX_MAX_ATTEMPTS,
+        poll_interval: float = settings.ORDER_OUTBOX_POLL_SECONDS,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        lease: float = settings.ORDER_OUTBOX_LEASE_SECONDS,
+    ):
+        self.bind = bind
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._swept_at = float("-inf")
+        self._wake = asyncio.Event()
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._stopping = False
+        self._http: Optional[httpx.AsyncClient] = None
+
+    # --- database (blocking; always called through the threadpool)
+
+    def _insert(self, row: OrderSubmission) -> OrderSubmission:
+        with Session(self.bind) as session:
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+            return row
+
+    def _get(self, submission_id: str) -> Optional[OrderSubmission]:
+        with Session(self.bind) as session:
+            return session.get(OrderSubmission, submission_id)
+
+    def _claim_next(self) -> Optional[OrderSubmission]:
+        """Move the most overdue pending row to `submitting`; None when nothing is due."""
+        with Session(self.bind) as session:
+            while True:
+                row = session.exec(
+                    select(OrderSubmission)
+                    .where(OrderSubmission.status == "pending", OrderSubmission.next_attempt_at <= _now())
+                    .order_by(OrderSubmission.next_attempt_at)
+                    .limit(1)
+                ).first()
+                if row is None:
+                    return None
+                claimed = session.execute(
+                    update(OrderSubmission)
+                    .where(OrderSubmission.id == row.id, OrderSubmission.status == "pending")
+                    .values(status="submitting", attempts=row.attempts + 1,
+                            claimed_by=self.owner, claimed_at=_now(), updated_at=_now())
+                )
+                session.commit()
+                if claimed.rowcount == 1:
+                    session.refresh(row)
+                    return row
+
+    def _save(self, submission_id: str, **values: Any) -> OrderSubmission:
+        with Session(self.bind) as session:
+            row = session.get(OrderSubmission, submission_id)
+            for key, value in values.items():
+                setattr(row, key, value)
+            row.updated_at = _now()
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+            return row
+
+    def _flag_interrupted(self) -> int:
+        """
+        Rows left `submitting` by a crash may have reached HubRise: they go to
+        reconcile once their lease has run out (other processes' live claims
+        are left alone).
+        """
+        expired = _now() - timedelta(seconds=self.lease)
+        with Session(self.bind) as session:
+            result = session.execute(
+                update(OrderSubmission)
+                .where(OrderSubmission.status == "submitting",
+                       or_(OrderSubmission.claimed_at.is_(None), OrderSubmission.claimed_at < expired))
+                .values(status="reconcile", last_error="Interrupted during submission",
+                        access_token="", updated_at=_now())
+            )
+            session.commit()
+            return result.rowcount
+
+    # --- API
+
+    async def enqueue(self, location_id: str, access_token: str, body: Mapping[str, Any],
+                      callback_url: Optional[str] = None) -> OrderSubmission:
+        row = OrderSubmission(
+            id=uuid.uuid4().hex,
+            location_id=location_id,
+            access_token=access_token,
+            body=json.dumps(body, separators=(",", ":")),
+            callback_url=callback_url,
+        )
+        row = await run_in_threadpool(self._insert, row)
+        self._wake.set()
+        return row
+
+    async def get(self, submission_id: str) -> Optional[OrderSubmission]:
+        return await run_in_threadpool(self._get, submission_id)
+
+    # --- workers
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _submit(self, row: OrderSubmission) -> OrderSubmission:
+        hr = HubRiseClient(access_token=row.access_token, http=self._http)
+        try:
+            order = await hr.create_order(location_id=row.location_id, body=json.loads(row.body))
+        except Exception as exc:
+            error = _describe(exc)
+            if _retryable(exc) and row.attempts < self.max_attempts:
+                logger.warning("Order submission %s attempt %d failed, retrying: %s", row.id, row.attempts, error)
+                retry_at = _now() + timedelta(seconds=self._backoff(row.attempts))
+                return await run_in_threadpool(self._save, row.id, status="pending",
+                                               last_error=error, next_attempt_at=retry_at)
+            status = "reconcile" if _ambiguous(exc) else "failed"
+            logger.error("Order submission %s %s: %s", row.id,
+                         "outcome unknown, needs reconciling" if status == "reconcile" else "failed", error)
+            row = await run_in_threadpool(self._save, row.id, status=status, last_error=error, access_token="")
+            await self._notify(row)
+            return row
+
+        row = await run_in_threadpool(
+            self._save, row.id, status="submitted", last_error=None, access_token="",
+            hubrise_order_id=order.get("id"), response=json.dumps(order, separators=(",", ":")),
+        )
+        if order_store.enabled:
+            await order_store.upsert([order], row.location_id)
+        await self._notify(row)
+        return row
+
+    async def _notify(self, row: OrderSubmission) -> None:
+        view = submission_view(row)
+        event = f"submission.{row.status}"
+        event_broker.publish(submission_topic(row.id), event, view)
+        event_broker.publish(location_topic(row.location_id), event, view)
+        if row.callback_url and self._http is not None:
+            if not callback_allowed(row.callback_url):
+                logger.warning("Submission %s callback host not allowed: %s", row.id, row.callback_url)
+                return
+            try:
+                resp = await self._http.post(row.callback_url, json=view)
+                resp.raise_for_status()
+            except httpx.HTTPError as exc:
+                logger.warning("Submission %s callback to %s failed: %s", row.id, row.callback_url, exc)
+
+    async def _sweep(self) -> None:
+        """Flag expired claims, at most once per lease (at start, then from idle workers)."""
+        if time.monotonic() - self._swept_at < self.lease:
+            return
+        self._swept_at = time.monotonic()
+        interrupted = await run_in_threadpool(self._flag_interrupted)
+        if interrupted:
+            logger.warning("%d order submissions interrupted mid-submit need reconciling", interrupted)
+
+    async def run_once(self) -> Optional[OrderSubmission]:
+        """Claim and submit one due row, if any."""
+        row = await run_in_threadpool(self._claim_next)
+        if row is None:
+            return None
+        return await self._submit(row)
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                if await self.run_once() is not None:
+                    continue
+                await self._sweep()
+            except Exception:
+                logger.exception("Order outbox worker error")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def start(self, http: httpx.AsyncClient) -> None:
+        if self._tasks:
+            return
+        self._http = http
+        self._stopping = False
+        self._swept_at = float("-inf")
+        await self._sweep()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let in-flight submissions finish (up to `timeout`) so they aren't resent on restart."""
+        self._stopping = True
+        self._wake.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout) if self._tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+order_outbox = OrderOutbox()
@@ -0,0 +1,82 @@
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+_MONEY_WITH_CURRENCY = re.compile(r"^\s*-?\d+(?:\.\d{1,2})?\s+[A-Z]{3}\s*$")
+_CENT = Decimal("0.01")
+
+
+@lru_cache(maxsize=4096)
+def _format_money(s: str, currency: str) -> str:
+    if _MONEY_WITH_CURRENCY.match(s):
+        return s
+    try:
+        q = Decimal(s)
+    except InvalidOperation:
+        # pass through; HubRise will surface a precise error if bad
+        return s
+    return f"{q.quantize(_CENT)} {currency}"
+
+
+def format_money(v: Any, currency: str) -> Optional[str]:
+    """
+    "8.5" -> "8.50 GBP"; already formatted amounts pass through. Menus repeat
+    the same few prices, so results are cached per (string, currency).
+    """
+    if v is None:
+        return None
+    return _format_money(str(v).strip(), currency)
+
+
+def _items(items: Optional[List[Dict[str, Any]]], currency: str) -> Optional[List[Dict[str, Any]]]:
+    if not items:
+        return None
+    for it in items:
+        it["price"] = format_money(it.get("price"), currency)
+        if it.get("subtotal") is not None:
+            it["subtotal"] = format_money(it["subtotal"], currency)
+        quantity = it.get("quantity")
+        it["quantity"] = None if quantity is None else str(quantity)
+        options = it.get("options")
+        if options:
+            for op in options:
+                if op.get("price") is not None:
+                    op["price"] = format_money(op["price"], currency)
+                if op.get("quantity") is not None:
+                    # HubRise expects options.quantity as integer
+                    op["quantity"] = int(op["quantity"])
+        else:
+            it["options"] = None
+    return items
+
+
+def _amounts(lines: Optional[List[Dict[str, Any]]], field: str, currency: str) -> List[Dict[str, Any]]:
+    for line in lines or ():
+        line[field] = format_money(line.get(field), currency)
+    return lines or []
+
+
+def build_order_payload(model: BaseModel, currency: str) -> Dict[str, Any]:
+    """
+    HubRise payload for a validated OrderCreate/OrderPatch: pydantic's own
+    serializer produces fresh dicts, and money/quantity fields are formatted
+    in place in a single walk. Output matches the old dict-walking normaliser
+    (`legacy_normalise` in tests/test_order_payload.py) on
+    `jsonable_encoder(model, exclude_none=True)`.
+    """
+    b = model.model_dump(mode="json", exclude_none=True)
+    return normalise_payload(b, currency)
+
+
+def normalise_payload(b: Dict[str, Any], currency: str) -> Dict[str, Any]:
+    """Format a freshly built (owned, JSON-mode) order dict in place and return it."""
+    if b.get("total") is not None:
+        b["total"] = format_money(b["total"], currency)
+    b["items"] = _items(b.get("items"), currency)
+    b["charges"] = _amounts(b.get("charges"), "price", currency)
+    b["discounts"] = _amounts(b.get("discounts"), "price_off", currency)
+    b["payments"] = _amounts(b.get("payments"), "amount", currency) or None
+    return b
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.clients.hubrise import HubRiseClient, RawBody
+from app.core.config import settings
+from app.core.db import engine
+from app.models.order import MirroredOrder, OrderSyncState
+from app.services.order_fanout import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+_EQUALITY_FILTERS = ("status", "customer_id", "private_ref", "created_by")
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _to_row(order: Mapping[str, Any], location_id: str, now: datetime) -> Optional[MirroredOrder]:
+    created_at = parse_timestamp(order.get("created_at"))
+    if not order.get("id") or created_at is None:
+        return None
+    return MirroredOrder(
+        id=order["id"],
+        location_id=location_id,
+        status=order.get("status"),
+        created_at=_utc(created_at),
+        customer_id=order.get("customer_id"),
+        private_ref=order.get("private_ref"),
+        created_by=order.get("created_by"),
+        raw=json.dumps(order, separators=(",", ":")),
+        synced_at=now,
+    )
+
+
+def _json_array(rows: Iterable[MirroredOrder]) -> RawBody:
+    return RawBody(("[" + ",".join(row.raw for row in rows) + "]").encode(), "application/json")
+
+
+class OrderStore:
+    """
+    Local mirror of HubRise orders, kept current by incremental pulls.
+
+    Each sync asks HubRise only for orders created after the location's high
+    water mark (less `resync_window`, so recent orders pick up status changes).
+    Reads are served from the database while the location was synced within
+    `max_staleness`; a stale location is synced first, and when the mirror
+    can't answer (sync failed, history not mirrored) callers go upstream.
+
+    Status changes to orders older than `resync_window` only reach the mirror
+    through order callbacks, so status filters are answered locally only with
+    `live_updates` (order callbacks are actually being received).
+    """
+
+    def __init__(
+        self,
+        bind: Engine = engine,
+        *,
+        enabled: bool = settings.ORDER_MIRROR_ENABLED,
+        max_staleness: float = settings.ORDER_MIRROR_MAX_STALENESS_SECONDS,
+        backfill_days: int = settings.ORDER_MIRROR_BACKFILL_DAYS,
+        resync_window: float = 3600,
+        page_size: int = 100,
+        live_updates: bool = settings.ORDER_MIRROR_LIVE_UPDATES,
+    ):
+        self.bind = bind
+        self.enabled = enabled
+        self.max_staleness = max_staleness
+        self.backfill_days = backfill_days
+        self.resync_window = resync_window
+        self.page_size = page_size
+        self.live_updates = live_updates
+        self._syncing: Dict[str, "asyncio.Task[int]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.synced = 0   # orders pulled from HubRise by syncs
+
+    def _fresh(self, synced_at: Optional[datetime]) -> bool:
+        if synced_at is None:
+            return False
+        return (_now() - synced_at).total_seconds() < self.max_staleness
+
+    # --- database (blocking; always called through the threadpool)
+
+    def _upsert(self, orders: List[Mapping[str, Any]], location_id: Optional[str]) -> int:
+        now = _now()
+        written = 0
+        with Session(self.bind) as session:
+            for order in orders:
+                row = _to_row(order, location_id or order.get("location_id"), now)
+                if row is not None:
+                    session.merge(row)
+                    written += 1
+            session.commit()
+        return written
+
+    def _state(self, location_id: str) -> Optional[OrderSyncState]:
+        with Session(self.bind) as session:
+            return session.get(OrderSyncState, location_id)
+
+    def _mark_synced(self, location_id: str, covered_from: datetime,
+                     high_water: Optional[datetime], started: datetime) -> None:
+        with Session(self.bind) as session:
+            state = session.get(OrderSyncState, location_id) or OrderSyncState(location_id=location_id)
+            state.covered_from = min(filter(None, (state.covered_from, covered_from)))
+            state.high_water = high_water
+            state.synced_at = started
+            session.add(state)
+            session.commit()
+
+    def _get(self, order_id: str) -> Optional[MirroredOrder]:
+        with Session(self.bind) as session:
+            return session.get(MirroredOrder, order_id)
+
+    def _page(self, location_id: str, conditions: list, below: Optional[Tuple[datetime, str]],
+              limit: int) -> List[MirroredOrder]:
+        query = select(MirroredOrder).where(MirroredOrder.location_id == location_id, *conditions)
+        if below is not None:
+            created_at, order_id = below
+            query = query.where(or_(
+                MirroredOrder.created_at < created_at,
+                and_(MirroredOrder.created_at == created_at, MirroredOrder.id < order_id),
+            ))
+        query = query.order_by(MirroredOrder.created_at.desc(), MirroredOrder.id.desc()).limit(limit)
+        with Session(self.bind) as session:
+            return list(session.exec(query))
+
+    # --- sync
+
+    async def upsert(self, orders: Iterable[Mapping[str, Any]], location_id: Optional[str] = None) -> int:
+        """Write orders into the mirror (from a sync, an upstream read or a callback)."""
+        return await run_in_threadpool(self._upsert, list(orders), location_id)
+
+    async def sync(self, hr: HubRiseClient, location_id: str) -> int:
+        """Pull new and recently created orders; concurrent syncs of a location share one pull."""
+        task = self._syncing.get(location_id)
+        if task is None:
+            task = asyncio.ensure_future(self._sync(hr, location_id))
+            self._syncing[location_id] = task
+            task.add_done_callback(lambda t: self._syncing.pop(location_id, None))
+        return await asyncio.shield(task)
+
+    async def _sync(self, hr: HubRiseClient, location_id: str) -> int:
+        started = _now()
+        state = await run_in_threadpool(self._state, location_id)
+        backfill_from = started - timedelta(days=self.backfill_days)
+        high_water = state.high_water if state else None
+        since = high_water - timedelta(seconds=self.resync_window) if high_water else backfill_from
+
+        pulled = 0
+        params = {"after": since.isoformat()}
+        async for page in hr.iter_order_pages(location_id=location_id, params=params):
+            await self.upsert(page, location_id)
+            pulled += len(page)
+            for order in page:
+                created_at = parse_timestamp(order.get("created_at"))
+                if created_at is not None:
+                    created_at = _utc(created_at)
+                    high_water = max(high_water, created_at) if high_water else created_at
+
+        covered_from = state.covered_from if state and state.covered_from else backfill_from
+        await run_in_threadpool(self._mark_synced, location_id, covered_from, high_water, started)
+        self.synced += pulled
+        return pulled
+
+    async def _ready(self, hr: HubRiseClient, location_id: str) -> Optional[OrderSyncState]:
+        """The location's sync state once it is within the freshness bound, or None."""
+        state = await run_in_threadpool(self._state, location_id)
+        if state is not None and self._fresh(state.synced_at):
+            return state
+        try:
+            await self.sync(hr, location_id)
+        except httpx.HTTPError as exc:
+            logger.warning("Order mirror sync of %s failed: %s", location_id, exc)
+            return None
+        return await run_in_threadpool(self._state, location_id)
+
+    # --- reads
+
+    def _conditions(self, state: OrderSyncState, filters: Mapping[str, str],
+                    need_lower_bound: bool) -> Optional[list]:
+        """SQL conditions for `filters`, or None if the mirror can't answer them."""
+        conditions = []
+        for key, value in filters.items():
+            if key == "status" and not self.live_updates:
+                return None   # older orders' statuses may have moved on upstream
+            if key in _EQUALITY_FILTERS:
+                conditions.append(getattr(MirroredOrder, key) == value)
+            elif key in ("after", "before"):
+                ts = parse_timestamp(value)
+                if ts is None:
+                    return None
+                ts = _utc(ts)
+                if key == "after":
+                    if ts < state.covered_from:
+                        return None   # older than anything mirrored
+                    conditions.append(MirroredOrder.created_at >= ts)
+                else:
+                    conditions.append(MirroredOrder.created_at < ts)
+            else:
+                return None
+        if need_lower_bound and "after" not in filters:
+            return None
+        return conditions
+
+    async def retrieve_raw(self, hr: HubRiseClient, location_id: str, order_id: str) -> RawBody:
+        """One order: from the mirror if it was synced recently, else from HubRise (and mirrored)."""
+        row = await run_in_threadpool(self._get, order_id)
+        if row is not None and row.location_id == location_id and self._fresh(row.synced_at):
+            self.hits += 1
+            return RawBody(row.raw.encode(), "application/json")
+
+        self.misses += 1
+        body = await hr.retrieve_order_raw(location_id=location_id, order_id=order_id)
+        try:
+            await self.upsert([json.loads(body.content)], location_id)
+        except ValueError:
+            pass
+        return body
+
+    async def list_raw(self, hr: HubRiseClient, location_id: str,
+                       filters: Mapping[str, str]) -> Optional[RawBody]:
+        """
+        The newest page of matching orders, or None when the mirror can't
+        answer. Without an `after` filter the page must be full, since
+        anything older than the mirrored history would be missing.
+        """
+        state = await self._ready(hr, location_id)
+        conditions = self._conditions(state, filters, need_lower_bound=False) if state else None
+        if conditions is None:
+            self.misses += 1
+            return None
+        rows = await run_in_threadpool(self._page, location_id, conditions, None, self.page_size)
+        if "after" not in filters and len(rows) < self.page_size:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _json_array(rows)
+
+    async def iter_raw_pages(self, hr: HubRiseClient, location_id: str,
+                             filters: Mapping[str, str]) -> Optional[AsyncIterator[List[str]]]:
+        """
+        Every matching order, newest first, as pages of JSON strings; None
+        when the mirror can't answer (every page needs an `after` bound within
+        the mirrored history).
+        """
+        state = await self._ready(hr, location_id)
+        conditions = self._conditions(state, filters, need_lower_bound=True) if state else None
+        if conditions is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        async def pages() -> AsyncIterator[List[str]]:
+            below = None
+            while True:
+                rows = await run_in_threadpool(self._page, location_id, conditions, below, self.page_size)
+                if rows:
+                    yield [row.raw for row in rows]
+                if len(rows) < self.page_size:
+                    return
+                below = (rows[-1].created_at, rows[-1].id)
+
+        return pages()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "synced": self.synced,
+                "syncing": len(self._syncing)}
+
+
+order_store = OrderStore()
@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from app.services.catalog_index import CatalogIndex
+
+_CENT = Decimal("0.01")
+_ZERO = Decimal("0")
+
+
+def parse_money(v: Any) -> Tuple[Optional[Decimal], Optional[str]]:
+    """
+    "8.50 GBP" -> (Decimal("8.50"), "GBP"); "8.5" -> (Decimal("8.5"), None).
+    Raises ValueError for anything else.
+    """
+    if v is None:
+        return None, None
+    parts = str(v).split()
+    if not parts or len(parts) > 2:
+        raise ValueError(f"invalid amount {v!r}")
+    try:
+        amount = Decimal(parts[0])
+    except InvalidOperation:
+        raise ValueError(f"invalid amount {v!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount {v!r}")
+    return amount, parts[1] if len(parts) == 2 else None
+
+
+def money(amount: Decimal, currency: str) -> str:
+    return f"{amount.quantize(_CENT, ROUND_HALF_UP)} {currency}"
+
+
+@dataclass
+class PricedItem:
+    price: Decimal                  # unit price, options excluded
+    options: Decimal                # options per unit
+    quantity: Decimal
+    subtotal: Decimal
+
+
+@dataclass
+class PricedOrder:
+    currency: str
+    items: List[Optional[PricedItem]] = field(default_factory=list)   # None for deleted lines
+    charges: Decimal = _ZERO
+    discounts: Decimal = _ZERO
+    total: Decimal = _ZERO
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": money(self.total, self.currency),
+            "items": [
+                None if it is None else {
+                    "price": money(it.price, self.currency),
+                    "options": money(it.options, self.currency),
+                    "subtotal": money(it.subtotal, self.currency),
+                }
+                for it in self.items
+            ],
+            "charges": money(self.charges, self.currency),
+            "discounts": money(self.discounts, self.currency),
+            "errors": self.errors,
+            "warnings": self.warnings,
+        }
+
+    def fill(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the computed item prices, subtotals and total into `body` (in place)."""
+        for line, priced in zip(body.get("items") or (), self.items):
+            if priced is not None:
+                line["price"] = money(priced.price, self.currency)
+                line["subtotal"] = money(priced.subtotal, self.currency)
+        body["total"] = money(self.total, self.currency)
+        return body
+
+
+class _Pricer:
+    def __init__(self, currency: str, idx: Optional[CatalogIndex]):
+        self.currency = currency
+        self.idx = idx
+        self.order = PricedOrder(currency=currency)
+
+    def amount(self, v: Any, where: str) -> Optional[Decimal]:
+        try:
+            amount, currency = parse_money(v)
+        except ValueError as exc:
+            self.order.errors.append(f"{where}: {exc}")
+            return None
+        if currency is not None and currency != self.currency:
+            self.order.errors.append(f"{where}: currency {currency}, order is in {self.currency}")
+            return None
+        return amount
+
+    def check(self, stated: Any, computed: Decimal, where: str) -> None:
+        if stated is None:
+            return
+        amount = self.amount(stated, where)
+        if amount is not None and amount.quantize(_CENT, ROUND_HALF_UP) != computed:
+            self.order.errors.append(f"{where}: stated {money(amount, self.currency)}, "
+                                     f"computed {money(computed, self.currency)}")
+
+    def unit_price(self, line: Mapping[str, Any], where: str) -> Optional[Decimal]:
+        sku = self.idx.sku_by_ref.get(line["sku_ref"]) if self.idx and line.get("sku_ref") else None
+        if line.get("sku_ref") and self.idx is not None and sku is None:
+            self.order.warnings.append(f"{where}: sku_ref {line['sku_ref']} is not in the catalog")
+        listed = self.amount(sku.price, f"{where} catalog price") if sku is not None and sku.price else None
+        if line.get("price") is None:
+            if listed is None:
+                self.order.errors.append(f"{where}: no price and no catalog price")
+            return listed
+        price = self.amount(line["price"], f"{where}.price")
+        if price is not None and listed is not None and price != listed:
+            self.order.warnings.append(f"{where}: price {money(price, self.currency)} differs from "
+                                       f"catalog {money(listed, self.currency)}")
+        return price
+
+    def option_price(self, op: Mapping[str, Any], where: str) -> Optional[Decimal]:
+        if op.get("price") is not None:
+            return self.amount(op["price"], f"{where}.price")
+        listed = self.idx.option_by_ref.get(op["ref"]) if self.idx and op.get("ref") else None
+        if listed is not None and listed.price:
+            return self.amount(listed.price, f"{where} catalog price")
+        # HubRise treats an option without a price as free
+        return _ZERO
+
+    def quantity(self, v: Any, where: str) -> Optional[Decimal]:
+        try:
+            quantity = Decimal(str(1 if v is None else v).strip())
+        except InvalidOperation:
+            quantity = None
+        if quantity is None or not quantity.is_finite() or quantity < 0:
+            self.order.errors.append(f"{where}: invalid quantity {v!r}")
+            return None
+        return quantity
+
+    def item(self, line: Mapping[str, Any], where: str) -> Optional[PricedItem]:
+        price = self.unit_price(line, where)
+        quantity = self.quantity(line.get("quantity"), f"{where}.quantity")
+        options = _ZERO
+        for j, op in enumerate(line.get("options") or ()):
+            if op.get("removed"):
+                continue
+            op_price = self.option_price(op, f"{where}.options[{j}]")
+            op_quantity = self.quantity(op.get("quantity"), f"{where}.options[{j}].quantity")
+            if op_price is not None and op_quantity is not None:
+                options += op_price * op_quantity
+        if price is None or quantity is None:
+            return None
+        subtotal = ((price + options) * quantity).quantize(_CENT, ROUND_HALF_UP)
+        self.check(line.get("subtotal"), subtotal, f"{where}.subtotal")
+        return PricedItem(price=price, options=options, quantity=quantity, subtotal=subtotal)
+
+    def lines(self, lines: Any, field: str, name: str) -> Decimal:
+        total = _ZERO
+        for i, line in enumerate(lines or ()):
+            if not line.get("deleted"):
+                total += self.amount(line.get(field), f"{name}[{i}].{field}") or _ZERO
+        return total
+
+
+def price_order(body: Mapping[str, Any], currency: str, idx: Optional[CatalogIndex] = None) -> PricedOrder:
+    """
+    Price an order or basket the way HubRise totals it:
+
+        item subtotal = (price + sum(option price * option quantity)) * quantity
+        total         = sum(item subtotals) + charges - discounts
+
+    Deleted lines and removed options don't count; deal pricing is expected
+    to be reflected in the item prices already. Amounts may be "8.50 GBP" or
+    bare decimals. With a catalog index, items without a price take their
+    SKU's price (by sku_ref), options without one their catalog option's, and
+    item prices that differ from the catalog are reported as warnings.
+    Stated subtotals and total are checked against the computed ones; any
+    mismatch, unparsable amount or foreign currency is an error.
+    """
+    p = _Pricer(currency, idx)
+    order = p.order
+    items_total = _ZERO
+    for i, line in enumerate(body.get("items") or ()):
+        priced = None if line.get("deleted") else p.item(line, f"items[{i}]")
+        order.items.append(priced)
+        if priced is not None:
+            items_total += priced.subtotal
+    order.charges = p.lines(body.get("charges"), "price", "charges")
+    order.discounts = p.lines(body.get("discounts"), "price_off", "discounts")
+    order.total = (items_total + order.charges - order.discounts).quantize(_CENT, ROUND_HALF_UP)
+    p.check(body.get("total"), order.total, "total")
+    return order
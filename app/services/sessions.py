@@ -0,0 +1,166 @@
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.session import WebSession
+from app.models.store import StoreConnection
+from app.services.tenants import TenantRegistry, connection_payload, connection_slug, tenant_registry, upsert_connection
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_KEY = "hubrise_conn"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    # SQLite hands datetimes back naive; they were stored as UTC
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class SessionStore:
+    """
+    Server-side sessions: WebSession rows keyed by a random id, with a small
+    per-worker cache in front. Cached rows live for `cache_ttl` seconds, so a
+    session saved or deleted on another worker is seen here within that.
+    Saves update the row in place; the id only changes when the session
+    logs into a different store (no session fixation across logins).
+    Connections are cached separately with a short TTL, since their tokens
+    can be replaced underneath a session; saving one also refreshes its
+    tenant registry entry.
+    """
+
+    def __init__(
+        self,
+        bind: Engine = engine,
+        *,
+        max_age: float = settings.SESSION_MAX_AGE_SECONDS,
+        maxsize: int = settings.SESSION_CACHE_MAX_ENTRIES,
+        cache_ttl: float = settings.SESSION_CACHE_TTL_SECONDS,
+        connection_ttl: float = 60.0,
+        registry: Optional[TenantRegistry] = None,
+    ):
+        self.bind = bind
+        self.registry = registry or tenant_registry
+        self.max_age = max_age
+        self._sessions: TTLCache = TTLCache(maxsize=maxsize, ttl=cache_ttl)
+        self._connections: TTLCache = TTLCache(maxsize=maxsize, ttl=connection_ttl)
+        self.hits = 0
+        self.misses = 0
+
+    # --- database (blocking; always called through the threadpool)
+
+    def _get(self, session_id: str) -> Tuple[Optional[WebSession], Optional[Dict[str, Any]]]:
+        with Session(self.bind) as session:
+            row = session.get(WebSession, session_id)
+            conn = session.get(StoreConnection, row.connection_id) if row and row.connection_id else None
+            return row, connection_payload(conn) if conn else None
+
+    def _get_connection(self, connection_id: int) -> Optional[Dict[str, Any]]:
+        with Session(self.bind) as session:
+            conn = session.get(StoreConnection, connection_id)
+            return connection_payload(conn) if conn else None
+
+    def _write(self, session_id: Optional[str], data: Dict[str, Any],
+               conn: Optional[Dict[str, Any]], connection_id: Optional[int]) -> WebSession:
+        with Session(self.bind) as session:
+            if conn is not None:
+                stored = upsert_connection(session, conn)
+                session.flush()
+                connection_id = stored.id
+            row = session.get(WebSession, session_id) if session_id else None
+            if row is None or row.connection_id != connection_id:
+                if row is not None:
+                    session.delete(row)
+                row = WebSession(id=secrets.token_urlsafe(24), expires_at=_now())
+            row.data = data
+            row.connection_id = connection_id
+            row.expires_at = _now() + timedelta(seconds=self.max_age)
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+            return row
+
+    def _delete(self, session_id: str) -> None:
+        with Session(self.bind) as session:
+            session.execute(delete(WebSession).where(WebSession.id == session_id))
+            session.commit()
+
+    def _purge_expired(self) -> int:
+        with Session(self.bind) as session:
+            result = session.execute(delete(WebSession).where(WebSession.expires_at < _now()))
+            session.commit()
+            return result.rowcount
+
+    # --- API
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The session's data with `hubrise_conn` filled in; None if unknown or expired."""
+        row = self._sessions.get(session_id)
+        if row is not None:
+            self.hits += 1
+            conn = None
+            if row.connection_id is not None:
+                conn = self._connections.get(row.connection_id)
+                if conn is None:
+                    conn = await run_in_threadpool(self._get_connection, row.connection_id)
+        else:
+            self.misses += 1
+            row, conn = await run_in_threadpool(self._get, session_id)
+            if row is None:
+                return None
+            self._sessions[session_id] = row
+        if _aware(row.expires_at) <= _now():
+            self._sessions.pop(session_id, None)
+            return None
+        data = dict(row.data)
+        if conn is not None:
+            self._connections[row.connection_id] = conn
+            data[CONNECTION_KEY] = dict(conn)
+        return data
+
+    async def save(self, data: Mapping[str, Any], session_id: Optional[str] = None) -> str:
+        """Store `data` for `session_id` (or a new session) and return the id it's stored under."""
+        data = dict(data)
+        conn = data.pop(CONNECTION_KEY, None)
+        cached = self._sessions.get(session_id) if session_id else None
+        connection_id = None
+        if conn is not None and cached is not None and cached.connection_id is not None \
+                and self._connections.get(cached.connection_id) == conn:
+            connection_id, conn = cached.connection_id, None   # connection unchanged
+        row = await run_in_threadpool(self._write, session_id, data, conn, connection_id)
+        if session_id and session_id != row.id:
+            self._sessions.pop(session_id, None)
+        self._sessions[row.id] = row
+        if conn is not None:
+            self._connections.pop(row.connection_id, None)
+            await self.registry.refresh(connection_slug(conn))
+        return row.id
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        await run_in_threadpool(self._delete, session_id)
+
+    async def purge_expired(self) -> int:
+        purged = await run_in_threadpool(self._purge_expired)
+        if purged:
+            logger.info("Purged %d expired sessions", purged)
+        return purged
+
+    def stats(self) -> Dict[str, int]:
+        return {"sessions": len(self._sessions), "connections": len(self._connections),
+                "hits": self.hits, "misses": self.misses}
+
+
+session_store = SessionStore()
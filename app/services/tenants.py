@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.clients.hubrise import HubRiseClient
+from app.core.config import settings
+from app.core.db import engine
+from app.models.store import StoreApiKey, StoreConnection
+
+logger = logging.getLogger(__name__)
+
+
+def connection_slug(payload: Mapping[str, Any]) -> str:
+    """One StoreConnection per HubRise location (per account for account-level tokens)."""
+    return str(payload.get("location_id") or payload.get("account_id"))
+
+
+def connection_payload(row: StoreConnection) -> Dict[str, Any]:
+    """The OAuth payload shape get_hubrise_conn hands to routes."""
+    return {
+        **(row.raw_payload or {}),
+        "access_token": row.access_token,
+        "account_id": row.account_id,
+        "location_id": row.location_id,
+        "catalog_id": row.catalog_id,
+    }
+
+
+def upsert_connection(session: Session, payload: Mapping[str, Any]) -> StoreConnection:
+    """Insert or update the StoreConnection for a HubRise OAuth payload (caller commits)."""
+    slug = connection_slug(payload)
+    row = session.exec(select(StoreConnection).where(StoreConnection.slug == slug)).first()
+    if row is None:
+        row = StoreConnection(slug=slug, access_token="", account_id="", location_id="")
+    row.access_token = payload["access_token"]
+    row.account_id = payload.get("account_id") or ""
+    row.location_id = payload.get("location_id") or ""
+    for field in ("catalog_id", "user_id", "account_name", "location_name", "catalog_name"):
+        setattr(row, field, payload.get(field))
+    row.raw_payload = dict(payload)
+    row.updated_at = datetime.now(timezone.utc)
+    session.add(row)
+    return row
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class Tenant:
+    connection_id: int
+    slug: str
+    conn: Dict[str, Any]                # what get_hubrise_conn returns for this store
+    client: Optional[HubRiseClient]     # built once, on the app's shared HTTP client
+
+    @property
+    def access_token(self) -> str:
+        return self.conn["access_token"]
+
+
+class TenantRegistry:
+    """
+    Every StoreConnection, indexed by slug and by API key hash, so a
+    request is routed to its store with a dict lookup. Loaded at startup
+    and reloaded in the background once older than `refresh_interval`
+    (other workers' OAuth upserts and new keys show up within that);
+    this worker's own upserts refresh their entry at once.
+    """
+
+    def __init__(self, bind: Engine = engine, refresh_interval: float = settings.TENANT_REGISTRY_REFRESH_SECONDS):
+        self.bind = bind
+        self.refresh_interval = refresh_interval
+        self._by_slug: Dict[str, Tenant] = {}
+        self._by_key: Dict[str, Tenant] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loaded_at = float("-inf")
+        self._reloading: Optional["asyncio.Task[None]"] = None
+
+    # --- database (blocking; always called through the threadpool)
+
+    def _read(self, slug: Optional[str] = None) -> Tuple[List[StoreConnection], List[StoreApiKey]]:
+        with Session(self.bind) as session:
+            conns = select(StoreConnection)
+            keys = select(StoreApiKey)
+            if slug is not None:
+                conns = conns.where(StoreConnection.slug == slug)
+                keys = keys.join(StoreConnection).where(StoreConnection.slug == slug)
+            return list(session.exec(conns)), list(session.exec(keys))
+
+    def _insert_key(self, slug: str, key_hash: str, label: Optional[str]) -> None:
+        with Session(self.bind) as session:
+            conn = session.exec(select(StoreConnection).where(StoreConnection.slug == slug)).first()
+            if conn is None:
+                raise LookupError(f"No store connection {slug!r}")
+            session.add(StoreApiKey(key_hash=key_hash, connection_id=conn.id, label=label))
+            session.commit()
+
+    # --- API
+
+    def _tenant(self, row: StoreConnection) -> Tenant:
+        conn = connection_payload(row)
+        client = HubRiseClient(access_token=conn["access_token"], http=self._http) if self._http else None
+        return Tenant(connection_id=row.id, slug=row.slug, conn=conn, client=client)
+
+    def _index(self, rows: List[StoreConnection], keys: List[StoreApiKey]) -> Tuple[Dict[str, Tenant], Dict[str, Tenant]]:
+        by_id = {row.id: self._tenant(row) for row in rows}
+        by_slug = {t.slug: t for t in by_id.values()}
+        by_key = {k.key_hash: by_id[k.connection_id] for k in keys if k.connection_id in by_id}
+        return by_slug, by_key
+
+    async def load(self, http: Optional[httpx.AsyncClient] = None) -> None:
+        """(Re)load every tenant; with `http`, tenants get ready-made HubRise clients on it."""
+        if http is not None:
+            self._http = http
+        rows, keys = await run_in_threadpool(self._read)
+        self._by_slug, self._by_key = self._index(rows, keys)
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self, slug: str) -> None:
+        """Reload one store, e.g. right after its OAuth connection was upserted."""
+        rows, keys = await run_in_threadpool(self._read, slug)
+        by_slug, by_key = self._index(rows, keys)
+        old = self._by_slug.get(slug)
+        self._by_slug = {**{s: t for s, t in self._by_slug.items() if s != slug}, **by_slug}
+        self._by_key = {**{h: t for h, t in self._by_key.items() if t is not old}, **by_key}
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_interval or self._reloading is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._reloading = loop.create_task(self.load())
+        self._reloading.add_done_callback(self._reload_done)
+
+    def _reload_done(self, task: "asyncio.Task[None]") -> None:
+        self._reloading = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Tenant registry reload failed: %s", task.exception())
+
+    def by_slug(self, slug: str) -> Optional[Tenant]:
+        self._maybe_reload()
+        return self._by_slug.get(slug)
+
+    def by_api_key(self, api_key: str) -> Optional[Tenant]:
+        self._maybe_reload()
+        return self._by_key.get(hash_api_key(api_key))
+
+    async def create_api_key(self, slug: str, label: Optional[str] = None) -> str:
+        """A new API key for the store; only its hash is kept, so show it to the caller now."""
+        api_key = "hb_" + secrets.token_urlsafe(32)
+        await run_in_threadpool(self._insert_key, slug, hash_api_key(api_key), label)
+        await self.refresh(slug)
+        return api_key
+
+    def stats(self) -> Dict[str, int]:
+        return {"tenants": len(self._by_slug), "api_keys": len(self._by_key)}
+
+
+tenant_registry = TenantRegistry()
@@ -0,0 +1,66 @@
+"""
+Wall time to quote an order with several carriers: one carrier after
+another (the old create_quote flow) vs request_quotes under a deadline.
+
+    python -m benchmarks.bench_carrier_quotes [--carriers 5] [--deadline-ms 1500] [--rounds 5]
+
+Mock carriers answer in 100-600ms, with one in ten stalling for 3s.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.services.carriers import Carrier, request_quotes
+
+
+async def carrier_api(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(3.0 if random.random() < 0.1 else random.uniform(0.1, 0.6))
+    return httpx.Response(200, json={"fee": f"{random.uniform(3, 8):.2f} GBP"})
+
+
+async def hubrise_api(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(0.03)
+    return httpx.Response(201, json={"id": "q", "order_id": "o1", "location_id": "loc"})
+
+
+async def run(carrier_count: int, deadline_ms: int, rounds: int) -> None:
+    random.seed(7)
+    http = httpx.AsyncClient(transport=httpx.MockTransport(carrier_api))
+    hr = HubRiseClient("bench", httpx.AsyncClient(transport=httpx.MockTransport(hubrise_api)),
+                       latency=LatencyTracker(), flights=SingleFlight())
+    carriers = [Carrier(f"c{i}", f"https://c{i}.carrier.test/quote") for i in range(carrier_count)]
+
+    sequential, concurrent, answered = [], [], 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for carrier in carriers:
+            quote = await carrier.quote(http, {})
+            await hr.create_delivery_quote("loc", "o1", quote)
+        sequential.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        result = await request_quotes(hr, http, "loc", "o1", {}, carriers=carriers, deadline=deadline_ms / 1000)
+        concurrent.append(time.perf_counter() - started)
+        answered += len(result.quotes)
+
+    print(f"{carrier_count} carriers, {rounds} rounds, deadline {deadline_ms}ms")
+    print(f"  sequential  mean {sum(sequential) / rounds * 1000:7.0f}ms  max {max(sequential) * 1000:7.0f}ms")
+    print(f"  concurrent  mean {sum(concurrent) / rounds * 1000:7.0f}ms  max {max(concurrent) * 1000:7.0f}ms"
+          f"  ({answered}/{carrier_count * rounds} quotes in time)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--carriers", type=int, default=5)
+    parser.add_argument("--deadline-ms", type=int, default=1500)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.carriers, args.deadline_ms, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
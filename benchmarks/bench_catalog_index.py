@@ -0,0 +1,51 @@
+"""
+SKU/option lookups: compiled CatalogIndex vs walking the catalog tree.
+
+    python -m benchmarks.bench_catalog_index [--products 2000]
+"""
+import argparse
+import copy
+import time
+import timeit
+
+from app.services.catalog_index import compile_catalog
+from benchmarks.fixtures import make_catalog
+
+
+def walk_for_sku(catalog, ref):
+    for product in catalog["data"]["products"]:
+        for sku in product["skus"]:
+            if sku["ref"] == ref:
+                return product, sku
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=2000)
+    args = parser.parse_args()
+
+    catalog = make_catalog(products=args.products)
+    ref = f"SKU{args.products // 2}_1"
+
+    t0 = time.perf_counter()
+    idx = compile_catalog("cat_bench", catalog)
+    full_ms = (time.perf_counter() - t0) * 1000
+
+    changed = copy.deepcopy(catalog)
+    changed["data"]["products"][0]["name"] = "Renamed"
+    t0 = time.perf_counter()
+    compile_catalog("cat_bench", changed, previous=idx)
+    incr_ms = (time.perf_counter() - t0) * 1000
+
+    n = 2000
+    walk_us = timeit.timeit(lambda: walk_for_sku(catalog, ref), number=n) / n * 1e6
+    idx_us = timeit.timeit(lambda: idx.sku_by_ref[ref], number=n * 100) / (n * 100) * 1e6
+
+    print(f"products={args.products} skus={len(idx.skus)} options={len(idx.options)}")
+    print(f"compile full={full_ms:.1f}ms incremental(1 product changed)={incr_ms:.1f}ms")
+    print(f"sku lookup: tree walk={walk_us:.1f}us index={idx_us:.3f}us")
+
+
+if __name__ == "__main__":
+    main()
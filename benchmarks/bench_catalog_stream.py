@@ -0,0 +1,104 @@
+"""
+Peak Python heap per catalog request: buffered proxy vs /catalog/stream.
+
+    python -m benchmarks.bench_catalog_stream [--products 2000]
+
+The mock upstream streams a pre-encoded catalog in 64KB chunks. "buffered"
+is the old get_full_catalog path (resp.json() then FastAPI re-encodes);
+"stream" is /catalog/stream on a cache miss with tee off and on.
+"""
+import argparse
+import asyncio
+import json
+import tracemalloc
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn
+from app.routers import catalog
+from app.services.catalog_cache import CatalogCache
+from benchmarks.fixtures import make_catalog
+
+
+def build_app(payload: bytes) -> FastAPI:
+    async def upstream_body():
+        view = memoryview(payload)
+        for i in range(0, len(payload), 65536):
+            yield bytes(view[i:i + 65536])
+
+    def hubrise_client() -> HubRiseClient:
+        transport = httpx.MockTransport(lambda request: httpx.Response(
+            200, content=upstream_body(), headers={"Content-Type": "application/json"}))
+        return HubRiseClient("bench", httpx.AsyncClient(transport=transport),
+                             latency=LatencyTracker(), flights=SingleFlight())
+
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "bench", "catalog_id": "cat"}
+    app.dependency_overrides[catalog.client] = hubrise_client
+
+    @app.get("/buffered")
+    async def buffered(hr: HubRiseClient = Depends(catalog.client)):
+        return await hr.get_json("get_catalog", "/catalogs/cat")
+
+    app.include_router(catalog.router)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> None:
+    """Drive the ASGI app directly, discarding body chunks as they are sent
+    (httpx's ASGITransport would buffer the whole response)."""
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": route, "raw_path": route.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+
+    async def receive():
+        if not done.is_set():
+            done.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def peak(app: FastAPI, path: str) -> float:
+    catalog.catalog_cache = CatalogCache(ttl=60, max_stale=0)  # force a miss every time
+    tracemalloc.start()
+    await call(app, path)
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top / 1024 / 1024
+
+
+async def run(products: int) -> None:
+    payload = json.dumps(make_catalog(products=products)).encode()
+    app = build_app(payload)
+    await peak(app, "/buffered")  # warm imports/caches
+    results = {
+        "buffered": await peak(app, "/buffered"),
+        "stream, tee off": await peak(app, "/catalog/stream?tee=false"),
+        "stream, tee on": await peak(app, "/catalog/stream?tee=true"),
+    }
+    print(f"catalog {products} products, {len(payload) / 1024 / 1024:.2f}MB on the wire")
+    for label, mb in results.items():
+        print(f"  {label:<16} peak {mb:7.2f}MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.products))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Upstream update_delivery calls for simulated driver traffic, forwarded
+per fix vs through the driver location coalescer.
+
+    python -m benchmarks.bench_driver_location [--drivers 50] [--minutes 20]
+
+Each driver sends one fix per second: a wait at the restaurant, then a drive
+at 30km/h. Time is compressed 100x (the coalescer's interval is scaled to
+match), so a 20 minute shift takes ~12s.
+"""
+import argparse
+import asyncio
+import json
+import math
+
+import httpx
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.config import settings
+from app.services.driver_location import DriverLocationCoalescer
+
+SPEEDUP = 100
+FIX_SECONDS = 1.0
+SPEED_MPS = 30 / 3.6
+WAIT_SECONDS = 180
+
+
+def track(minutes: int, heading: float):
+    """(lat, lon) per fix: parked for WAIT_SECONDS, then driving on `heading`."""
+    lat, lon = 51.5, -0.1
+    for second in range(int(minutes * 60 / FIX_SECONDS)):
+        if second * FIX_SECONDS >= WAIT_SECONDS:
+            step = SPEED_MPS * FIX_SECONDS
+            lat += step * math.cos(heading) / 111_320
+            lon += step * math.sin(heading) / (111_320 * math.cos(math.radians(lat)))
+        yield lat, lon
+
+
+async def drive(coalescer: DriverLocationCoalescer, hr: HubRiseClient, order_id: str, minutes: int) -> None:
+    for lat, lon in track(minutes, heading=hash(order_id) % 360):
+        coalescer.offer(hr, "loc", order_id, lat, lon)
+        await asyncio.sleep(FIX_SECONDS / SPEEDUP)
+
+
+async def run(drivers: int, minutes: int) -> None:
+    calls = [0]
+    finals = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls[0] += 1
+        finals[request.url.path.split("/")[-2]] = json.loads(request.content)
+        return httpx.Response(200, json={})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    hr = HubRiseClient("bench", http, latency=LatencyTracker(), flights=SingleFlight())
+    coalescer = DriverLocationCoalescer(
+        interval=settings.DRIVER_LOCATION_FLUSH_SECONDS / SPEEDUP,
+        min_move_meters=settings.DRIVER_LOCATION_FLUSH_METERS,
+    )
+    coalescer.start()
+    await asyncio.gather(*(drive(coalescer, hr, f"o{i}", minutes) for i in range(drivers)))
+    await coalescer.stop()
+
+    fixes = coalescer.stats()["received"]
+    print(f"{drivers} drivers x {minutes}min, flush every {settings.DRIVER_LOCATION_FLUSH_SECONDS}s"
+          f" or {settings.DRIVER_LOCATION_FLUSH_METERS}m")
+    print(f"  per fix     {fixes:7d} upstream calls")
+    print(f"  coalesced   {calls[0]:7d} upstream calls  ({fixes / calls[0]:.1f}x fewer)")
+    exact = 0
+    for i in range(drivers):
+        *_, (lat, lon) = track(minutes, heading=hash(f"o{i}") % 360)
+        sent = finals.get(f"o{i}", {})
+        exact += sent.get("driver_latitude") == lat and sent.get("driver_longitude") == lon
+    print(f"  final position exact for {exact}/{drivers} orders")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drivers", type=int, default=50)
+    parser.add_argument("--minutes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.drivers, args.minutes))
+
+
+if __name__ == "__main__":
+    main()
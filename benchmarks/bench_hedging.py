@@ -0,0 +1,78 @@
+"""
+Hedged GET benchmark against a local mock HubRise with injected tail latency.
+
+    python -m benchmarks.bench_hedging [--requests 2000] [--concurrency 20]
+
+Most responses take 10-30ms; a configurable fraction stalls for 250-400ms, the
+kind of tail we see from HubRise on retrieve_order/get_catalog. Runs the same
+workload with hedging off and on and prints p50/p95/p99 plus upstream load.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+import httpx
+
+from app.clients.hubrise import HedgeBudget, HubRiseClient, LatencyTracker, SingleFlight
+
+
+def mock_transport(slow_fraction: float, calls: List[int]) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls[0] += 1
+        if random.random() < slow_fraction:
+            await asyncio.sleep(random.uniform(0.25, 0.4))
+        else:
+            await asyncio.sleep(random.uniform(0.01, 0.03))
+        return httpx.Response(200, json={"id": "o1", "status": "accepted"})
+
+    return httpx.MockTransport(handler)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(pct * (len(ordered) - 1))]
+
+
+async def run(hedge: bool, requests: int, concurrency: int, slow_fraction: float) -> None:
+    random.seed(42)
+    calls = [0]
+    budget = HedgeBudget(ratio=0.1)
+    latency = LatencyTracker()
+    async with httpx.AsyncClient(transport=mock_transport(slow_fraction, calls)) as http:
+        # Own single-flight, and one order id per request, so every request
+        # reaches upstream instead of collapsing into its concurrent twins
+        hr = HubRiseClient("bench", http, hedge=hedge, latency=latency, budget=budget, flights=SingleFlight())
+        sem = asyncio.Semaphore(concurrency)
+        timings: List[float] = []
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                await hr.retrieve_order("loc", f"o{i}")
+                timings.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+
+    label = "hedged  " if hedge else "baseline"
+    print(
+        f"{label} p50={percentile(timings, 0.50) * 1000:6.1f}ms "
+        f"p95={percentile(timings, 0.95) * 1000:6.1f}ms "
+        f"p99={percentile(timings, 0.99) * 1000:6.1f}ms "
+        f"upstream_calls={calls[0]} ({calls[0] / requests:.2f}x) {budget.stats()}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    args = parser.parse_args()
+    for hedge in (False, True):
+        asyncio.run(run(hedge, args.requests, args.concurrency, args.slow_fraction))
+
+
+if __name__ == "__main__":
+    main()
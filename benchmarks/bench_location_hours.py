@@ -0,0 +1,60 @@
+"""
+"Open now?": compiled OpeningSchedule vs parsing the location's opening_hours per call.
+
+    python -m benchmarks.bench_location_hours [--slots 3]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app.services.location_cache import DAYS, OpeningSchedule
+
+
+def naive_is_open(opening_hours, tz_name, at):
+    local = at.astimezone(ZoneInfo(tz_name))
+    minute = local.hour * 60 + local.minute
+    today, yesterday = DAYS[local.weekday()], DAYS[local.weekday() - 1]
+    for slot in opening_hours.get(today, ()):
+        start = int(slot["from"][:2]) * 60 + int(slot["from"][3:])
+        end = int(slot["to"][:2]) * 60 + int(slot["to"][3:])
+        if start <= minute < (end if end > start else 1440):
+            return True
+    for slot in opening_hours.get(yesterday, ()):
+        start = int(slot["from"][:2]) * 60 + int(slot["from"][3:])
+        end = int(slot["to"][:2]) * 60 + int(slot["to"][3:])
+        if end <= start and minute < end:
+            return True
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slots", type=int, default=3, help="opening slots per day")
+    args = parser.parse_args()
+
+    width = 1440 // (args.slots * 2)
+    hours = {
+        day: [{"from": f"{(2 * i * width) // 60:02d}:{(2 * i * width) % 60:02d}",
+               "to": f"{((2 * i + 1) * width) // 60:02d}:{((2 * i + 1) * width) % 60:02d}"}
+              for i in range(args.slots)]
+        for day in DAYS
+    }
+    tz = "Europe/London"
+    schedule = OpeningSchedule.compile(hours, ZoneInfo(tz))
+    base = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    instants = [base + timedelta(minutes=17 * i) for i in range(500)]
+    assert [schedule.is_open(t) for t in instants] == [naive_is_open(hours, tz, t) for t in instants]
+
+    n = 20
+    compile_us = timeit.timeit(lambda: OpeningSchedule.compile(hours, ZoneInfo(tz)), number=n * 50) / (n * 50) * 1e6
+    naive_us = timeit.timeit(lambda: [naive_is_open(hours, tz, t) for t in instants], number=n) / (n * 500) * 1e6
+    compiled_us = timeit.timeit(lambda: [schedule.is_open(t) for t in instants], number=n) / (n * 500) * 1e6
+    next_us = timeit.timeit(lambda: [schedule.next_change(t) for t in instants], number=n) / (n * 500) * 1e6
+
+    print(f"slots/day={args.slots} intervals={len(schedule.starts)} compile={compile_us:.1f}us")
+    print(f"is_open: parse per call={naive_us:.2f}us compiled={compiled_us:.2f}us; next_change={next_us:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Dashboard aggregates over a month of orders: iterating the raw order JSON
+(parsing "8.50 GBP" strings on every query, as before) vs the columnar
+LocationOrders store.
+
+    python -m benchmarks.bench_order_analytics [--orders-per-day 1500] [--days 30]
+"""
+import argparse
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.services.order_analytics import LocationOrders, basket_summary, sales_by_interval, top_items
+from app.services.order_fanout import parse_timestamp
+from benchmarks.fixtures import make_orders
+
+
+def month_of_orders(per_day: int, days: int, start: datetime):
+    orders = make_orders(per_day * days)
+    step = days * 86400 / len(orders)
+    for i, order in enumerate(orders):
+        order["created_at"] = (start + timedelta(seconds=i * step)).isoformat()
+    return orders
+
+
+def naive(orders, start, end):
+    hourly, products = defaultdict(Decimal), Counter()
+    count, sales = 0, Decimal(0)
+    for order in orders:
+        created = parse_timestamp(order["created_at"])
+        if not (start <= created < end) or order["status"] == "cancelled":
+            continue
+        total = Decimal(order["total"].split()[0])
+        hourly[created.replace(minute=0, second=0)] += total
+        count, sales = count + 1, sales + total
+        for item in order["items"]:
+            products[item["product_name"]] += float(item["quantity"])
+    return hourly, sales / count, products.most_common(10)
+
+
+def columnar(loc, start, end):
+    return (sales_by_interval(loc, start, end, "hour", "Europe/London"),
+            basket_summary(loc, start, end), top_items(loc, start, end))
+
+
+def ms(fn, *args, repeat=5):
+    fn(*args)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders-per-day", type=int, default=1500)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    start = datetime(2026, 9, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=args.days)
+    orders = month_of_orders(args.orders_per_day, args.days, start)
+
+    loc = LocationOrders()
+    started = time.perf_counter()
+    loc.ingest(orders)
+    ingest = (time.perf_counter() - started) * 1000
+
+    print(f"{len(orders)} orders, {loc.item_order.size} item lines; ingest {ingest:.0f}ms once")
+    for label, span_end in (("last day", start + timedelta(days=1)), ("whole month", end)):
+        old, new = ms(naive, orders, start, span_end), ms(columnar, loc, start, span_end)
+        print(f"  {label:<12} raw JSON {old:8.1f}ms   columnar {new:6.1f}ms   {old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
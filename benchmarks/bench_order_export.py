@@ -0,0 +1,51 @@
+"""
+Rows per second and peak memory for a streamed order export, CSV and
+Parquet, of `--orders` orders (7 rows each) arriving in HubRise-sized pages.
+
+    python -m benchmarks.bench_order_export [--orders 100000] [--memory]
+
+Output is counted and discarded. With --memory, peak traced allocations
+(what the exporter holds) are reported too; tracing slows the run down.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.services.order_export import export_orders, open_export
+from benchmarks.fixtures import make_orders
+
+
+async def pages(orders: int, page_size: int = 100):
+    page = make_orders(page_size)
+    for _ in range(orders // page_size):
+        yield page
+
+
+async def run(fmt: str, orders: int, memory: bool) -> None:
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    async for chunk in export_orders(pages(orders), open_export(fmt)):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    rows = orders * 7
+    line = f"{fmt:<8} {rows:>9} rows {elapsed:6.2f}s {rows / elapsed:>10,.0f} rows/s {size / 1e6:7.1f}MB out"
+    if memory:
+        line += f"  peak {tracemalloc.get_traced_memory()[1] / 1e6:5.1f}MB"
+        tracemalloc.stop()
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+    for fmt in ("csv", "parquet"):
+        asyncio.run(run(fmt, args.orders, args.memory))
+
+
+if __name__ == "__main__":
+    main()
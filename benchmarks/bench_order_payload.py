@@ -0,0 +1,45 @@
+"""
+CPU per order to turn a validated OrderCreate into the HubRise payload:
+jsonable_encoder + legacy_normalise (the old path, which builds
+the dict twice) vs build_order_payload (one model_dump, formatted in place).
+
+    python -m benchmarks.bench_order_payload [--repeat 200]
+
+Models are validated once up front, as the request path receives them.
+"""
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.orders import OrderCreate
+from app.services.order_payload import build_order_payload
+from benchmarks.fixtures import make_order_payload
+from tests.test_order_payload import legacy_normalise
+
+
+def per_call_us(fn, repeat: int) -> float:
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'old (us)':>10} {'new (us)':>10} {'speedup':>8}")
+    for items in (10, 100, 500, 1000):
+        model = OrderCreate.model_validate(make_order_payload(items=items, options_per_item=3))
+        repeat = max(10, args.repeat * 10 // items)
+        old = per_call_us(lambda: legacy_normalise(jsonable_encoder(model, exclude_none=True), "GBP"),
+                          repeat)
+        new = per_call_us(lambda: build_order_payload(model, "GBP"), repeat)
+        print(f"{items:>6} {old:>10.0f} {new:>10.0f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
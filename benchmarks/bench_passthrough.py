@@ -0,0 +1,81 @@
+"""
+Proxy cost per request: parse + re-encode (dict return) vs raw passthrough.
+
+    python -m benchmarks.bench_passthrough [--requests 200]
+
+Both routes sit behind the real FastAPI stack (ASGITransport) with a mock
+HubRise upstream serving pre-encoded bytes, so the difference is purely what
+our process does with the body.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.responses import raw_response
+from benchmarks.fixtures import make_catalog, make_orders
+
+
+def build_app(payload: bytes) -> FastAPI:
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=payload, headers={"Content-Type": "application/json"})
+    ))
+    # Requests are sequential, so nothing gets collapsed by single-flight
+    hr = HubRiseClient("bench", upstream, hedge=False, latency=LatencyTracker(), flights=SingleFlight())
+
+    app = FastAPI()
+
+    @app.get("/parsed")
+    async def parsed():
+        return await hr.get_json("bench", "/bench")
+
+    @app.get("/raw")
+    async def raw():
+        return raw_response(await hr.get_raw("bench", "/bench"))
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int):
+    await client.get(path)  # warm-up
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for _ in range(requests):
+        r = await client.get(path)
+        assert r.status_code == 200
+    wall = (time.perf_counter() - wall0) / requests * 1000
+    cpu = (time.process_time() - cpu0) / requests * 1000
+    return wall, cpu
+
+
+async def run(label: str, payload: bytes, requests: int) -> None:
+    app = build_app(payload)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        p_wall, p_cpu = await measure(client, "/parsed", requests)
+        r_wall, r_cpu = await measure(client, "/raw", requests)
+    print(
+        f"{label:<22} {len(payload) / 1024:8.0f}KB  "
+        f"parsed: {p_wall:7.2f}ms wall {p_cpu:7.2f}ms cpu  |  "
+        f"raw: {r_wall:6.2f}ms wall {r_cpu:6.2f}ms cpu  ({p_cpu / r_cpu:.1f}x less cpu)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    cases = [
+        ("catalog 2000 products", json.dumps(make_catalog(products=2000)).encode()),
+        ("catalog 500 products", json.dumps(make_catalog(products=500)).encode()),
+        ("orders page (100)", json.dumps(make_orders(100)).encode()),
+        ("orders list (1000)", json.dumps(make_orders(1000)).encode()),
+    ]
+    for label, payload in cases:
+        asyncio.run(run(label, payload, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-request session cost: Starlette's signed-cookie session (decode + re-sign
+the OAuth payload) vs a signed id looked up in SessionStore's LRU.
+
+    python -m benchmarks.bench_sessions
+"""
+import argparse
+import asyncio
+import json
+import time
+from base64 import b64decode, b64encode
+
+import itsdangerous
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+
+from app.core.db import init_db
+from app.services.sessions import SessionStore
+from app.services.tenants import TenantRegistry
+
+CONN = {
+    "access_token": "b9a5d4e1f0c24b6d8e3a7f9c1d2e4b6a", "account_id": "3r4s3", "location_id": "3r4s3-0",
+    "catalog_id": "87yu4", "customer_list_id": "ho6rd", "account_name": "Hut Bite Ltd",
+    "location_name": "Hut Bite Soho", "catalog_name": "Main menu", "customer_list_name": "Customers",
+    "user_id": "u1", "scope": "profile,location[orders.write,catalog.read]",
+}
+
+
+async def run(n: int) -> None:
+    session = {"hubrise_conn": CONN}
+
+    signer = itsdangerous.TimestampSigner("secret")
+    cookie = signer.sign(b64encode(json.dumps(session).encode()))
+    t0 = time.perf_counter()
+    for _ in range(n):
+        data = json.loads(b64decode(signer.unsign(cookie, max_age=1209600)))
+        signer.sign(b64encode(json.dumps(data).encode()))   # SessionMiddleware re-sets it on every response
+    cookie_us = (time.perf_counter() - t0) / n * 1e6
+
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    store = SessionStore(bind, registry=TenantRegistry(bind))
+    id_signer = itsdangerous.Signer("secret", salt="session-id")
+    sid_cookie = id_signer.sign(await store.save(session))
+    await store.load(id_signer.unsign(sid_cookie).decode())
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await store.load(id_signer.unsign(sid_cookie).decode())
+    server_us = (time.perf_counter() - t0) / n * 1e6
+
+    print(f"cookie bytes: signed payload={len(cookie)} signed id={len(sid_cookie)}")
+    print(f"per request: cookie session={cookie_us:.1f}us server session (LRU hit)={server_us:.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.n))
+
+
+if __name__ == "__main__":
+    main()
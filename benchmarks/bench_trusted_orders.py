@@ -0,0 +1,48 @@
+"""
+CPU per order from request bytes to HubRise payload: the public POST /orders
+path (json.loads, OrderCreate validation, build_order_payload) vs the
+trusted path (trusted_order_adapter.validate_json, normalise_payload).
+
+    python -m benchmarks.bench_trusted_orders [--repeat 200]
+"""
+import argparse
+import json
+import time
+
+from app.schemas.orders import OrderCreate, trusted_order_adapter
+from app.services.order_payload import build_order_payload, normalise_payload
+from benchmarks.fixtures import make_order_payload
+
+
+def public(raw: bytes) -> dict:
+    return build_order_payload(OrderCreate.model_validate(json.loads(raw)), "GBP")
+
+
+def trusted(raw: bytes) -> dict:
+    return normalise_payload(trusted_order_adapter.validate_json(raw), "GBP")
+
+
+def per_call_us(fn, raw: bytes, repeat: int) -> float:
+    fn(raw)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(raw)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'KB':>6} {'public (us)':>12} {'trusted (us)':>13} {'speedup':>8}")
+    for items in (10, 100, 500, 1000):
+        raw = json.dumps(make_order_payload(items=items, options_per_item=3)).encode()
+        assert public(raw) == trusted(raw)
+        repeat = max(10, args.repeat * 10 // items)
+        slow, fast = per_call_us(public, raw, repeat), per_call_us(trusted, raw, repeat)
+        print(f"{items:>6} {len(raw) / 1024:>6.0f} {slow:>12.0f} {fast:>13.0f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Synthetic HubRise-shaped payloads shared by the benchmarks."""
+import random
+from typing import Any, Dict, List
+
+
+def make_catalog(products: int = 2000, skus_per_product: int = 3, option_lists: int = 50,
+                 options_per_list: int = 12, categories: int = 40) -> Dict[str, Any]:
+    rnd = random.Random(7)
+    return {
+        "id": "cat_bench",
+        "location_id": "loc_bench",
+        "name": "Benchmark menu",
+        "data": {
+            "categories": [
+                {"id": f"c{c}", "ref": f"CAT{c}", "name": f"Category {c}", "parent_ref": None}
+                for c in range(categories)
+            ],
+            "option_lists": [
+                {
+                    "id": f"ol{ol}",
+                    "ref": f"OL{ol}",
+                    "name": f"Options {ol}",
+                    "min_selections": 0,
+                    "max_selections": 3,
+                    "options": [
+                        {"id": f"o{ol}_{o}", "ref": f"OPT{ol}_{o}", "name": f"Option {o}",
+                         "price": f"{rnd.randint(0, 300) / 100:.2f} GBP"}
+                        for o in range(options_per_list)
+                    ],
+                }
+                for ol in range(option_lists)
+            ],
+            "products": [
+                {
+                    "id": f"p{p}",
+                    "ref": f"PROD{p}",
+                    "name": f"Product {p}",
+                    "description": "A reasonably long product description " * 3,
+                    "category_id": f"c{p % categories}",
+                    "category_ref": f"CAT{p % categories}",
+                    "tags": ["spicy", "vegan"] if p % 5 == 0 else [],
+                    "skus": [
+                        {
+                            "id": f"s{p}_{s}",
+                            "ref": f"SKU{p}_{s}",
+                            "name": ["Small", "Medium", "Large", "XL"][s % 4],
+                            "price": f"{rnd.randint(300, 2500) / 100:.2f} GBP",
+                            "option_list_ids": [f"ol{(p + k) % option_lists}" for k in range(2)],
+                        }
+                        for s in range(skus_per_product)
+                    ],
+                }
+                for p in range(products)
+            ],
+            "deals": [],
+            "discounts": [],
+            "charges": [],
+        },
+    }
+
+
+def make_order_payload(items: int = 20, options_per_item: int = 3) -> Dict[str, Any]:
+    """Client-side OrderCreate body (plain decimals, before HubRise formatting)."""
+    rnd = random.Random(items)
+    return {
+        "status": "new",
+        "channel": "hutbite",
+        "service_type": "delivery",
+        "private_ref": f"bench-{items}",
+        "customer": {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com",
+                     "phone": "+447700900000", "address_1": "1 High St", "postal_code": "N14 6BS"},
+        "items": [
+            {
+                "product_name": f"Product {i}",
+                "sku_name": "Large",
+                "sku_ref": f"SKU{i}_2",
+                "price": f"{rnd.randint(300, 2500) / 100:.2f}",
+                "quantity": rnd.choice([1, 2, "3", 1.0]),
+                "options": [
+                    {"option_list_name": "Toppings", "name": f"Topping {o}", "ref": f"OPT{o}",
+                     "price": "0.50", "quantity": 1}
+                    for o in range(options_per_item)
+                ],
+            }
+            for i in range(items)
+        ],
+        "charges": [{"name": "Delivery", "price": "2.50"}],
+        "discounts": [{"name": "Promo", "price_off": "1.00 GBP"}],
+        "payments": [{"name": "Card", "amount": "10.00"}],
+        "custom_fields": {"table": "12"},
+    }
+
+
+def make_orders(n: int, location_id: str = "loc_bench", items: int = 3) -> List[Dict[str, Any]]:
+    """HubRise-side order objects, newest first, as list_orders returns them."""
+    rnd = random.Random(n)
+    statuses = ["new", "accepted", "completed", "cancelled"]
+    orders = []
+    for i in range(n):
+        minute = (n - i) % 60
+        hour = 10 + ((n - i) // 60) % 12
+        orders.append({
+            "id": f"{location_id}-o{i}",
+            "location_id": location_id,
+            "status": statuses[i % len(statuses)],
+            "service_type": "delivery",
+            "created_at": f"2026-10-{1 + (n - i) // 720 % 28:02d}T{hour:02d}:{minute:02d}:00+01:00",
+            "private_ref": f"ref-{i}",
+            "customer_id": f"cust{i % 500}",
+            "total": f"{rnd.randint(800, 6000) / 100:.2f} GBP",
+            "items": [
+                {
+                    "product_name": f"Product {rnd.randint(0, 50)}",
+                    "sku_name": "Large",
+                    "sku_ref": f"SKU{k}",
+                    "price": "8.50 GBP",
+                    "quantity": "1",
+                    "subtotal": "9.00 GBP",
+                    "options": [{"option_list_name": "Toppings", "name": "Cheese",
+                                 "price": "0.50 GBP", "quantity": 1}],
+                }
+                for k in range(items)
+            ],
+            "payments": [{"name": "Card", "amount": f"{rnd.randint(800, 6000) / 100:.2f} GBP"}],
+        })
+    return orders
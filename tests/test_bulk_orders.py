@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn, get_location_id
+from app.routers import orders
+from app.services import bulk_orders
+from app.services.bulk_orders import LocationLimits
+
+
+def upstream(in_flight, peak):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        order_id = request.url.path.rsplit("/", 1)[-1]
+        in_flight.append(order_id)
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(order_id)
+        if order_id == "bad":
+            return httpx.Response(400, json={"message": "Invalid status transition"})
+        return httpx.Response(200, json={"id": order_id, **json.loads(request.content)})
+
+    return handler
+
+
+def make_app(monkeypatch, handler, limit=3):
+    monkeypatch.setattr(bulk_orders, "location_limits", LocationLimits(limit))
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[orders.client] = lambda: HubRiseClient(
+        "tok", http, latency=LatencyTracker(), flights=SingleFlight())
+    app.include_router(orders.router)
+    return app
+
+
+def test_bulk_update_reports_each_order_within_the_limit(monkeypatch):
+    in_flight, peak = [], [0]
+    client = TestClient(make_app(monkeypatch, upstream(in_flight, peak), limit=3))
+    ids = [f"o{i}" for i in range(10)] + ["bad"]
+
+    r = client.patch("/orders/bulk", json={"updates": [
+        {"order_id": i, "patch": {"status": "completed"}} for i in ids]})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["succeeded"], body["failed"]) == (10, 1)
+    assert [res["order_id"] for res in body["results"]] == ids
+    assert body["results"][0]["order"]["status"] == "completed"
+    assert body["results"][-1] == {"order_id": "bad", "ok": False, "status": 400,
+                                   "error": {"message": "Invalid status transition"}}
+    assert peak[0] == 3
+
+
+def test_bulk_update_streams_results(monkeypatch):
+    client = TestClient(make_app(monkeypatch, upstream([], [0])))
+
+    r = client.patch("/orders/bulk", params={"stream": "true"}, json={"updates": [
+        {"order_id": "o1", "patch": {"status": "cancelled"}}, {"order_id": "bad", "patch": {"status": "new"}}]})
+
+    assert r.headers["content-type"] == "application/x-ndjson"
+    results = {line["order_id"]: line["ok"] for line in map(json.loads, r.text.splitlines())}
+    assert results == {"o1": True, "bad": False}
+
+
+def test_bulk_update_rejects_duplicate_orders(monkeypatch):
+    client = TestClient(make_app(monkeypatch, upstream([], [0])))
+
+    r = client.patch("/orders/bulk", json={"updates": [
+        {"order_id": "o1", "patch": {"status": "completed"}}, {"order_id": "o1", "patch": {"status": "new"}}]})
+
+    assert r.status_code == 422
+
+
+def test_bulk_update_survives_mirror_errors(monkeypatch):
+    class BrokenMirror:
+        enabled = True
+
+        async def upsert(self, orders, location_id=None):
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(bulk_orders, "order_store", BrokenMirror())
+    client = TestClient(make_app(monkeypatch, upstream([], [0])))
+
+    r = client.patch("/orders/bulk", json={"updates": [
+        {"order_id": "o1", "patch": {"status": "completed"}}, {"order_id": "o2", "patch": {"status": "completed"}}]})
+
+    assert r.status_code == 200
+    assert (r.json()["succeeded"], r.json()["failed"]) == (2, 0)
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.routers import callbacks
+from app.services import callbacks as callback_service
+from app.services.callbacks import CallbackEvent, CallbackPipeline, verify_signature
+
+SECRET = "shh"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def order_event(order_id="o1", status="accepted"):
+    return {
+        "resource_type": "order", "event_type": "update", "order_id": order_id,
+        "location_id": "loc", "new_state": {"id": order_id, "status": status},
+    }
+
+
+def test_verify_signature():
+    body = b'{"resource_type":"order"}'
+    assert verify_signature(body, sign(body), SECRET)
+    assert verify_signature(body, sign(body).upper(), SECRET)
+    assert not verify_signature(body, sign(body, "other"), SECRET)
+    assert not verify_signature(body, None, SECRET)
+
+
+class TestCallbackPipeline:
+    @pytest.mark.asyncio
+    async def test_events_reach_handlers_in_order_per_resource(self):
+        pipeline = CallbackPipeline(maxsize=10, workers=2)
+        seen = []
+
+        async def handler(event):
+            await asyncio.sleep(0)
+            seen.append((event.resource_id, event.new_state["status"]))
+
+        pipeline.subscribe("order", handler)
+        pipeline.start()
+        for status in ("new", "accepted", "completed"):
+            assert pipeline.offer(CallbackEvent.from_body(order_event(status=status)))
+        await pipeline.join()
+        await pipeline.stop()
+
+        assert seen == [("o1", "new"), ("o1", "accepted"), ("o1", "completed")]
+        assert pipeline.stats()["processed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_full_shard_rejects(self):
+        pipeline = CallbackPipeline(maxsize=2, workers=1)  # not started: nothing drains
+
+        results = [pipeline.offer(CallbackEvent.from_body(order_event())) for _ in range(3)]
+
+        assert results == [True, True, False]
+        assert pipeline.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failing_handler_does_not_stop_the_worker(self):
+        pipeline = CallbackPipeline(maxsize=10, workers=1)
+        seen = []
+
+        async def broken(event):
+            raise RuntimeError("boom")
+
+        async def recorder(event):
+            seen.append(event.resource_id)
+
+        pipeline.subscribe("order", broken)
+        pipeline.subscribe("*", recorder)
+        pipeline.start()
+        pipeline.offer(CallbackEvent.from_body(order_event("o1")))
+        pipeline.offer(CallbackEvent.from_body(order_event("o2")))
+        await pipeline.join()
+        await pipeline.stop()
+
+        assert seen == ["o1", "o2"]
+        assert pipeline.stats()["failed"] == 2
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(settings, "HUBRISE_CLIENT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal")
+    pipeline = CallbackPipeline(maxsize=1, workers=1)
+    monkeypatch.setattr(callbacks, "callback_pipeline", pipeline)
+    app = FastAPI()
+    app.include_router(callbacks.router)
+    app.state.pipeline = pipeline
+    return app
+
+
+def test_callback_route_verifies_and_queues(app):
+    client = TestClient(app)
+    body = json.dumps(order_event()).encode()
+
+    assert client.post("/hubrise/callback", content=body,
+                       headers={"X-Hubrise-Hmac-Sha256": "bad"}).status_code == 401
+
+    r = client.post("/hubrise/callback", content=body, headers={"X-Hubrise-Hmac-Sha256": sign(body)})
+    assert r.status_code == 200
+    assert app.state.pipeline.depth() == 1
+
+    # queue full: HubRise is told to retry
+    r = client.post("/hubrise/callback", content=body, headers={"X-Hubrise-Hmac-Sha256": sign(body)})
+    assert r.status_code == 503
+    assert client.get("/hubrise/callback/stats").status_code == 401
+    stats = client.get("/hubrise/callback/stats", headers={"X-Internal-Token": "internal"})
+    assert stats.json()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_catalog_callback_invalidates_cache(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(callback_service.catalog_cache, "invalidate", invalidated.append)
+
+    await callback_service.invalidate_catalog(CallbackEvent.from_body(
+        {"resource_type": "catalog", "event_type": "update", "catalog_id": "cat1"}))
+
+    assert invalidated == ["cat1"]
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.config import settings
+from app.core.deps import get_http_client, get_location_id
+from app.routers import deliveries
+from app.services.carriers import best_quote
+
+CARRIERS = {
+    "fast": ("6.00 GBP", "2026-10-19T12:20:00+00:00", 0.01),
+    "cheap": ("4.50 GBP", "2026-10-19T12:45:00+00:00", 0.02),
+    "cheap_early": ("4.50 GBP", "2026-10-19T13:30:00+02:00", 0.03),  # 11:30 UTC
+    "broken": (None, None, 0.0),
+    "slow": ("1.00 GBP", None, 5.0),
+}
+
+
+def test_best_quote_is_cheapest_then_earliest():
+    quotes = [
+        {"id": "q1", "fee": "4.50 GBP", "estimated_dropoff_at": "2026-10-19T12:45:00+00:00"},
+        {"id": "q2", "fee": "4.50 GBP", "estimated_dropoff_at": "2026-10-19T13:30:00+02:00"},
+        {"id": "q3", "fee": "3.99 GBP"},
+        {"id": "q4", "fee": "not a price"},
+    ]
+    assert best_quote(quotes)["id"] == "q3"
+    assert best_quote(quotes[:2])["id"] == "q2"
+    assert best_quote([]) is None
+
+
+def create_app(hubrise_calls, accept_status=200):
+    async def carrier_api(request: httpx.Request) -> httpx.Response:
+        fee, eta, delay = CARRIERS[request.url.host.split(".")[0]]
+        await asyncio.sleep(delay)
+        if fee is None:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"fee": fee, "estimated_dropoff_at": eta})
+
+    async def hubrise_api(request: httpx.Request) -> httpx.Response:
+        hubrise_calls.append(request)
+        if request.url.path.endswith("/accept"):
+            return httpx.Response(accept_status, json={})
+        quote = json.loads(request.content)
+        return httpx.Response(201, json={
+            **quote, "id": f"q-{quote['carrier']}", "order_id": "o1", "location_id": "loc",
+        })
+
+    carriers_http = httpx.AsyncClient(transport=httpx.MockTransport(carrier_api))
+    hubrise_http = httpx.AsyncClient(transport=httpx.MockTransport(hubrise_api))
+
+    app = FastAPI()
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[get_http_client] = lambda: carriers_http
+    app.dependency_overrides[deliveries.client] = lambda: HubRiseClient(
+        "tok", hubrise_http, latency=LatencyTracker(), flights=SingleFlight())
+    app.include_router(deliveries.router)
+    return app
+
+
+def test_best_quote_route_within_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_CARRIERS", {
+        name: f"https://{name}.carrier.test/quote" for name in CARRIERS})
+    calls = []
+    client = TestClient(create_app(calls))
+
+    r = client.post("/deliveries/orders/o1/quotes/best", json={"deadline_ms": 200, "auto_accept": True})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert sorted(q["carrier"] for q in body["quotes"]) == ["cheap", "cheap_early", "fast"]
+    assert body["best"]["id"] == "q-cheap_early"
+    assert body["accepted"] is True
+    assert list(body["failed"]) == ["broken"]
+    assert body["timed_out"] == ["slow"]
+    assert calls[-1].url.path.endswith("/delivery_quotes/q-cheap_early/accept")
+
+
+def test_best_quote_route_restricts_carriers(monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_CARRIERS", {
+        name: f"https://{name}.carrier.test/quote" for name in CARRIERS})
+    calls = []
+    client = TestClient(create_app(calls))
+
+    r = client.post("/deliveries/orders/o1/quotes/best", json={"carriers": ["fast"], "deadline_ms": 200})
+
+    assert r.json()["best"]["carrier"] == "fast"
+    assert r.json()["accepted"] is False
+    assert len(calls) == 1
+
+
+def test_best_quote_route_reports_a_failed_accept(monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_CARRIERS", {
+        name: f"https://{name}.carrier.test/quote" for name in CARRIERS})
+    calls = []
+    client = TestClient(create_app(calls, accept_status=409))
+
+    r = client.post("/deliveries/orders/o1/quotes/best",
+                    json={"carriers": ["fast"], "deadline_ms": 200, "auto_accept": True})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["best"]["id"] == "q-fast"
+    assert body["accepted"] is False
+    assert "409" in body["accept_error"]
+
+
+def test_quote_writes_are_not_resent_after_server_errors(monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_CARRIERS", {
+        name: f"https://{name}.carrier.test/quote" for name in CARRIERS})
+    calls = []
+    client = TestClient(create_app(calls, accept_status=502))
+
+    r = client.post("/deliveries/orders/o1/quotes/best",
+                    json={"carriers": ["fast"], "deadline_ms": 200, "auto_accept": True})
+
+    # the accept may have gone through: it is reported, never sent twice
+    assert r.json()["accepted"] is False and "502" in r.json()["accept_error"]
+    assert [c.url.path.endswith("/accept") for c in calls] == [False, True]
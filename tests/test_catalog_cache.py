@@ -0,0 +1,196 @@
+import asyncio
+import json
+import pytest
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn
+from app.routers import catalog
+from app.services.catalog_cache import CatalogCache, etag_matches
+
+CATALOG = {"id": "cat1", "name": "Menu", "data": {"categories": [], "products": []}}
+
+
+class FakeHubRise:
+    """Mock HubRise catalog endpoint honouring If-None-Match."""
+
+    def __init__(self, body=CATALOG, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(0)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(200, json=self.body, headers={"ETag": self.etag})
+
+    def client(self) -> HubRiseClient:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self))
+        return HubRiseClient("tok", http, latency=LatencyTracker(), flights=SingleFlight())
+
+
+class TestEtagMatches:
+    def test_matches(self):
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x", "abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+
+    def test_no_match(self):
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches('"abd"', '"abc"')
+
+
+class TestCatalogCache:
+    def test_closing_a_tee_twice_keeps_a_newer_claim(self):
+        cache = CatalogCache(ttl=60, max_stale=0)
+        first = cache.tee("cat1")
+        assert cache.tee("cat1") is None
+
+        first.close()
+        second = cache.tee("cat1")
+        first.close()   # e.g. the stream's background release after commit
+
+        assert second is not None and cache._filling["cat1"] is second
+        assert cache.tee("cat1") is None
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_served_without_upstream_call(self):
+        upstream = FakeHubRise()
+        cache = CatalogCache(ttl=60, max_stale=0)
+        hr = upstream.client()
+
+        first = await cache.get(hr, "cat1")
+        second = await cache.get(hr, "cat1")
+
+        assert first is second
+        assert first.data == CATALOG
+        assert json.loads(first.raw) == CATALOG
+        assert len(upstream.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_revalidates_with_304(self):
+        upstream = FakeHubRise()
+        cache = CatalogCache(ttl=0, max_stale=0)
+        hr = upstream.client()
+
+        first = await cache.get(hr, "cat1")
+        second = await cache.get(hr, "cat1")
+
+        assert len(upstream.requests) == 2
+        assert upstream.requests[1].headers["If-None-Match"] == '"v1"'
+        assert second.raw is first.raw
+        assert second.etag == first.etag
+        assert cache.stats()["revalidated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_refreshing_in_background(self):
+        upstream = FakeHubRise()
+        cache = CatalogCache(ttl=0, max_stale=60)
+        hr = upstream.client()
+
+        first = await cache.get(hr, "cat1")
+        upstream.body = {**CATALOG, "name": "New menu"}
+        upstream.etag = '"v2"'
+
+        stale = await cache.get(hr, "cat1")
+        assert stale is first
+
+        await asyncio.sleep(0.01)
+        refreshed = cache.peek("cat1")
+        assert refreshed.data["name"] == "New menu"
+        assert refreshed.etag != first.etag
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self):
+        upstream = FakeHubRise()
+        cache = CatalogCache(ttl=60, max_stale=0)
+        hr = upstream.client()
+
+        entries = await asyncio.gather(*(cache.get(hr, "cat1") for _ in range(5)))
+
+        assert len({id(e) for e in entries}) == 1
+        assert len(upstream.requests) == 1
+
+
+def create_app(upstream: FakeHubRise) -> FastAPI:
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok", "catalog_id": "cat1"}
+    app.dependency_overrides[catalog.client] = upstream.client
+    app.include_router(catalog.router)
+    return app
+
+
+def test_catalog_route_etag_and_304(monkeypatch):
+    monkeypatch.setattr(catalog, "catalog_cache", CatalogCache(ttl=60, max_stale=0))
+    upstream = FakeHubRise()
+    client = TestClient(create_app(upstream))
+
+    r = client.get("/catalog")
+    assert r.status_code == 200
+    assert r.json() == CATALOG
+    etag = r.headers["ETag"]
+
+    r = client.get("/catalog", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+    assert len(upstream.requests) == 1
+
+
+def test_stream_route_forwards_and_tees_into_cache(monkeypatch):
+    cache = CatalogCache(ttl=60, max_stale=0)
+    monkeypatch.setattr(catalog, "catalog_cache", cache)
+    upstream = FakeHubRise()
+    client = TestClient(create_app(upstream))
+
+    r = client.get("/catalog/stream", params={"tee": "true"})
+    assert r.status_code == 200
+    assert r.json() == CATALOG
+    assert cache.peek("cat1").data == CATALOG
+    assert not cache._filling
+
+    # now served from the cache, with validators
+    r = client.get("/catalog/stream")
+    assert r.json() == CATALOG
+    assert "ETag" in r.headers
+    assert len(upstream.requests) == 1
+
+
+def test_stream_route_without_tee_leaves_cache_alone(monkeypatch):
+    cache = CatalogCache(ttl=60, max_stale=0)
+    monkeypatch.setattr(catalog, "catalog_cache", cache)
+    upstream = FakeHubRise()
+    client = TestClient(create_app(upstream))
+
+    r = client.get("/catalog/stream")
+    assert r.json() == CATALOG
+    assert cache.peek("cat1") is None
+
+
+@pytest.mark.asyncio
+async def test_stream_released_when_body_is_never_sent(monkeypatch):
+    cache = CatalogCache(ttl=60, max_stale=0)
+    monkeypatch.setattr(catalog, "catalog_cache", cache)
+    hr = FakeHubRise().client()
+    opened = []
+    open_stream = hr.open_stream
+
+    async def tracking_open_stream(*args, **kwargs):
+        opened.append(await open_stream(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(hr, "open_stream", tracking_open_stream)
+
+    response = await catalog.stream_catalog(catalog_id="cat1", hr=hr, tee=True, if_none_match=None)
+    assert list(cache._filling) == ["cat1"]
+
+    # the client disconnected before the body started: only the background task runs
+    await response.background()
+
+    assert not cache._filling
+    assert opened[0].is_closed
+    assert cache.peek("cat1") is None
@@ -0,0 +1,111 @@
+import copy
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn
+from app.routers import catalog
+from app.services.catalog_cache import CatalogCache
+from app.services.catalog_index import CatalogIndexRegistry, compile_catalog
+
+CATALOG = {
+    "id": "cat1",
+    "data": {
+        "categories": [{"id": "c1", "ref": "PIZZA", "name": "Pizzas"}],
+        "products": [
+            {
+                "id": "p1", "ref": "MARG", "name": "Margherita", "category_id": "c1", "category_ref": "PIZZA",
+                "skus": [
+                    {"id": "s1", "ref": "MARG-S", "name": "Small", "price": "8.50 GBP", "option_list_ids": ["ol1"]},
+                    {"id": "s2", "ref": "MARG-L", "name": "Large", "price": "11.00 GBP", "option_list_ids": ["ol1"]},
+                ],
+            },
+            {
+                "id": "p2", "ref": "PEP", "name": "Pepperoni", "category_id": "c1", "category_ref": "PIZZA",
+                "skus": [{"id": "s3", "ref": "PEP-L", "name": "Large", "price": "12.00 GBP"}],
+            },
+        ],
+        "option_lists": [
+            {"id": "ol1", "name": "Extras", "options": [
+                {"id": "o1", "ref": "CHEESE", "name": "Extra cheese", "price": "1.00 GBP"},
+                {"id": "o2", "ref": "OLIVES", "name": "Olives", "price": "0.50 GBP"},
+            ]},
+        ],
+    },
+}
+
+
+class TestCompileCatalog:
+    def test_indexes(self):
+        idx = compile_catalog("cat1", CATALOG)
+
+        sku = idx.sku_by_ref["MARG-L"]
+        assert sku.price == "11.00 GBP"
+        assert sku.product_id == "p1"
+        assert sku.product_name == "Margherita"
+        assert [ol["id"] for ol in idx.option_lists_for(sku)] == ["ol1"]
+        assert idx.skus["s3"].sku_ref == "PEP-L"
+
+        opt = idx.option_by_ref["OLIVES"]
+        assert opt.option_list_id == "ol1"
+        assert opt.price == "0.50 GBP"
+
+        assert idx.products_in_category("PIZZA") == ["p1", "p2"]
+        assert idx.products_in_category("c1") == ["p1", "p2"]
+
+    def test_incremental_rebuild_reuses_unchanged_products(self):
+        first = compile_catalog("cat1", CATALOG)
+        changed = copy.deepcopy(CATALOG)
+        changed["data"]["products"][1]["skus"][0]["price"] = "13.00 GBP"
+
+        second = compile_catalog("cat1", changed, previous=first)
+
+        assert second.sku_by_ref["MARG-S"] is first.sku_by_ref["MARG-S"]
+        assert second.sku_by_ref["PEP-L"] is not first.sku_by_ref["PEP-L"]
+        assert second.sku_by_ref["PEP-L"].price == "13.00 GBP"
+        assert second.option_by_ref["CHEESE"] is first.option_by_ref["CHEESE"]
+
+    def test_removed_product_disappears(self):
+        first = compile_catalog("cat1", CATALOG)
+        changed = copy.deepcopy(CATALOG)
+        del changed["data"]["products"][1]
+
+        second = compile_catalog("cat1", changed, previous=first)
+
+        assert "PEP-L" not in second.sku_by_ref
+        assert second.products_in_category("PIZZA") == ["p1"]
+
+
+def create_app(monkeypatch) -> FastAPI:
+    monkeypatch.setattr(catalog, "catalog_cache", CatalogCache(ttl=60, max_stale=0))
+    monkeypatch.setattr(catalog, "catalog_indexes", CatalogIndexRegistry())
+
+    def hubrise_client() -> HubRiseClient:
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=CATALOG))
+        return HubRiseClient("tok", httpx.AsyncClient(transport=transport),
+                             latency=LatencyTracker(), flights=SingleFlight())
+
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok", "catalog_id": "cat1"}
+    app.dependency_overrides[catalog.client] = hubrise_client
+    app.include_router(catalog.router)
+    return app
+
+
+def test_lookup_routes(monkeypatch):
+    client = TestClient(create_app(monkeypatch))
+
+    r = client.get("/catalog/skus/MARG-S")
+    assert r.status_code == 200
+    assert r.json()["price"] == "8.50 GBP"
+    assert r.json()["option_lists"][0]["id"] == "ol1"
+
+    r = client.get("/catalog/options/CHEESE")
+    assert r.status_code == 200
+    assert r.json()["option_list"]["name"] == "Extras"
+
+    r = client.get("/catalog/categories/PIZZA/products")
+    assert r.json()["product_ids"] == ["p1", "p2"]
+
+    assert client.get("/catalog/skus/NOPE").status_code == 404
+    assert client.get("/catalog/categories/NOPE/products").status_code == 404
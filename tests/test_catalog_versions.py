@@ -0,0 +1,111 @@
+import copy
+import json
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn
+from app.routers import catalog
+from app.services.catalog_cache import CatalogCache, compute_etag
+from app.services.catalog_index import CatalogIndexRegistry, compile_catalog
+from app.services.catalog_versions import CatalogVersionStore
+
+CATALOG = {
+    "id": "cat1",
+    "data": {
+        "categories": [{"id": "c1", "ref": "PIZZA", "name": "Pizzas"}],
+        "products": [
+            {"id": "p1", "name": "Margherita", "category_id": "c1", "skus": [
+                {"id": "s1", "ref": "MARG-S", "price": "8.50 GBP", "option_list_ids": ["ol1"]},
+                {"id": "s2", "ref": "MARG-L", "price": "11.00 GBP", "option_list_ids": ["ol1"]},
+            ]},
+            {"id": "p2", "name": "Pepperoni", "category_id": "c1", "skus": [
+                {"id": "s3", "ref": "PEP-L", "price": "12.00 GBP"},
+            ]},
+        ],
+        "option_lists": [{"id": "ol1", "name": "Extras", "options": [
+            {"id": "o1", "ref": "CHEESE", "name": "Extra cheese", "price": "1.00 GBP"},
+        ]}],
+    },
+}
+
+
+def index_of(body, previous=None):
+    raw = json.dumps(body).encode()
+    return compile_catalog("cat1", body, previous=previous, etag=compute_etag(raw)), raw
+
+
+class TestCatalogVersionStore:
+    def test_without_since_returns_full_snapshot(self):
+        store = CatalogVersionStore()
+        idx, raw = index_of(CATALOG)
+
+        body = json.loads(store.delta(idx, None, raw))
+
+        assert body["full"] is True
+        assert body["catalog"] == CATALOG
+        assert body["version"] == idx.etag.strip('"')
+
+    def test_delta_contains_only_changed_elements(self):
+        store = CatalogVersionStore()
+        v1, raw1 = index_of(CATALOG)
+        since = store.observe(v1)
+
+        changed = copy.deepcopy(CATALOG)
+        changed["data"]["products"][0]["skus"][1]["price"] = "11.50 GBP"
+        del changed["data"]["products"][1]
+        changed["data"]["option_lists"][0]["options"].append(
+            {"id": "o2", "ref": "OLIVES", "name": "Olives", "price": "0.50 GBP"})
+        v2, raw2 = index_of(changed, previous=v1)
+
+        body = json.loads(store.delta(v2, since, raw2))
+        changes = body["changes"]
+
+        assert body["full"] is False
+        assert body["since"] == since
+        assert [s["id"] for s in changes["skus"]["upserted"]] == ["s2"]
+        assert changes["skus"]["upserted"][0]["price"] == "11.50 GBP"
+        assert changes["skus"]["removed"] == ["s3"]
+        assert changes["products"] == {"upserted": [], "removed": ["p2"]}
+        assert [o["id"] for o in changes["options"]["upserted"]] == ["o2"]
+        assert changes["option_lists"] == {"upserted": [], "removed": []}
+        assert changes["categories"] == {"upserted": [], "removed": []}
+
+    def test_unknown_or_expired_since_gets_full_snapshot(self):
+        store = CatalogVersionStore(max_versions=2)
+        v1, _ = index_of(CATALOG)
+        old = store.observe(v1)
+        for price in ("9.00 GBP", "9.50 GBP"):
+            changed = copy.deepcopy(CATALOG)
+            changed["data"]["products"][0]["skus"][0]["price"] = price
+            idx, raw = index_of(changed)
+            store.observe(idx)
+
+        assert json.loads(store.delta(idx, old, raw))["full"] is True
+        assert json.loads(store.delta(idx, "nonsense", raw))["full"] is True
+
+
+def test_delta_route(monkeypatch):
+    monkeypatch.setattr(catalog, "catalog_cache", CatalogCache(ttl=60, max_stale=0))
+    monkeypatch.setattr(catalog, "catalog_indexes", CatalogIndexRegistry())
+    monkeypatch.setattr(catalog, "catalog_versions", CatalogVersionStore())
+
+    def hubrise_client() -> HubRiseClient:
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=CATALOG))
+        return HubRiseClient("tok", httpx.AsyncClient(transport=transport),
+                             latency=LatencyTracker(), flights=SingleFlight())
+
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok", "catalog_id": "cat1"}
+    app.dependency_overrides[catalog.client] = hubrise_client
+    app.include_router(catalog.router)
+    client = TestClient(app)
+
+    first = client.get("/catalog/delta").json()
+    assert first["full"] is True
+    assert first["catalog"] == CATALOG
+
+    second = client.get("/catalog/delta", params={"since": first["version"]}).json()
+    assert second["full"] is False
+    assert second["version"] == first["version"]
+    assert all(section == {"upserted": [], "removed": []} for section in second["changes"].values())
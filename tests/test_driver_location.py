@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pytest
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_location_id
+from app.routers import deliveries
+from app.services.driver_location import DriverLocationCoalescer
+
+
+def recording_client(sent):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        await asyncio.sleep(0)
+        return httpx.Response(200, json={})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return HubRiseClient("tok", http, latency=LatencyTracker(), flights=SingleFlight())
+
+
+class TestDriverLocationCoalescer:
+    @pytest.mark.asyncio
+    async def test_small_moves_coalesce_into_one_flush(self):
+        sent = []
+        hr = recording_client(sent)
+        coalescer = DriverLocationCoalescer(interval=60, min_move_meters=250)
+
+        coalescer.offer(hr, "loc", "o1", 51.5000, -0.1000)   # first fix goes straight out
+        await asyncio.sleep(0.01)
+        for i in range(1, 11):                               # ~11m apart, 110m in total
+            coalescer.offer(hr, "loc", "o1", 51.5000 + i * 0.0001, -0.1000)
+        await asyncio.sleep(0.01)
+        assert len(sent) == 1
+
+        await coalescer.flush_all()
+
+        assert sent[-1] == {"driver_latitude": 51.501, "driver_longitude": -0.1}
+        assert len(sent) == 2
+        assert coalescer.stats()["received"] == 11
+
+    @pytest.mark.asyncio
+    async def test_significant_move_flushes_immediately(self):
+        sent = []
+        hr = recording_client(sent)
+        coalescer = DriverLocationCoalescer(interval=60, min_move_meters=250)
+
+        coalescer.offer(hr, "loc", "o1", 51.500, -0.100)
+        await asyncio.sleep(0.01)
+        coalescer.offer(hr, "loc", "o1", 51.505, -0.100)     # ~550m
+        await asyncio.sleep(0.01)
+
+        assert [s["driver_latitude"] for s in sent] == [51.500, 51.505]
+
+    @pytest.mark.asyncio
+    async def test_stop_sends_last_fix(self):
+        sent = []
+        hr = recording_client(sent)
+        coalescer = DriverLocationCoalescer(interval=60, min_move_meters=250)
+        coalescer.start()
+
+        coalescer.offer(hr, "loc", "o1", 51.500, -0.100)
+        coalescer.offer(hr, "loc", "o1", 51.5001, -0.100)   # pending while the first is in flight
+        await coalescer.stop()
+
+        assert sent[-1]["driver_latitude"] == 51.5001
+        assert coalescer.stats()["pending"] == 0
+
+
+def test_driver_location_route_accepts_and_queues(monkeypatch):
+    coalescer = DriverLocationCoalescer(interval=60, min_move_meters=250)
+    monkeypatch.setattr(deliveries, "driver_locations", coalescer)
+    app = FastAPI()
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[deliveries.client] = lambda: recording_client([])
+    app.include_router(deliveries.router)
+    client = TestClient(app)
+
+    r = client.post("/deliveries/orders/o1/driver-location", json={"latitude": 51.5, "longitude": -0.1})
+    assert r.status_code == 202
+    assert coalescer.stats()["received"] == 1
+
+    r = client.post("/deliveries/orders/o1/driver-location", json={"latitude": 95, "longitude": -0.1})
+    assert r.status_code == 422
@@ -0,0 +1,111 @@
+import pytest
+from app.routers import events as events_router
+from app.services import callbacks
+from app.services.callbacks import CallbackEvent
+from app.services.events import EventBroker
+
+
+class TestEventBroker:
+    def test_one_frame_fanned_out_to_every_subscriber(self):
+        broker = EventBroker()
+        with broker.subscribe("order:o1") as a, broker.subscribe("order:o1") as b, \
+                broker.subscribe("order:o2") as other:
+            assert broker.publish("order:o1", "order.update", {"status": "accepted"}) == 2
+            frame_a, frame_b = a._queue.get_nowait(), b._queue.get_nowait()
+
+            assert frame_a is frame_b
+            assert frame_a.startswith(b"id: 1\nevent: order.update\ndata: ")
+            assert other._queue.empty()
+
+        assert broker.stats()["topics"] == 0
+
+    def test_slow_subscriber_drops_oldest(self):
+        broker = EventBroker(buffer=2)
+        with broker.subscribe("t") as sub:
+            for i in range(3):
+                broker.publish("t", "tick", {"i": i})
+
+            frames = [sub._queue.get_nowait() for _ in range(2)]
+
+        assert sub.dropped == 1
+        assert [f.split(b"\n")[0] for f in frames] == [b"id: 2", b"id: 3"]
+
+
+@pytest.mark.asyncio
+async def test_callback_reaches_order_and_location_watchers(monkeypatch):
+    broker = EventBroker()
+    monkeypatch.setattr(callbacks, "event_broker", broker)
+    event = CallbackEvent.from_body({
+        "resource_type": "delivery", "event_type": "update", "order_id": "o1",
+        "location_id": "loc", "new_state": {"status": "delivered"},
+    })
+
+    with broker.subscribe("order:o1") as order_sub, broker.subscribe("location:loc") as loc_sub:
+        await callbacks.publish_event(event)
+
+        assert b"event: delivery.update" in order_sub._queue.get_nowait()
+        assert b'"status":"delivered"' in loc_sub._queue.get_nowait()
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_sends_events_and_heartbeats(monkeypatch):
+    broker = EventBroker()
+    monkeypatch.setattr(events_router, "event_broker", broker)
+    monkeypatch.setattr(events_router.settings, "EVENTS_HEARTBEAT_SECONDS", 0.01)
+
+    frames = events_router.sse_response("order:o1").body_iterator
+    assert await frames.__anext__() == b"retry: 3000\n\n"
+    assert broker.stats()["subscribers"] == 1
+
+    assert await frames.__anext__() == b": keepalive\n\n"
+    broker.publish("order:o1", "order.update", {"status": "accepted"})
+    assert b"event: order.update" in await frames.__anext__()
+
+    await frames.aclose()
+    assert broker.stats()["subscribers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_streams_are_limited_to_the_callers_location(monkeypatch):
+    from types import SimpleNamespace
+
+    import httpx
+    from fastapi import HTTPException
+    from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        found = request.url.path == "/v1/locations/loc1/orders/o1"
+        return httpx.Response(200 if found else 404, json={"id": "o1"} if found else {"message": "Not found"})
+
+    async def get_submission(submission_id):
+        return SimpleNamespace(location_id="loc2") if submission_id == "s1" else None
+
+    monkeypatch.setattr(events_router.order_store, "enabled", False)
+    monkeypatch.setattr(events_router.order_outbox, "get", get_submission)
+    hr = HubRiseClient("tok", httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                       latency=LatencyTracker(), flights=SingleFlight())
+
+    ok = await events_router.order_events("o1", location_id="loc1", hr=hr)
+    await ok.body_iterator.aclose()
+    for call in (events_router.order_events("o2", location_id="loc1", hr=hr),
+                 events_router.location_events("loc2", own_location_id="loc1"),
+                 events_router.submission_events("s1", location_id="loc1"),
+                 events_router.submission_events("nope", location_id="loc1")):
+        with pytest.raises(HTTPException) as exc:
+            await call
+        assert exc.value.status_code == 404
+
+
+def test_stats_need_the_internal_token(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.core.deps import get_hubrise_conn
+
+    monkeypatch.setattr(events_router.settings, "INTERNAL_API_TOKEN", "internal")
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.include_router(events_router.router)
+    client = TestClient(app)
+
+    assert client.get("/events/stats").status_code == 401
+    assert client.get("/events/stats", headers={"X-Internal-Token": "internal"}).status_code == 200
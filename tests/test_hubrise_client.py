@@ -0,0 +1,234 @@
+import asyncio
+import pytest
+import httpx
+from app.clients.hubrise import HubRiseClient, LatencyTracker, HedgeBudget, SingleFlight
+
+
+def make_client(handler, **kwargs) -> HubRiseClient:
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return HubRiseClient(access_token="tok", http=http, **kwargs)
+
+
+def warm_tracker(endpoint: str, seconds: float, n: int = 20) -> LatencyTracker:
+    tracker = LatencyTracker(min_samples=n)
+    for _ in range(n):
+        tracker.record(endpoint, seconds)
+    return tracker
+
+
+class TestLatencyTracker:
+    def test_p95_needs_min_samples(self):
+        tracker = LatencyTracker(min_samples=5)
+        for _ in range(4):
+            tracker.record("get_location", 0.01)
+        assert tracker.p95("get_location") is None
+        tracker.record("get_location", 0.01)
+        assert tracker.p95("get_location") == pytest.approx(0.01)
+
+    def test_p95_ignores_outliers(self):
+        tracker = LatencyTracker(min_samples=1)
+        for i in range(100):
+            tracker.record("retrieve_order", 1.0 if i == 99 else 0.01)
+        assert tracker.p95("retrieve_order") == pytest.approx(0.01)
+
+
+class TestHedgeBudget:
+    def test_budget_limits_hedges(self):
+        budget = HedgeBudget(ratio=0.25, burst=1.0)
+        assert budget.try_spend() is True
+        assert budget.try_spend() is False
+        for _ in range(4):
+            budget.earn()
+        assert budget.try_spend() is True
+        assert budget.stats() == {"hedges_sent": 2, "hedges_won": 0, "hedges_denied": 1}
+
+
+class TestHedgedGet:
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            if len(calls) == 1:
+                await asyncio.sleep(0.5)
+            return httpx.Response(200, json={"id": "o1", "attempt": len(calls)})
+
+        budget = HedgeBudget(ratio=0.1, burst=1.0)
+        hr = make_client(handler, hedge=True, latency=warm_tracker("retrieve_order", 0.02), budget=budget)
+
+        data = await hr.retrieve_order("loc", "o1")
+
+        assert data["attempt"] == 2
+        assert len(calls) == 2
+        assert budget.hedges_won == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_latency_history(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"id": "loc"})
+
+        hr = make_client(handler, hedge=True, latency=LatencyTracker(), budget=HedgeBudget())
+
+        assert await hr.get_location("loc") == {"id": "loc"}
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_waits_for_primary(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, json={"id": "cat"})
+
+        budget = HedgeBudget(ratio=0.0, burst=0.0)
+        hr = make_client(handler, hedge=True, latency=warm_tracker("get_catalog", 0.01), budget=budget)
+
+        assert await hr.get_catalog("cat") == {"id": "cat"}
+        assert len(calls) == 1
+        assert budget.hedges_denied == 1
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_reads_share_one_call(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"id": "o1"})
+
+        flights = SingleFlight()
+        hr = make_client(handler, flights=flights, latency=LatencyTracker())
+
+        results = await asyncio.gather(*(hr.retrieve_order("loc", "o1") for _ in range(10)))
+
+        assert len(calls) == 1
+        assert all(r == {"id": "o1"} for r in results)
+        assert flights.stats() == {"leaders": 1, "collapsed": 9, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_different_params_and_tokens_are_not_collapsed(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=[])
+
+        flights = SingleFlight()
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        a = HubRiseClient("tok-a", http, flights=flights, latency=LatencyTracker())
+        b = HubRiseClient("tok-b", http, flights=flights, latency=LatencyTracker())
+
+        await asyncio.gather(
+            a.list_orders(location_id="loc", params={"status": "new"}),
+            a.list_orders(location_id="loc", params={"status": "accepted"}),
+            b.list_orders(location_id="loc", params={"status": "new"}),
+        )
+
+        assert len(calls) == 3
+        assert flights.collapsed == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_and_not_cached(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.01)
+            return httpx.Response(404, json={"message": "not found"})
+
+        flights = SingleFlight()
+        hr = make_client(handler, flights=flights, latency=LatencyTracker())
+
+        results = await asyncio.gather(
+            *(hr.retrieve_order("loc", "missing") for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+        assert len(calls) == 1
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await hr.retrieve_order("loc", "missing")
+        assert len(calls) == 2
+
+
+class TestRawPassthrough:
+    @pytest.mark.asyncio
+    async def test_get_raw_returns_upstream_bytes(self):
+        payload = b'{"id":"o1","total":"8.50 GBP"}'
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=payload, headers={"Content-Type": "application/json; charset=utf-8"})
+
+        hr = make_client(handler, flights=SingleFlight(), latency=LatencyTracker())
+
+        body = await hr.retrieve_order_raw("loc", "o1")
+
+        assert body.content == payload
+        assert body.media_type == "application/json; charset=utf-8"
+
+    @pytest.mark.asyncio
+    async def test_raw_and_parsed_reads_are_collapsed_separately(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"id": "o1"})
+
+        hr = make_client(handler, flights=SingleFlight(), latency=LatencyTracker())
+
+        parsed, raw = await asyncio.gather(hr.retrieve_order("loc", "o1"), hr.retrieve_order_raw("loc", "o1"))
+
+        assert parsed == {"id": "o1"}
+        assert raw.content == b'{"id":"o1"}'
+        assert len(calls) == 2
+
+
+def paged_handler(pages, calls, delay=0.0):
+    """Serve `pages` (lists of orders) behind HubRise-style X-Cursor-Next headers."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        cursor = request.url.params.get("cursor")
+        calls.append(cursor)
+        await asyncio.sleep(delay)
+        i = int(cursor) if cursor else 0
+        headers = {"X-Cursor-Next": str(i + 1)} if i + 1 < len(pages) else {}
+        return httpx.Response(200, json=pages[i], headers=headers)
+
+    return handler
+
+
+class TestOrderPagination:
+    @pytest.mark.asyncio
+    async def test_iter_orders_follows_cursors(self):
+        pages = [[{"id": f"o{p}{i}"} for i in range(2)] for p in range(3)]
+        calls = []
+        hr = make_client(paged_handler(pages, calls), flights=SingleFlight(), latency=LatencyTracker())
+
+        ids = [o["id"] async for o in hr.iter_orders(location_id="loc", params={"status": "new"}, count=2)]
+
+        assert ids == ["o00", "o01", "o10", "o11", "o20", "o21"]
+        assert calls == [None, "1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_next_page_is_prefetched(self):
+        pages = [[{"id": "a"}], [{"id": "b"}]]
+        calls = []
+        hr = make_client(paged_handler(pages, calls, delay=0.01), flights=SingleFlight(), latency=LatencyTracker())
+
+        it = hr.iter_order_pages(location_id="loc")
+        first = await it.__anext__()
+        await asyncio.sleep(0.05)  # caller busy with page 1; page 2 is already on its way
+
+        assert first == [{"id": "a"}]
+        assert calls == [None, "1"]
+        assert await it.__anext__() == [{"id": "b"}]
+        await it.aclose()
+
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import pytest
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_access_token, get_hubrise_conn, get_location_id
+from app.routers import orders
+from app.services.idempotency import IdempotencyConflict, IdempotencyStore, idempotency_key
+
+
+class TestIdempotencyStore:
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_call_then_replay(self):
+        store = IdempotencyStore(ttl=60)
+        calls = []
+
+        async def create():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": "o1"}
+
+        results = await asyncio.gather(*(store.run("k", "fp", create) for _ in range(5)))
+        later, replayed = await store.run("k", "fp", create)
+
+        assert len(calls) == 1
+        assert [r[1] for r in results].count(False) == 1
+        assert later == {"id": "o1"} and replayed
+        assert store.stats() == {"entries": 1, "in_flight": 0, "executed": 1, "replayed": 1, "coalesced": 4}
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_remembered(self):
+        store = IdempotencyStore(ttl=60)
+        outcomes = [RuntimeError("upstream down"), {"id": "o1"}]
+
+        async def create():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with pytest.raises(RuntimeError):
+            await store.run("k", "fp", create)
+        assert await store.run("k", "fp", create) == ({"id": "o1"}, False)
+
+    @pytest.mark.asyncio
+    async def test_key_reuse_with_another_body_conflicts(self):
+        store = IdempotencyStore(ttl=60)
+
+        async def create():
+            return {"id": "o1"}
+
+        await store.run("k", "fp1", create)
+        with pytest.raises(IdempotencyConflict):
+            await store.run("k", "fp2", create)
+
+
+def test_idempotency_key_prefers_header():
+    assert idempotency_key(" abc ", {"private_ref": "R1"}) == "key:abc"
+    assert idempotency_key(None, {"private_ref": "R1"}) == "private_ref:R1"
+    assert idempotency_key("", {}) is None
+
+
+def make_app(monkeypatch, handler):
+    monkeypatch.setattr(orders, "idempotency_store", IdempotencyStore(ttl=60))
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.dependency_overrides[get_access_token] = lambda: "tok"
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[orders.client] = lambda: HubRiseClient(
+        "tok", http, latency=LatencyTracker(), flights=SingleFlight())
+    app.include_router(orders.router)
+    return app
+
+
+def test_repeated_create_order_is_replayed(monkeypatch):
+    created = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        created.append(json.loads(request.content))
+        return httpx.Response(201, json={"id": f"o{len(created)}"})
+
+    client = TestClient(make_app(monkeypatch, handler))
+    order = {"status": "new", "private_ref": "R1"}
+
+    first = client.post("/orders", json=order)
+    second = client.post("/orders", json=order)
+    other = client.post("/orders", json={**order, "customer_notes": "extra napkins"})
+
+    assert first.json() == second.json() == {"id": "o1"}
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert other.status_code == 422
+    assert len(created) == 1
+
+
+def test_sync_and_async_share_idempotency_keys(monkeypatch):
+    created = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        created.append(json.loads(request.content))
+        return httpx.Response(201, json={"id": "o1"})
+
+    monkeypatch.setattr(orders, "order_outbox", None)   # would fail if the async path ran
+    client = TestClient(make_app(monkeypatch, handler))
+    headers = {"Idempotency-Key": "k1"}
+
+    first = client.post("/orders", json={"status": "new"}, headers=headers)
+    again = client.post("/orders", json={"status": "new"}, headers={**headers, "Prefer": "respond-async"})
+
+    assert first.status_code == again.status_code == 200
+    assert again.json() == {"id": "o1"} and again.headers["Idempotent-Replayed"] == "true"
+    assert len(created) == 1
+
+
+def test_create_order_is_not_retried_after_server_error(monkeypatch):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(502, json={"error": "bad gateway"})
+
+    client = TestClient(make_app(monkeypatch, handler))
+
+    r = client.post("/orders", json={"status": "new"}, headers={"Idempotency-Key": "k1"})
+
+    assert r.status_code == 502
+    assert len(calls) == 1
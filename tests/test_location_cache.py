@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_hubrise_conn
+from app.routers import catalog
+from app.services.location_cache import LocationCache, OpeningSchedule
+
+LONDON = ZoneInfo("Europe/London")
+
+HOURS = {
+    "monday": [{"from": "11:00", "to": "14:00"}, {"from": "18:00", "to": "22:00"}],
+    "friday": [{"from": "18:00", "to": "02:00"}],
+    "sunday": [{"from": "20:00", "to": "01:00"}],
+}
+
+
+def location(location_id="loc1", hours=HOURS):
+    return {
+        "id": location_id,
+        "name": "Hut Bite",
+        "timezone": {"name": "Europe/London", "offset": 3600},
+        "opening_hours": hours,
+        "cutoff_time": "21:45",
+    }
+
+
+def utc(s: str) -> datetime:
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+
+
+class TestOpeningSchedule:
+    def test_compiles_sorted_merged_intervals(self):
+        hours = {
+            "tuesday": [{"from": "12:00", "to": "15:00"}, {"from": "14:00", "to": "16:00"}],
+            "monday": [{"from": "09:00", "to": "10:00"}],
+            "someday": [{"from": "09:00", "to": "10:00"}],
+        }
+        s = OpeningSchedule.compile(hours, LONDON)
+        assert s.starts == (540, 1440 + 720)
+        assert s.ends == (600, 1440 + 960)
+
+    def test_overnight_and_sunday_wraparound(self):
+        s = OpeningSchedule.compile(HOURS, LONDON)
+        # 2026-10-24 is a Saturday; Friday's slot runs to 02:00 local (BST)
+        assert s.is_open(utc("2026-10-24T00:30"))
+        assert not s.is_open(utc("2026-10-24T01:30"))
+        # Sunday 20:00-01:00 continues into Monday morning (GMT after the change)
+        assert s.is_open(utc("2026-10-26T00:30"))
+        assert not s.is_open(utc("2026-10-26T01:30"))
+
+    def test_next_change(self):
+        s = OpeningSchedule.compile(HOURS, LONDON)
+        # Monday 2026-10-19 12:00 BST: open until 14:00 BST
+        assert s.is_open(utc("2026-10-19T11:00"))
+        assert s.next_change(utc("2026-10-19T11:00")) == utc("2026-10-19T13:00")
+        # Monday 15:00 BST: closed until 18:00 BST
+        assert s.next_change(utc("2026-10-19T14:00")) == utc("2026-10-19T17:00")
+        # Monday 23:00 BST: closed until Friday 18:00 BST
+        assert s.next_change(utc("2026-10-19T22:00")) == utc("2026-10-23T17:00")
+        # Sunday 2026-10-25 21:00 GMT: open through midnight until 01:00 GMT
+        assert s.next_change(utc("2026-10-25T21:00")) == utc("2026-10-26T01:00")
+
+    def test_never_open(self):
+        s = OpeningSchedule.compile(None, LONDON)
+        assert not s.is_open(utc("2026-10-19T12:00"))
+        assert s.next_change(utc("2026-10-19T12:00")) is None
+
+
+class FakeHubRise:
+    def __init__(self, locations):
+        self.locations = {loc["id"]: loc for loc in locations}
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(0)
+        location_id = request.url.path.rsplit("/", 1)[-1]
+        if location_id not in self.locations or request.headers["X-Access-Token"] != "tok":
+            return httpx.Response(404, json={"message": "Not found"})
+        return httpx.Response(200, json=self.locations[location_id])
+
+    def client(self, token: str = "tok") -> HubRiseClient:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self))
+        return HubRiseClient(token, http, latency=LatencyTracker(), flights=SingleFlight())
+
+
+class TestLocationCache:
+    @pytest.mark.asyncio
+    async def test_fresh_entry_served_without_upstream_call(self):
+        upstream = FakeHubRise([location()])
+        cache = LocationCache(ttl=60, max_stale=0)
+        hr = upstream.client()
+
+        entries = await asyncio.gather(*(cache.get(hr, "loc1") for _ in range(5)))
+        again = await cache.get(hr, "loc1")
+
+        assert all(e is again for e in entries)
+        assert again.schedule.tz.key == "Europe/London"
+        assert len(upstream.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_refetches(self):
+        upstream = FakeHubRise([location()])
+        cache = LocationCache(ttl=60, max_stale=60)
+        hr = upstream.client()
+
+        await cache.get(hr, "loc1")
+        upstream.locations["loc1"] = location(hours={})
+        cache.invalidate("loc1")
+        refreshed = await cache.get(hr, "loc1")
+
+        assert len(upstream.requests) == 2
+        assert refreshed.schedule.starts == ()
+
+
+    @pytest.mark.asyncio
+    async def test_entries_are_per_token(self):
+        upstream = FakeHubRise([location()])
+        cache = LocationCache(ttl=60, max_stale=0)
+        await cache.get(upstream.client(), "loc1")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await cache.get(upstream.client("other-tenant"), "loc1")
+        assert len(upstream.requests) == 2
+
+
+def create_app(upstream: FakeHubRise) -> FastAPI:
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok", "location_id": "loc1"}
+    app.dependency_overrides[catalog.client] = upstream.client
+    app.include_router(catalog.router)
+    return app
+
+
+def test_hours_routes_share_one_fetch(monkeypatch):
+    monkeypatch.setattr(catalog, "location_cache", LocationCache(ttl=60, max_stale=0))
+    upstream = FakeHubRise([location()])
+    client = TestClient(create_app(upstream))
+
+    hours = client.get("/catalog/hours")
+    assert hours.status_code == 200
+    assert hours.json()["opening_hours"] == HOURS
+
+    status = client.get("/catalog/hours/status", params={"at": "2026-10-19T11:00:00Z"})
+    assert status.status_code == 200
+    assert status.json() == {
+        "location_id": "loc1",
+        "open": True,
+        "next_change": "2026-10-19T13:00:00+00:00",
+        "timezone": "Europe/London",
+    }
+    assert len(upstream.requests) == 1
+
+    naive = client.get("/catalog/hours/status", params={"at": "2026-10-19T11:00:00"})
+    assert naive.status_code == 422
+
+
+def test_batch_status_reports_unreadable_locations(monkeypatch):
+    monkeypatch.setattr(catalog, "location_cache", LocationCache(ttl=60, max_stale=0))
+    upstream = FakeHubRise([location(), location("loc2", hours={})])
+    client = TestClient(create_app(upstream))
+
+    r = client.get(
+        "/catalog/hours/status/batch",
+        params=[("location_id", "loc1"), ("location_id", "loc2"), ("location_id", "nope"),
+                ("at", "2026-10-19T11:00:00Z")],
+    )
+
+    assert r.status_code == 200
+    by_id = {loc["location_id"]: loc for loc in r.json()["locations"]}
+    assert by_id["loc1"]["open"] is True
+    assert by_id["loc2"]["open"] is False and by_id["loc2"]["next_change"] is None
+    assert by_id["nope"] == {"location_id": "nope", "error": 404}
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.deps import get_location_id
+from app.routers import analytics
+from app.services import order_analytics as analytics_service
+from app.services.order_analytics import (
+    LocationOrders, OrderAnalytics, basket_summary, pence, sales_by_interval, top_items,
+)
+
+T0 = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def order(order_id, minutes, total, items, status="completed"):
+    return {
+        "id": order_id, "status": status, "total": total,
+        "created_at": (T0 + timedelta(minutes=minutes)).isoformat(),
+        "items": [{"product_name": name, "quantity": str(qty), "price": price, "subtotal": subtotal}
+                  for name, qty, price, subtotal in items],
+    }
+
+
+ORDERS = [
+    order("o1", 5, "20.00 GBP", [("Margherita", 2, "8.50 GBP", "17.00 GBP"), ("Cola", 1, "3.00 GBP", "3.00 GBP")]),
+    order("o2", 50, "11.00 GBP", [("Pepperoni", 1, "11.00 GBP", "11.00 GBP")]),
+    order("o3", 130, "8.50 GBP", [("Margherita", 1, "8.50 GBP", "8.50 GBP")]),
+    order("o4", 140, "99.00 GBP", [("Margherita", 9, "11.00 GBP", "99.00 GBP")], status="cancelled"),
+]
+
+
+def loaded() -> LocationOrders:
+    loc = LocationOrders()
+    loc.ingest(ORDERS)
+    return loc
+
+
+def test_pence():
+    assert pence("8.50 GBP") == 850
+    assert pence("-1.5") == -150
+    assert pence("junk") == pence(None) == 0
+
+
+def test_sales_by_hour_and_day():
+    loc = loaded()
+    hours = sales_by_interval(loc, T0, T0 + timedelta(hours=3), "hour", "Europe/London")
+
+    assert [(b["start"], b["orders"], b["sales"]) for b in hours] == [
+        ("2026-10-18T13:00:00+01:00", 2, "31.00 GBP"),
+        ("2026-10-18T14:00:00+01:00", 0, "0.00 GBP"),
+        ("2026-10-18T15:00:00+01:00", 1, "8.50 GBP"),   # o4 was cancelled
+    ]
+    days = sales_by_interval(loc, T0, T0 + timedelta(hours=3), "day", "Europe/London")
+    assert days == [{"start": "2026-10-18", "orders": 3, "sales": "39.50 GBP"}]
+
+
+def test_basket_and_top_items():
+    loc = loaded()
+    end = T0 + timedelta(hours=3)
+
+    assert basket_summary(loc, T0, end) == {"orders": 3, "sales": "39.50 GBP",
+                                            "average_basket": "13.17 GBP", "average_items": 1.67}
+    assert [(i["product_name"], i["quantity"]) for i in top_items(loc, T0, end)] == [
+        ("Margherita", 3.0), ("Cola", 1.0), ("Pepperoni", 1.0)]
+    assert top_items(loc, T0, end, limit=1, by="sales")[0] == {
+        "product_name": "Margherita", "quantity": 3.0, "sales": "25.50 GBP"}
+
+
+def test_updates_replace_items_and_compaction_keeps_results():
+    loc = loaded()
+    loc.ingest([order("o2", 50, "22.00 GBP", [("Pepperoni", 2, "11.00 GBP", "22.00 GBP")])])
+    loc.ingest([{"id": "o3", "created_at": ORDERS[2]["created_at"], "status": "rejected"}])
+    end = T0 + timedelta(hours=3)
+    before = (basket_summary(loc, T0, end), top_items(loc, T0, end))
+
+    assert before[0]["sales"] == "42.00 GBP"
+    assert loc.dead_items == 1
+    loc.compact(int(T0.timestamp()) + 600)   # also drops o1
+
+    assert loc.dead_items == 0 and loc.ids == ["o2", "o3", "o4"]
+    assert loc.item_span == [(2, 3), (0, 1), (1, 2)]   # o2's replacement lines came last
+    assert basket_summary(loc, T0, end)["sales"] == "22.00 GBP"
+    assert np.array_equal(loc.item_order.view, [1, 2, 0])
+
+
+def test_router_backfills_then_serves_from_memory(monkeypatch):
+    now = datetime.now(timezone.utc)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params.get("after"))
+        return httpx.Response(200, json=[
+            {"id": "r1", "status": "accepted", "total": "10.00 GBP", "created_at": (now - timedelta(hours=1)).isoformat(),
+             "items": [{"product_name": "Chips", "quantity": "2", "price": "5.00 GBP"}]},
+        ])
+
+    monkeypatch.setattr(analytics_service, "order_analytics", OrderAnalytics(max_staleness=60))
+    monkeypatch.setattr(analytics, "order_analytics", analytics_service.order_analytics)
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = FastAPI()
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[analytics.client] = lambda: HubRiseClient(
+        "tok", http, latency=LatencyTracker(), flights=SingleFlight())
+    app.include_router(analytics.router)
+    client = TestClient(app)
+
+    assert client.get("/analytics/basket").json()["average_basket"] == "10.00 GBP"
+    assert client.get("/analytics/top-items").json()["items"][0]["product_name"] == "Chips"
+    assert len(client.get("/analytics/sales").json()["buckets"]) in (24, 25)   # partial hours at both ends
+    assert client.get("/analytics/sales", params={"tz": "Mars/Base"}).status_code == 400
+    assert client.get("/analytics/sales", params={"since": "0001-01-01T00:00:00Z"}).status_code == 422
+    assert len(calls) == 1
+
+    monkeypatch.setattr(analytics.settings, "INTERNAL_API_TOKEN", "internal")
+    assert client.get("/analytics/stats").status_code == 401
+    assert client.get("/analytics/stats", headers={"X-Internal-Token": "internal"}).json()["loc"]["orders"] == 1
+
+
+def test_callbacks_only_touch_tracked_locations():
+    store = OrderAnalytics()
+    assert store.ingest("loc", ORDERS) == 0
+    store._locations["loc"] = LocationOrders()
+    assert store.ingest("loc", ORDERS) == 4
@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import io
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.order_export import COLUMNS, CsvExport, export_orders, flatten_order
+from benchmarks.fixtures import make_orders
+from tests.test_orders_router import create_app, paged_handler
+
+ORDER = {
+    "id": "o1", "location_id": "loc", "created_at": "2026-10-18T19:30:00+01:00", "status": "completed",
+    "total": "20.50 GBP",
+    "items": [
+        {"product_name": "Margherita", "sku_name": "Small", "sku_ref": "MARG-S", "price": "8.50 GBP",
+         "quantity": "2", "subtotal": "21.00 GBP",
+         "options": [{"name": "Extra cheese", "ref": "CHEESE", "price": "1.00 GBP", "quantity": 2},
+                     {"name": "Olives", "price": "0.50 GBP", "removed": True}]},
+        {"product_name": "Gone", "price": "1.00 GBP", "quantity": "1", "deleted": True},
+    ],
+    "charges": [{"name": "Delivery", "price": "2.50 GBP"}],
+    "discounts": [{"name": "Promo", "price_off": "3.00 GBP"}],
+    "payments": [{"name": "Card", "amount": "20.50 GBP"}],
+}
+
+
+def test_flatten_order():
+    rows = [dict(zip(COLUMNS, row)) for row in flatten_order(ORDER)]
+
+    assert [(r["line_type"], r["line_no"], r["parent_line_no"]) for r in rows] == [
+        ("item", 0, None), ("option", 0, 0), ("charge", 0, None), ("discount", 0, None), ("payment", 0, None)]
+    assert rows[0]["amount"] == Decimal("21.00") and rows[0]["quantity"] == Decimal("2")
+    assert rows[1]["amount"] == Decimal("2.00")
+    assert rows[3]["amount"] == Decimal("-3.00")
+    assert {(r["order_id"], r["order_total"], r["currency"]) for r in rows} == {("o1", Decimal("20.50"), "GBP")}
+
+    bare = list(flatten_order({"id": "o2", "status": "new"}))
+    assert len(bare) == 1 and bare[0][COLUMNS.index("line_type")] == "order"
+
+
+def test_export_writes_incrementally():
+    async def pages():
+        for _ in range(3):
+            yield make_orders(10)
+
+    async def run():
+        return [chunk async for chunk in export_orders(pages(), CsvExport(), batch_rows=50)]
+
+    chunks = asyncio.run(run())
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+
+    assert rows[0] == list(COLUMNS)
+    assert len(rows) == 1 + 3 * 10 * 7   # 3 items + 3 options + 1 payment per order
+    assert len(chunks) > 2
+
+
+def test_export_endpoint_csv_and_parquet():
+    pq = pytest.importorskip("pyarrow.parquet")
+    pages = [make_orders(100)[:60], make_orders(100)[60:]]
+    client = TestClient(create_app(paged_handler(pages, [])))
+
+    r = client.get("/orders/export", params={"after": "2026-10-01T00:00:00Z"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"] == 'attachment; filename="orders-loc.csv"'
+    assert len(r.text.splitlines()) == 1 + 100 * 7
+
+    r = client.get("/orders/export", params={"format": "parquet"})
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.num_rows == 100 * 7
+    assert str(table.schema.field("amount").type) == "decimal128(18, 2)"
+
+    assert client.get("/orders/export", params={"source": "mirror"}).status_code == 409
+    assert client.get("/orders/export", params={"format": "xlsx"}).status_code == 422
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+import httpx
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.services.order_fanout import created_at_key, fan_out_orders, merge_by_created_at
+
+
+async def stream(orders, delay=0.0):
+    for order in orders:
+        await asyncio.sleep(delay)
+        yield order
+
+
+def order(oid, created_at):
+    return {"id": oid, "created_at": created_at}
+
+
+class TestCreatedAtKey:
+    def test_offsets_are_normalised(self):
+        london = order("a", "2026-10-01T12:00:00+01:00")
+        paris = order("b", "2026-10-01T12:30:00+02:00")
+        assert created_at_key(london) > created_at_key(paris)
+
+    def test_missing_or_bad_value_sorts_last(self):
+        assert created_at_key({}) < created_at_key(order("a", "2001-01-01T00:00:00Z"))
+        assert created_at_key(order("a", "yesterday")) == created_at_key({})
+
+
+class TestMergeByCreatedAt:
+    @pytest.mark.asyncio
+    async def test_newest_first_across_streams(self):
+        a = [order("a3", "2026-10-01T12:00:00+00:00"), order("a1", "2026-10-01T09:00:00+00:00")]
+        b = [order("b2", "2026-10-01T11:00:00+00:00"), order("b0", "2026-10-01T08:00:00+00:00")]
+        c = []
+
+        merged = [o["id"] async for o in merge_by_created_at([stream(a), stream(b), stream(c)])]
+
+        assert merged == ["a3", "b2", "a1", "b0"]
+
+    @pytest.mark.asyncio
+    async def test_heads_are_fetched_concurrently(self):
+        streams = [stream([order(f"s{i}", f"2026-10-01T0{i}:00:00+00:00")], delay=0.05) for i in range(5)]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        merged = merge_by_created_at(streams)
+        first = await merged.__anext__()
+
+        assert first["id"] == "s4"
+        assert loop.time() - started < 0.15
+        await merged.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        loc = request.url.path.split("/")[-2]
+        return httpx.Response(200, json=[order(f"{loc}-1", "2026-10-01T10:00:00+00:00")])
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    hr = HubRiseClient("tok", http, latency=LatencyTracker(), flights=SingleFlight())
+
+    ids = [o["id"] async for o in fan_out_orders(hr, [f"loc{i}" for i in range(8)], concurrency=2)]
+
+    assert sorted(ids) == sorted(f"loc{i}-1" for i in range(8))
+    assert peak <= 2
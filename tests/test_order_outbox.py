@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+from app.core.db import init_db
+from app.core.deps import get_access_token, get_hubrise_conn, get_location_id
+from app.routers import orders
+from app.services import order_outbox as outbox_module
+from app.services.events import EventBroker
+from app.services.order_outbox import OrderOutbox, submission_topic
+
+
+class FakeUpstream:
+    """HubRise create_order plus a client callback receiver."""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.created = []
+        self.callbacks = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == "client.test":
+            self.callbacks.append(json.loads(request.content))
+            return httpx.Response(204)
+        status = self.statuses.pop(0)
+        if status != 201:
+            return httpx.Response(status, json={"error": "nope"})
+        self.created.append(json.loads(request.content))
+        return httpx.Response(201, json={"id": "hr1", **self.created[-1]})
+
+
+def make_outbox(upstream, **kwargs) -> OrderOutbox:
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    outbox = OrderOutbox(bind, backoff_base=60, **kwargs)
+    outbox._http = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return outbox
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = EventBroker()
+    monkeypatch.setattr(outbox_module, "event_broker", broker)
+    return broker
+
+
+class TestOrderOutbox:
+    @pytest.mark.asyncio
+    async def test_submission_is_published_and_called_back(self, broker, monkeypatch):
+        monkeypatch.setattr(outbox_module.settings, "ORDER_CALLBACK_ALLOWED_HOSTS", ["*.test"])
+        upstream = FakeUpstream([201])
+        outbox = make_outbox(upstream)
+
+        row = await outbox.enqueue("loc", "tok", {"status": "new"}, "https://client.test/hook")
+        with broker.subscribe(submission_topic(row.id)) as sub:
+            done = await outbox.run_once()
+            frame = sub._queue.get_nowait()
+
+        assert done.status == "submitted"
+        assert done.hubrise_order_id == "hr1"
+        assert upstream.created == [{"status": "new"}]
+        assert b"event: submission.submitted" in frame
+        assert upstream.callbacks[0]["order_id"] == "hr1"
+        assert done.access_token == ""
+        assert await outbox.run_once() is None
+
+    @pytest.mark.asyncio
+    async def test_rate_limits_are_retried_with_backoff(self, broker):
+        upstream = FakeUpstream([429, 429, 429, 201])   # the client itself tries 3 times
+        outbox = make_outbox(upstream)
+        row = await outbox.enqueue("loc", "tok", {"status": "new"})
+
+        retrying = await outbox.run_once()
+        assert retrying.status == "pending"
+        assert retrying.next_attempt_at > datetime.now(timezone.utc)
+        assert await outbox.run_once() is None  # not due yet
+
+        outbox._save(row.id, next_attempt_at=datetime.now(timezone.utc))
+        done = await outbox.run_once()
+
+        assert done.status == "submitted"
+        assert done.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_fail_without_retry(self, broker):
+        outbox = make_outbox(FakeUpstream([422]))
+        await outbox.enqueue("loc", "tok", {"status": "new"})
+
+        failed = await outbox.run_once()
+
+        assert failed.status == "failed"
+        assert "422" in failed.last_error
+        assert failed.access_token == ""
+
+    @pytest.mark.asyncio
+    async def test_server_errors_go_to_reconcile_without_resending(self, broker):
+        upstream = FakeUpstream([502, 201])
+        outbox = make_outbox(upstream)
+        await outbox.enqueue("loc", "tok", {"status": "new"})
+
+        unknown = await outbox.run_once()
+
+        assert unknown.status == "reconcile"
+        assert await outbox.run_once() is None
+        assert upstream.statuses == [201]
+
+    @pytest.mark.asyncio
+    async def test_timeouts_after_sending_go_to_reconcile(self, broker):
+        def handler(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        outbox = make_outbox(FakeUpstream([]))
+        outbox._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await outbox.enqueue("loc", "tok", {"status": "new"})
+
+        assert (await outbox.run_once()).status == "reconcile"
+
+    @pytest.mark.asyncio
+    async def test_interrupted_submissions_go_to_reconcile(self, broker):
+        outbox = make_outbox(FakeUpstream([201]), lease=60)
+        row = await outbox.enqueue("loc", "tok", {"status": "new"})
+        outbox._claim_next()  # claimed, then the process "dies"
+        assert outbox._get(row.id).claimed_by == outbox.owner
+
+        # another worker starting up leaves a live claim alone...
+        sibling = OrderOutbox(outbox.bind, lease=60)
+        assert sibling._flag_interrupted() == 0
+        assert outbox._get(row.id).status == "submitting"
+
+        # ...and flags it once the lease has run out
+        outbox._save(row.id, claimed_at=datetime.now(timezone.utc) - timedelta(seconds=61))
+        assert sibling._flag_interrupted() == 1
+        assert outbox._get(row.id).status == "reconcile"
+
+
+def test_create_order_respond_async(monkeypatch):
+    outbox = make_outbox(FakeUpstream([]))
+    monkeypatch.setattr(orders, "order_outbox", outbox)
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.dependency_overrides[get_access_token] = lambda: "tok"
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[orders.client] = lambda: None
+    app.include_router(orders.router)
+    client = TestClient(app)
+
+    r = client.post("/orders", json={"status": "new", "total": "9.5"}, headers={"Prefer": "respond-async"})
+
+    assert r.status_code == 202
+    assert r.headers["Location"] == f"/orders/submissions/{r.json()['submission_id']}"
+    assert json.loads(outbox._get(r.json()["submission_id"]).body) == {"status": "new", "total": "9.50 GBP",
+                                                                       "items": None, "charges": [],
+                                                                       "discounts": [], "payments": None}
+    status = client.get(r.headers["Location"]).json()
+    assert status["status"] == "pending"
+    assert client.get("/orders/submissions/nope").status_code == 404
+
+    internal = client.post("/orders", json={"status": "new"}, headers={"Prefer": "respond-async"},
+                           params={"callback_url": "http://169.254.169.254/latest/meta-data"})
+    assert internal.status_code == 422
+
+
+def test_callback_hosts_are_allowlisted(monkeypatch):
+    monkeypatch.setattr(outbox_module.settings, "ORDER_CALLBACK_ALLOWED_HOSTS", ["hooks.example.com", "*.client.test"])
+
+    assert outbox_module.callback_allowed("https://hooks.example.com/x")
+    assert outbox_module.callback_allowed("https://pos.client.test/x")
+    assert not outbox_module.callback_allowed("https://evil-client.test/x")
+    assert not outbox_module.callback_allowed("http://localhost:8000/admin")
+    assert not outbox_module.callback_allowed("file:///etc/passwd")
@@ -0,0 +1,139 @@
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+import pytest
+from fastapi.encoders import jsonable_encoder
+from app.schemas.orders import OrderCreate, OrderPatch
+from app.services.order_payload import build_order_payload, format_money
+from benchmarks.fixtures import make_order_payload
+
+
+# e.g. "8.50 GBP" or "10 GBP" (2dp optional)
+_MONEY_WITH_CURRENCY = re.compile(r"^\s*-?\d+(?:\.\d{1,2})?\s+[A-Z]{3}\s*$")
+
+
+def _fmt_money(v, currency: str) -> Optional[str]:
+    if v is None:
+        return None
+    s = str(v).strip()
+    # keep if already formatted like "8.50 GBP"
+    if _MONEY_WITH_CURRENCY.match(s):
+        return s
+    try:
+        q = Decimal(s)
+    except InvalidOperation:
+        # pass through; HubRise will surface a precise error if bad
+        return s
+    return f"{q.quantize(Decimal('0.01'))} {currency}"
+
+
+def _fmt_decimal_string(v) -> Optional[str]:
+    return None if v is None else str(v)
+
+
+# The original dict-walking normaliser from the orders router: the reference
+# build_order_payload must match, and the baseline bench_order_payload times.
+def legacy_normalise(body: dict, currency: str) -> dict:
+    b = dict(body)
+
+    # TOP-LEVEL TOTAL
+    if "total" in b and b["total"] is not None:
+        b["total"] = _fmt_money(b["total"], currency)
+
+    # items
+    items = []
+    for it in b.get("items", []) or []:
+        it = dict(it)
+        it["price"] = _fmt_money(it.get("price"), currency)
+        if it.get("subtotal") is not None:
+            it["subtotal"] = _fmt_money(it.get("subtotal"), currency)
+        it["quantity"] = _fmt_decimal_string(it.get("quantity"))
+
+        # options
+        opts = []
+        for op in it.get("options", []) or []:
+            op = dict(op)
+            if op.get("price") is not None:
+                op["price"] = _fmt_money(op["price"], currency)
+            if op.get("quantity") is not None:
+                # HubRise expects options.quantity as integer
+                op["quantity"] = int(op["quantity"])
+            opts.append(op)
+        it["options"] = opts or None
+
+        items.append(it)
+    b["items"] = items or None
+
+    # charges
+    charges = []
+    for ch in b.get("charges", []) or []:
+        ch = dict(ch)
+        ch["price"] = _fmt_money(ch.get("price"), currency)
+        charges.append(ch)
+    b["charges"] = charges or []
+
+    # discounts
+    discounts = []
+    for d in b.get("discounts", []) or []:
+        d = dict(d)
+        d["price_off"] = _fmt_money(d.get("price_off"), currency)
+        discounts.append(d)
+    b["discounts"] = discounts or []
+
+    # payments
+    pays = []
+    for p in b.get("payments", []) or []:
+        p = dict(p)
+        p["amount"] = _fmt_money(p.get("amount"), currency)
+        pays.append(p)
+    b["payments"] = pays or None
+
+    return b
+
+
+def reference(model):
+    return legacy_normalise(jsonable_encoder(model, exclude_none=True), currency="GBP")
+
+
+def assert_identical(model):
+    # byte-for-byte, so key order matches too
+    assert json.dumps(build_order_payload(model, "GBP")) == json.dumps(reference(model))
+
+
+@pytest.mark.parametrize("items,options", [(0, 0), (1, 0), (5, 3), (200, 4)])
+def test_matches_reference_for_generated_orders(items, options):
+    assert_identical(OrderCreate.model_validate(make_order_payload(items=items, options_per_item=options)))
+
+
+@pytest.mark.parametrize("body", [
+    {"status": "new"},
+    {"status": "new", "items": [], "charges": [], "payments": []},
+    {"status": "accepted", "total": "12", "tip": "1.5", "items": [
+        {"product_name": " Pizza ", "price": "8.50 GBP", "quantity": 2.0, "subtotal": "17",
+         "options": [{"option_list_name": "Extras", "name": "Cheese", "quantity": 2}],
+         "deal_line": {"deal_key": "d1"}, "note": "extra field"},
+        {"product_name": "Bad price", "price": "abc", "quantity": "1"},
+    ], "charges": [{"name": "Bag", "price": "-0.1"}], "discounts": [{"name": "Promo", "price_off": "1.999"}],
+     "customer_id": "c1", "service_type": "collection"},
+])
+def test_matches_reference_for_edge_cases(body):
+    assert_identical(OrderCreate.model_validate(body))
+
+
+def test_matches_reference_for_patches():
+    patch = OrderPatch.model_validate({
+        "status": "accepted",
+        "items": [{"product_name": "x", "price": 3.5, "quantity": 1, "options": [{"price": "1", "quantity": "2"}]}],
+        "payments": [{"amount": "9.99 GBP"}],
+    })
+    assert_identical(patch)
+    assert_identical(OrderPatch(seller_notes="ready at 7"))
+
+
+def test_format_money():
+    assert format_money("8.5", "GBP") == "8.50 GBP"
+    assert format_money(" 8.50 EUR ", "GBP") == "8.50 EUR"
+    assert format_money(8, "GBP") == "8.00 GBP"
+    assert format_money("n/a", "GBP") == "n/a"
+    assert format_money(None, "GBP") is None
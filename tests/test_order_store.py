@@ -0,0 +1,122 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import httpx
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.db import init_db
+from app.services.order_fanout import parse_timestamp
+from app.services.order_store import OrderStore
+
+
+def ago(minutes):
+    return (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
+
+
+class FakeHubRise:
+    """Mock HubRise orders endpoints honouring `after` (newest first, single page)."""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        parts = request.url.path.split("/")
+        if parts[-2] == "orders":
+            return httpx.Response(200, json=next(o for o in self.orders if o["id"] == parts[-1]))
+        after = parse_timestamp(request.url.params.get("after"))
+        matching = [o for o in self.orders if not after or parse_timestamp(o["created_at"]) >= after]
+        return httpx.Response(200, json=sorted(matching, key=lambda o: o["created_at"], reverse=True))
+
+    def client(self) -> HubRiseClient:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self))
+        return HubRiseClient("tok", http, latency=LatencyTracker(), flights=SingleFlight())
+
+
+def make_store(**kwargs) -> OrderStore:
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    return OrderStore(bind, enabled=True, **kwargs)
+
+
+ORDERS = [
+    {"id": "o1", "status": "new", "created_at": ago(30), "customer_id": "c1", "private_ref": "R1"},
+    {"id": "o2", "status": "accepted", "created_at": ago(20), "customer_id": "c2"},
+    {"id": "o3", "status": "new", "created_at": ago(10), "customer_id": "c1"},
+]
+
+
+class TestOrderStore:
+    @pytest.mark.asyncio
+    async def test_sync_then_filtered_list_served_locally(self):
+        upstream = FakeHubRise(list(ORDERS))
+        store = make_store(page_size=2, live_updates=True)
+        hr = upstream.client()
+
+        assert await store.sync(hr, "loc") == 3
+        body = await store.list_raw(hr, "loc", {"status": "new", "after": ago(60)})
+
+        assert [o["id"] for o in json.loads(body.content)] == ["o3", "o1"]
+        assert len(upstream.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync_asks_only_for_newer_orders(self):
+        upstream = FakeHubRise(list(ORDERS))
+        store = make_store(resync_window=0)
+        hr = upstream.client()
+        await store.sync(hr, "loc")
+
+        upstream.orders.append({"id": "o4", "status": "new", "created_at": ago(1)})
+        pulled = await store.sync(hr, "loc")
+
+        # `after` is inclusive, so the previous newest order comes back too
+        assert pulled == 2
+        after = parse_timestamp(upstream.requests[-1].url.params["after"])
+        assert after == parse_timestamp(ORDERS[2]["created_at"])
+
+    @pytest.mark.asyncio
+    async def test_stale_location_is_synced_before_serving(self):
+        upstream = FakeHubRise(list(ORDERS))
+        store = make_store(max_staleness=0)
+        hr = upstream.client()
+
+        pages = await store.iter_raw_pages(hr, "loc", {"customer_id": "c1", "after": ago(60)})
+        ids = [json.loads(o)["id"] async for page in pages for o in page]
+
+        assert ids == ["o3", "o1"]
+        assert len(upstream.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_unmirrored_history_goes_upstream(self):
+        store = make_store(backfill_days=1)
+        hr = FakeHubRise(list(ORDERS)).client()
+
+        assert await store.list_raw(hr, "loc", {"after": ago(60 * 24 * 30)}) is None
+        assert await store.iter_raw_pages(hr, "loc", {}) is None
+        # fewer rows than a page, and no lower bound: there may be older orders
+        assert await store.list_raw(hr, "loc", {}) is None
+
+    @pytest.mark.asyncio
+    async def test_status_filters_go_upstream_without_callbacks(self):
+        store = make_store(live_updates=False)
+        hr = FakeHubRise(list(ORDERS)).client()
+
+        # the mirror only re-pulls the last `resync_window`; older statuses can be stale
+        assert await store.list_raw(hr, "loc", {"status": "new", "after": ago(60)}) is None
+        assert await store.iter_raw_pages(hr, "loc", {"status": "new", "after": ago(60)}) is None
+        assert await store.list_raw(hr, "loc", {"customer_id": "c1", "after": ago(60)}) is not None
+
+    @pytest.mark.asyncio
+    async def test_retrieve_mirrors_upstream_then_serves_locally(self):
+        upstream = FakeHubRise(list(ORDERS))
+        store = make_store()
+        hr = upstream.client()
+
+        first = await store.retrieve_raw(hr, "loc", "o2")
+        second = await store.retrieve_raw(hr, "loc", "o2")
+
+        assert json.loads(first.content) == json.loads(second.content) == ORDERS[1]
+        assert len(upstream.requests) == 1
+        assert store.stats()["hits"] == 1
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.clients.hubrise import HubRiseClient, LatencyTracker, SingleFlight
+from app.core.config import settings
+from app.core.db import init_db
+from app.core.deps import get_hubrise_conn, get_location_id
+from app.routers import orders
+from app.services.order_store import OrderStore
+from benchmarks.fixtures import make_order_payload
+
+
+def paged_handler(pages, calls):
+    """Serve `pages` (lists of orders) behind HubRise-style X-Cursor-Next headers."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        cursor = request.url.params.get("cursor")
+        calls.append(cursor)
+        await asyncio.sleep(0)
+        i = int(cursor) if cursor else 0
+        headers = {"X-Cursor-Next": str(i + 1)} if i + 1 < len(pages) else {}
+        return httpx.Response(200, json=pages[i], headers=headers)
+
+    return handler
+
+
+def create_app(handler) -> FastAPI:
+    def hubrise_client() -> HubRiseClient:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return HubRiseClient("tok", http, latency=LatencyTracker(), flights=SingleFlight())
+
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[orders.client] = hubrise_client
+    app.include_router(orders.router)
+    return app
+
+
+def test_list_orders_streams_all_pages_as_ndjson():
+    pages = [[{"id": "o1"}, {"id": "o2"}], [{"id": "o3"}]]
+    calls = []
+    client = TestClient(create_app(paged_handler(pages, calls)))
+
+    r = client.get("/orders", params={"all_pages": "true", "status": "completed"})
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == ["o1", "o2", "o3"]
+    assert calls == [None, "1"]
+
+
+def test_list_orders_single_page_is_passed_through():
+    payload = b'[{"id":"o1"}]'
+    client = TestClient(create_app(lambda request: httpx.Response(
+        200, content=payload, headers={"Content-Type": "application/json"})))
+
+    r = client.get("/orders")
+
+    assert r.status_code == 200
+    assert r.content == payload
+
+
+def test_account_orders_are_merged_across_locations():
+    by_location = {
+        "loc1": [{"id": "x3", "created_at": "2026-10-01T12:00:00+00:00"},
+                 {"id": "x1", "created_at": "2026-10-01T10:00:00+00:00"}],
+        "loc2": [{"id": "y2", "created_at": "2026-10-01T11:00:00+00:00"}],
+    }
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0)
+        if request.url.path.endswith("/accounts/acc/locations"):
+            return httpx.Response(200, json=[{"id": "loc1"}, {"id": "loc2"}])
+        loc = request.url.path.split("/")[-2]
+        return httpx.Response(200, json=by_location[loc])
+
+    app = create_app(handler)
+    app.dependency_overrides[orders.get_account_id] = lambda: "acc"
+    r = TestClient(app).get("/orders/account")
+
+    assert r.status_code == 200
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == ["x3", "y2", "x1"]
+
+
+def test_account_scope_single_page_uses_account_id():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json=[])
+
+    app = create_app(handler)
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok", "account_id": "acc"}
+    r = TestClient(app).get("/orders", params={"location_scope": "false"})
+
+    assert r.status_code == 200
+    assert seen[0].endswith("/accounts/acc/orders")
+
+
+def test_list_orders_served_from_mirror(monkeypatch):
+    def ago(hours):
+        return (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    monkeypatch.setattr(orders, "order_store", OrderStore(bind, enabled=True, live_updates=True))
+    calls = []
+    pages = [[{"id": "o2", "status": "new", "created_at": ago(1)},
+              {"id": "o1", "status": "accepted", "created_at": ago(2)}]]
+    client = TestClient(create_app(paged_handler(pages, calls)))
+
+    params = {"status": "new", "after": ago(24)}
+    first = client.get("/orders", params=params)
+    second = client.get("/orders", params=params)
+
+    assert [o["id"] for o in first.json()] == ["o2"]
+    assert second.json() == first.json()
+    assert len(calls) == 1  # one sync, then the mirror answers
+
+
+def test_trusted_create_sends_same_body_as_public_route(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "s3cret")
+    sent = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(201, json={"id": f"o{len(sent)}"})
+
+    client = TestClient(create_app(handler))
+    order = make_order_payload(items=30, options_per_item=2)
+    del order["private_ref"]  # not replayed between the two routes
+
+    public = client.post("/orders", json=order)
+    trusted = client.post("/orders/trusted", content=json.dumps(order),
+                          headers={"X-Internal-Token": "s3cret", "Content-Type": "application/json"})
+
+    assert public.status_code == trusted.status_code == 200
+    assert sent[0] == sent[1]
+
+
+def test_trusted_create_requires_token_and_valid_body(monkeypatch):
+    client = TestClient(create_app(lambda request: httpx.Response(201, json={"id": "o1"})))
+    order = {"status": "new", "items": [{"product_name": "Pizza", "price": "8.50", "quantity": 1}]}
+
+    assert client.post("/orders/trusted", json=order).status_code == 503
+
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "s3cret")
+    assert client.post("/orders/trusted", json=order, headers={"X-Internal-Token": "nope"}).status_code == 401
+
+    headers = {"X-Internal-Token": "s3cret"}
+    r = client.post("/orders/trusted", json={"status": "new", "items": [{"price": "1", "quantity": 1}]},
+                    headers=headers)
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["items", 0, "product_name"]
+    assert client.post("/orders/trusted", json={**order, "customer_id": "c1", "customer": {"email": "a@b.c"}},
+                       headers=headers).status_code == 422
+    assert client.post("/orders/trusted", json=order, headers=headers).json() == {"id": "o1"}
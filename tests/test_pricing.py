@@ -0,0 +1,145 @@
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.deps import get_hubrise_conn, get_location_id
+from app.routers import orders
+from app.services.catalog_index import compile_catalog
+from app.services.pricing import parse_money, price_order
+from tests.test_catalog_index import CATALOG
+
+IDX = compile_catalog("cat1", CATALOG)
+
+ORDER = {
+    "items": [
+        {"product_name": "Margherita", "sku_ref": "MARG-S", "price": "8.50 GBP", "quantity": "2",
+         "options": [{"option_list_name": "Extras", "name": "Extra cheese", "price": "1.00 GBP", "quantity": 2},
+                     {"option_list_name": "Extras", "name": "Olives", "price": "0.50 GBP", "removed": True}]},
+        {"product_name": "Pepperoni", "price": "12.00 GBP", "quantity": "1", "deleted": True},
+    ],
+    "charges": [{"name": "Delivery", "price": "2.50 GBP"}],
+    "discounts": [{"name": "Promo", "price_off": "3.00 GBP"}],
+}
+
+
+def test_parse_money():
+    assert parse_money("8.50 GBP") == (Decimal("8.50"), "GBP")
+    assert parse_money(" 8.5 ") == (Decimal("8.5"), None)
+    for bad in ("abc", "1 2 3", "NaN GBP", ""):
+        with pytest.raises(ValueError):
+            parse_money(bad)
+
+
+def test_prices_items_options_charges_and_discounts():
+    priced = price_order(ORDER, "GBP")
+
+    # (8.50 + 2 x 1.00) x 2 + 2.50 - 3.00; removed options and deleted items don't count
+    assert priced.total == Decimal("20.50")
+    assert priced.items[0].subtotal == Decimal("21.00")
+    assert priced.items[1] is None
+    assert priced.errors == [] and priced.warnings == []
+
+
+def test_stated_amounts_are_checked():
+    stated = {**ORDER, "total": "21.00 GBP",
+              "items": [{**ORDER["items"][0], "subtotal": "21.00 GBP"}, ORDER["items"][1]]}
+    assert price_order(stated, "GBP").errors == ["total: stated 21.00 GBP, computed 20.50 GBP"]
+
+    foreign = {"items": [{"price": "1.00 EUR", "quantity": 1}], "charges": [{"price": "x"}]}
+    assert len(price_order(foreign, "GBP").errors) == 2
+
+
+def test_catalog_fills_missing_prices_and_flags_differences():
+    basket = {"items": [
+        {"sku_ref": "MARG-L", "quantity": 1, "options": [{"ref": "OLIVES", "quantity": 2}]},
+        {"sku_ref": "PEP-L", "price": "10.00", "quantity": 1},
+        {"sku_ref": "GONE", "quantity": 1},
+    ]}
+    priced = price_order(basket, "GBP", IDX)
+
+    assert priced.items[0].subtotal == Decimal("12.00")
+    assert priced.items[1].subtotal == Decimal("10.00")
+    assert priced.items[2] is None
+    assert priced.total == Decimal("22.00")
+    assert priced.warnings == ["items[1]: price 10.00 GBP differs from catalog 12.00 GBP",
+                               "items[2]: sku_ref GONE is not in the catalog"]
+    assert priced.errors == ["items[2]: no price and no catalog price"]
+
+    filled = priced.fill({"items": [{}, {}, {}]})
+    assert filled["total"] == "22.00 GBP"
+    assert filled["items"][0] == {"price": "11.00 GBP", "subtotal": "12.00 GBP"}
+
+
+def make_app(handler):
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = FastAPI()
+    app.dependency_overrides[get_hubrise_conn] = lambda: {"access_token": "tok"}
+    app.dependency_overrides[get_location_id] = lambda: "loc"
+    app.dependency_overrides[orders.client] = lambda: orders.HubRiseClient("tok", upstream)
+    app.dependency_overrides[orders.catalog_index] = lambda: IDX
+    app.include_router(orders.router)
+    return app
+
+
+def test_create_order_rejects_bad_totals_locally(monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_PRICING", "validate")
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(201, json={"id": "o1"})
+
+    client = TestClient(make_app(handler))
+    order = {"status": "new", "items": [{"product_name": "Pizza", "price": "8.50", "quantity": 2}]}
+
+    r = client.post("/orders", json={**order, "total": "8.50"})
+    assert r.status_code == 422
+    assert r.json()["detail"]["pricing"]["total"] == "17.00 GBP"
+    assert sent == []
+
+    monkeypatch.setattr(settings, "ORDER_PRICING", "fill")
+    assert client.post("/orders", json=order).status_code == 200
+    assert b'"total":"17.00 GBP"' in sent[0].content
+    assert b'"subtotal":"17.00 GBP"' in sent[0].content
+
+
+def test_pricing_is_opt_in_and_uses_the_order_currency(monkeypatch):
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(201, json={"id": "o1"})
+
+    app = make_app(handler)
+    app.dependency_overrides[orders.cached_catalog_index] = lambda: None
+    client = TestClient(app)
+    order = {"status": "new", "items": [{"product_name": "Pizza", "price": "8.50", "quantity": 2}]}
+
+    # off by default: HubRise judges the totals, as before
+    assert client.post("/orders", json={**order, "total": "8.50"}).status_code == 200
+
+    monkeypatch.setattr(settings, "ORDER_PRICING", "validate")
+    assert client.post("/orders", json={**order, "total": "17.00 EUR"}).status_code == 200
+    assert b'"price":"8.50 EUR"' in sent[-1].content
+
+    euro_catalog = compile_catalog("cat2", {"products": [{"id": "p1", "skus": [{"id": "s1", "price": "3.00 EUR"}]}]})
+    assert euro_catalog.currency == "EUR" and IDX.currency == "GBP"
+
+
+def test_price_baskets():
+    client = TestClient(make_app(lambda request: httpx.Response(500)))
+
+    r = client.post("/orders/price", json={"baskets": [
+        {"items": [{"sku_ref": "MARG-S", "quantity": 3}]},
+        {"items": [{"sku_ref": "PEP-L", "quantity": 1}], "charges": [{"name": "Bag", "price": "0.10"}]},
+    ]})
+
+    assert r.status_code == 200
+    assert [b["total"] for b in r.json()["baskets"]] == ["25.50 GBP", "12.10 GBP"]
+    assert client.post("/orders/price", json={"baskets": []}).status_code == 422
+    for bad in ([1], [{"items": [1]}], [{"items": [{"options": ["x"]}]}], [{"charges": ["x"]}]):
+        assert client.post("/orders/price", json={"baskets": bad}).status_code == 422
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+from app.core.db import init_db
+from app.core.deps import get_hubrise_conn
+from app.core.sessions import ServerSessionMiddleware
+from app.models.session import WebSession
+from app.models.store import StoreConnection
+from app.services.sessions import SessionStore
+from app.services.tenants import TenantRegistry
+
+CONN = {"access_token": "tok", "account_id": "acc1", "location_id": "loc1", "catalog_id": "cat1",
+        "location_name": "Hut Bite Soho"}
+
+
+def make_bind():
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    return bind
+
+
+def make_store(bind, **kwargs) -> SessionStore:
+    return SessionStore(bind, registry=TenantRegistry(bind), **kwargs)
+
+
+class TestSessionStore:
+    @pytest.mark.asyncio
+    async def test_connection_lives_in_store_connection(self):
+        bind = make_bind()
+        store = make_store(bind)
+
+        sid = await store.save({"oauth_state": "s", "hubrise_conn": CONN})
+
+        with Session(bind) as session:
+            conn = session.exec(select(StoreConnection)).one()
+            row = session.get(WebSession, sid)
+        assert (conn.slug, conn.access_token, conn.location_name) == ("loc1", "tok", "Hut Bite Soho")
+        assert row.connection_id == conn.id and "hubrise_conn" not in row.data
+        assert await store.load(sid) == {"oauth_state": "s", "hubrise_conn": CONN}
+
+    @pytest.mark.asyncio
+    async def test_workers_share_sessions_and_only_logins_rotate_ids(self):
+        bind = make_bind()
+        a, b = make_store(bind), make_store(bind, cache_ttl=0)
+
+        first = await a.save({"oauth_state": "s"})
+        assert await b.load(first) == {"oauth_state": "s"}
+        assert await a.save({"oauth_state": "t"}, session_id=first) == first
+        assert await b.load(first) == {"oauth_state": "t"}
+
+        second = await a.save({"hubrise_conn": CONN}, session_id=first)
+        assert second != first
+        assert await b.load(first) is None
+        assert (await b.load(second))["hubrise_conn"]["access_token"] == "tok"
+        assert await a.save({"hubrise_conn": CONN, "cart": 1}, session_id=second) == second
+
+    @pytest.mark.asyncio
+    async def test_deletes_reach_other_workers_within_the_cache_ttl(self):
+        bind = make_bind()
+        a, b = make_store(bind), make_store(bind, cache_ttl=0.05)
+        sid = await a.save({"hubrise_conn": CONN})
+        assert await b.load(sid) is not None
+
+        await a.delete(sid)
+        await asyncio.sleep(0.06)
+
+        assert await b.load(sid) is None
+
+    @pytest.mark.asyncio
+    async def test_expired_sessions_are_ignored_and_purged(self):
+        bind = make_bind()
+        store = make_store(bind, max_age=60)
+        sid = await store.save({"x": 1})
+        with Session(bind) as session:
+            row = session.get(WebSession, sid)
+            row.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+            session.add(row)
+            session.commit()
+
+        assert await make_store(bind).load(sid) is None
+        assert await store.purge_expired() == 1
+
+
+def create_app(store: SessionStore) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ServerSessionMiddleware, store=store, secret_key="secret")
+
+    @app.post("/login")
+    def login(request: Request):
+        request.session["hubrise_conn"] = CONN
+        return {}
+
+    @app.post("/logout")
+    def logout(request: Request):
+        request.session.clear()
+        return {}
+
+    @app.get("/me")
+    def me(request: Request):
+        return get_hubrise_conn(request)
+
+    @app.get("/ping")
+    def ping():
+        return {}
+
+    return app
+
+
+def test_cookie_carries_only_a_signed_id(monkeypatch):
+    monkeypatch.setattr("app.core.deps.settings.HUBRISE_ACCESS_TOKEN", None)
+    store = make_store(make_bind())
+    client = TestClient(create_app(store))
+
+    assert client.get("/me").status_code == 401
+
+    r = client.post("/login")
+    cookie = r.cookies["session"]
+    assert len(cookie) < 80 and "tok" not in cookie
+
+    assert client.get("/me").json()["access_token"] == "tok"
+    ping = client.get("/ping")
+    assert "set-cookie" not in ping.headers      # untouched sessions aren't re-signed
+
+    client.post("/logout")
+    assert client.get("/me").status_code == 401
+
+
+def test_forged_cookie_is_cleared():
+    client = TestClient(create_app(make_store(make_bind())))
+    client.cookies.set("session", "made-up.signature")
+
+    r = client.get("/ping")
+
+    assert r.status_code == 200
+    assert 'session=null' in r.headers["set-cookie"]
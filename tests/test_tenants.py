@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
+
+from app.core import deps
+from app.core.db import init_db
+from app.routers import catalog
+from app.services.location_cache import LocationCache
+from app.services.sessions import SessionStore
+from app.services.tenants import TenantRegistry, upsert_connection
+
+SOHO = {"access_token": "tok-soho", "account_id": "acc1", "location_id": "loc-soho", "catalog_id": "cat1"}
+LEEDS = {"access_token": "tok-leeds", "account_id": "acc1", "location_id": "loc-leeds", "catalog_id": "cat2"}
+
+
+def make_registry() -> TenantRegistry:
+    bind = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(bind)
+    with Session(bind) as session:
+        upsert_connection(session, SOHO)
+        upsert_connection(session, LEEDS)
+        session.commit()
+    return TenantRegistry(bind)
+
+
+class TestTenantRegistry:
+    @pytest.mark.asyncio
+    async def test_resolves_slugs_and_hashed_api_keys(self):
+        registry = make_registry()
+        http = httpx.AsyncClient()
+        await registry.load(http)
+
+        key = await registry.create_api_key("loc-leeds", label="kiosk")
+
+        leeds = registry.by_api_key(key)
+        assert leeds.conn["access_token"] == "tok-leeds" and leeds.conn["catalog_id"] == "cat2"
+        assert leeds.client is not None and leeds.client is registry.by_api_key(key).client
+        assert registry.by_slug("loc-soho").conn["location_id"] == "loc-soho"
+        assert registry.by_api_key("hb_wrong") is None
+        assert registry.stats() == {"tenants": 2, "api_keys": 1}
+        with pytest.raises(LookupError):
+            await registry.create_api_key("loc-nowhere")
+
+    @pytest.mark.asyncio
+    async def test_oauth_upsert_refreshes_the_tenant(self):
+        registry = make_registry()
+        await registry.load(httpx.AsyncClient())
+        key = await registry.create_api_key("loc-soho")
+
+        store = SessionStore(registry.bind, registry=registry)
+        await store.save({"hubrise_conn": {**SOHO, "access_token": "tok-soho-2"}})
+
+        tenant = registry.by_api_key(key)
+        assert tenant.access_token == "tok-soho-2"
+        assert tenant.client is registry.by_slug("loc-soho").client
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    registry = make_registry()
+    upstream = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upstream.append(request)
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1], "opening_hours": {}})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    asyncio.run(registry.load(http))
+    monkeypatch.setattr(deps, "tenant_registry", registry)
+    monkeypatch.setattr(deps.settings, "INTERNAL_API_TOKEN", "internal")
+    monkeypatch.setattr(catalog, "location_cache", LocationCache(ttl=60, max_stale=0))
+    app = FastAPI()
+    app.state.http_client = http
+    app.include_router(catalog.router)
+    return registry, TestClient(app), upstream
+
+
+def test_api_key_routes_to_the_tenant_client(routed):
+    registry, client, upstream = routed
+    key = asyncio.run(registry.create_api_key("loc-leeds"))
+
+    r = client.get("/catalog/hours/status", headers={"X-Api-Key": key})
+
+    assert r.status_code == 200 and r.json()["location_id"] == "loc-leeds"
+    assert upstream[0].headers["X-Access-Token"] == "tok-leeds"
+    assert client.get("/catalog/hours/status", headers={"X-Api-Key": "hb_nope"}).status_code == 401
+
+
+def test_store_slug_needs_the_internal_token(routed):
+    registry, client, upstream = routed
+
+    assert client.get("/catalog/hours", headers={"X-Store-Slug": "loc-soho"}).status_code == 401
+    r = client.get("/catalog/hours", headers={"X-Store-Slug": "loc-soho", "X-Internal-Token": "internal"})
+    assert r.status_code == 200 and r.json()["id"] == "loc-soho"
+    unknown = client.get("/catalog/hours", headers={"X-Store-Slug": "loc-x", "X-Internal-Token": "internal"})
+    assert unknown.status_code == 404